@@ -1,5 +1,10 @@
 import numpy as np
-import matplotlib.pyplot as plt
+
+from mamdani_defuzz import defuzzify, defuzzify_batch
+from mamdani_membership import HIGH, LOW, MEDIUM
+from mamdani_rules import compile_rule_base
+from mamdani_sugeno import SugenoEngine, engine_for
+from pipeline_trace import trace_stages
 
 def fuzzy_and(x, y):
     """Нечеткая операция AND (пересечение)"""
@@ -9,35 +14,24 @@ def fuzzy_or(x, y):
     """Нечеткая операция OR (объединение)"""
     return max(x, y)
 
-def membership_low(value):
-    """Степень принадлежности к низкому множеству"""
-    if value <= 0:
-        return 1
-    elif 0 < value < 0.5:
-        return 1 - (value / 0.5)
-    else:
-        return 0
-
-def membership_medium(value):
-    """Степень принадлежности к среднему множеству"""
-    if 0 <= value <= 1:
-        if value < 0.5:
-            return 2 * value  # Линейное увеличение
-        elif value <= 1:
-            return 2 * (1 - value)  # Линейное уменьшение
-    return 0
-
-def membership_high(value):
-    """Степень принадлежности к высокому множеству"""
-    if value < 0.5:
-        return 0
-    elif 0.5 <= value < 1:
-        return (value - 0.5) / 0.5
-    else:
-        return 1
+# Функции принадлежности с точками излома 0.5 из mamdani_membership: скалярные
+# версии для пошагового вывода и векторизованные для массивов
+membership_low, membership_medium, membership_high = LOW.scalar, MEDIUM.scalar, HIGH.scalar
+membership_low_batch, membership_medium_batch, membership_high_batch = LOW.batch, MEDIUM.batch, HIGH.batch
+
+def _check_width(width, rule_base):
+    """Число входов должно совпадать с числом переменных правил: лишние входы не отбрасываются молча"""
+    expected = 2 if rule_base is None else len(rule_base.variables)
+    if width != expected:
+        where = "правил fuzzy_rule" if rule_base is None else "переменных rule_base"
+        raise ValueError(f"Ожидается {expected} входа по числу {where}, получено {width}")
+
+def fuzzy_rule(inputs, rule_base=None):
+    """Применяем нечеткие правила к входным значениям (или правила из rule_base ко всем входам)"""
+    _check_width(len(inputs), rule_base)
+    if rule_base is not None:
+        return tuple(float(v) for v in rule_base.evaluate(np.asarray([inputs], dtype=np.float64))[0])
 
-def fuzzy_rule(inputs):
-    """Применяем нечеткие правила к входным значениям"""
     memberships = [(
         membership_low(input_value),
         membership_medium(input_value),
@@ -55,8 +49,24 @@ def aggregation(outputs):
     """Агрегация выходных значений"""
     return (outputs[0], outputs[1], outputs[2])
 
-def defuzzification(output):
-    """Дефузификация: вычисляет итоговое значение на основе нечетких значений"""
+# Выходные множества membership_low/medium/high в виде узлов кусочно-линейных функций
+OUTPUT_SETS = (
+    ((0, 0.5, 1), (1, 0, 0)),  # Низкое
+    ((0, 0.5, 1), (0, 1, 0)),  # Среднее
+    ((0, 0.5, 1), (0, 0, 1)),  # Высокое
+)
+
+def defuzzification(output, method="weighted", resolution=None):
+    """
+    Дефузификация: вычисляет итоговое значение на основе нечетких значений.
+
+    method="weighted" - взвешенное среднее по точкам 0, 0.5 и 1; "centroid",
+    "bisector", "mom" и "som" усекают выходные множества и считаются точно
+    (resolution=None) или на сетке из resolution точек.
+    """
+    if method != "weighted":
+        return defuzzify(output, OUTPUT_SETS, method, resolution)
+
     low, medium, high = output
 
     total_area = low + medium + high
@@ -67,21 +77,122 @@ def defuzzification(output):
     defuzzified_value = (0 * low + 0.5 * medium + 1 * high) / total_area
     return defuzzified_value
 
+def fuzzy_rule_batch(inputs):
+    """Нечеткие правила для массива входов формы (N, 2) (аналог fuzzy_rule)"""
+    input1 = inputs[:, 0]
+    input2 = inputs[:, 1]
+
+    # Применяем нечеткие правила
+    output_low = np.minimum(membership_low_batch(input1), membership_high_batch(input2))
+    output_medium = np.minimum(membership_medium_batch(input1), membership_medium_batch(input2))
+    output_high = np.minimum(membership_high_batch(input1), membership_low_batch(input2))
+
+    return (output_low, output_medium, output_high)
+
+def defuzzification_batch(output):
+    """Дефузификация для массивов (аналог defuzzification)"""
+    low, medium, high = output
+
+    total_area = low + medium + high
+    weighted = 0 * low + 0.5 * medium + 1 * high
+    # Там, где площадь равна нулю, результат 0, как и в скалярной версии
+    return np.divide(weighted, total_area, out=np.zeros_like(total_area), where=total_area != 0)
+
+_TERMS = {"low": LOW, "medium": MEDIUM, "high": HIGH}
+
+# Правила fuzzy_rule в декларативном виде. Чтобы учесть третий и следующие входы,
+# достаточно добавить переменные и правила и передать базу в infer_batch или main
+# (см. пример RULE_BASE_3 ниже)
+RULE_BASE = compile_rule_base({
+    "variables": {"input1": _TERMS, "input2": _TERMS},
+    "output": ["low", "medium", "high"],
+    "rules": [
+        {"if": [["input1", "low"], ["input2", "high"]], "then": "low"},  # Низкая температура и высокая влажность
+        {"if": [["input1", "medium"], ["input2", "medium"]], "then": "medium"},  # Средняя температура и средняя влажность
+        {"if": [["input1", "high"], ["input2", "low"]], "then": "high"},  # Высокая температура и низкая влажность
+    ],
+})
+
+# Пример базы правил для трех входов: правила fuzzy_rule и третий вход, который
+# при высоком значении усиливает выход high, а при низком - выход low
+RULE_BASE_3 = compile_rule_base({
+    "variables": {"input1": _TERMS, "input2": _TERMS, "input3": _TERMS},
+    "output": ["low", "medium", "high"],
+    "rules": [
+        {"if": [["input1", "low"], ["input2", "high"]], "then": "low"},
+        {"if": [["input1", "medium"], ["input2", "medium"]], "then": "medium"},
+        {"if": [["input1", "high"], ["input2", "low"]], "then": "high"},
+        {"if": [["input3", "high"], ["input1", "not low"]], "then": "high"},
+        {"if": [["input3", "low"], ["input1", "not high"]], "then": "low"},
+    ],
+})
+
+# Выходы правил для вывода Сугено нулевого порядка: центры выходных термов
+SUGENO_OUTPUTS = {"low": 0.0, "medium": 0.5, "high": 1.0}
+SUGENO = SugenoEngine(RULE_BASE, SUGENO_OUTPUTS)
+
+MODES = ("mamdani", "sugeno")
+
+def sugeno(rule_base=None):
+    """Движок Сугено для базы правил (по умолчанию - правила fuzzy_rule) из кэша engine_for"""
+    if rule_base is None:
+        return SUGENO
+    return engine_for(rule_base, SUGENO_OUTPUTS)
+
+def infer_batch(inputs, method="weighted", resolution=None, rule_base=None, mode="mamdani"):
+    """
+    Пакетная нечеткая импликация Мамдани без графиков.
+
+    Args:
+        inputs (np.ndarray): Массив формы (N, k): k = 2 для правил fuzzy_rule,
+            иначе k = len(rule_base.variables).
+        method (str): Метод дефузификации, как в defuzzification.
+        resolution (int | None): Число точек сетки для методов усечения.
+        rule_base (CompiledRuleBase | None): База правил с выходными термами
+            low/medium/high; число ее переменных задает k. По умолчанию - правила
+            fuzzy_rule для двух входов.
+        mode (str): "mamdani" или "sugeno" - взвешенное среднее выходов правил
+            без агрегации и дефузификации.
+
+    Returns:
+        np.ndarray: Массив формы (N,) с результатами, совпадающими с
+        defuzzification(aggregation(fuzzy_rule(row))) для каждой строки в режиме "mamdani".
+    """
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим вывода: {mode!r}, доступны: {MODES}")
+    inputs = np.asarray(inputs, dtype=np.float64)
+    if inputs.ndim != 2:
+        raise ValueError(f"Ожидается массив формы (N, k), получено {inputs.shape}")
+    _check_width(inputs.shape[1], rule_base)
+    if mode == "sugeno":
+        return sugeno(rule_base).infer_batch(inputs)
+    if rule_base is not None:
+        output = tuple(rule_base.evaluate(inputs).T)
+    else:
+        output = fuzzy_rule_batch(inputs)
+
+    # aggregation здесь тождественна, поэтому выходы сразу идут в дефузификацию
+    if method != "weighted":
+        return defuzzify_batch(np.column_stack(output), OUTPUT_SETS, method, resolution)
+    return defuzzification_batch(output)
+
 def plot_memberships(inputs, output):
     """Построение графиков степеней принадлежности"""
+    import matplotlib.pyplot as plt
+
     x_values = np.linspace(0, 1, 100)
 
     # Степени принадлежности для входных переменных
     memberships = [(
-        [membership_low(x) for x in x_values],
-        [membership_medium(x) for x in x_values],
-        [membership_high(x) for x in x_values]
+        membership_low_batch(x_values),
+        membership_medium_batch(x_values),
+        membership_high_batch(x_values)
     ) for input_value in inputs]
 
     # Степени принадлежности для выходных переменных
-    output_low = [min(membership_low(x), output[0]) for x in x_values]
-    output_medium = [min(membership_medium(x), output[1]) for x in x_values]
-    output_high = [min(membership_high(x), output[2]) for x in x_values]
+    output_low = np.minimum(membership_low_batch(x_values), output[0])
+    output_medium = np.minimum(membership_medium_batch(x_values), output[1])
+    output_high = np.minimum(membership_high_batch(x_values), output[2])
 
     plt.figure(figsize=(12, 8))
 
@@ -111,9 +222,15 @@ def plot_memberships(inputs, output):
     plt.tight_layout()
     plt.show()
 
-def main(inputs):
-    """Главная функция, которая осуществляет нечеткую импликацию Мамдани"""
-    output = fuzzy_rule(inputs)
+def main(inputs, rule_base=None, plot=False, mode="mamdani"):
+    """Главная функция, которая осуществляет нечеткую импликацию Мамдани (или Сугено при mode="sugeno")"""
+    if mode == "sugeno":
+        # Выходных множеств у Сугено нет, поэтому и графиков тоже
+        _check_width(len(inputs), rule_base)
+        return sugeno(rule_base)(*inputs)
+    if mode != "mamdani":
+        raise ValueError(f"Неизвестный режим вывода: {mode!r}, доступны: {MODES}")
+    output = fuzzy_rule(inputs, rule_base)
 
     # Агрегация выходных значений
     aggregated_output = aggregation(output)
@@ -121,13 +238,22 @@ def main(inputs):
     # Дефузификация
     result = defuzzification(aggregated_output)
 
-    # Построение графиков
-    plot_memberships(inputs, aggregated_output)
+    # Построение графиков (только по запросу, чтобы не импортировать matplotlib)
+    if plot:
+        plot_memberships(inputs, aggregated_output)
 
     return result
 
+# Этапы нечеткого вывода попадают в трассировку только при включенной трассировке
+trace_stages(globals(), "fuzzy_rule", "aggregation", "defuzzification", "plot_memberships")
+
 # Примеры использования
 if __name__ == "__main__":
-    inputs = [0.4, 0.7, 0.8]  # Пример входных значений
-    result = main(inputs)
+    inputs = [0.4, 0.7]  # Пример входных значений
+    result = main(inputs, plot=True)
     print(f"Результат нечеткой импликации: {result:.2f}")
+
+    # Третий вход учитывается только правилами, в которых он участвует
+    inputs = [0.4, 0.7, 0.8]
+    result = main(inputs, rule_base=RULE_BASE_3)
+    print(f"Результат нечеткой импликации для трех входов: {result:.2f}")
@@ -1,5 +1,10 @@
 import numpy as np
-import matplotlib.pyplot as plt
+
+from mamdani_defuzz import defuzzify, defuzzify_batch
+from mamdani_membership import HIGH, LOW, MEDIUM
+from mamdani_rules import compile_rule_base
+from mamdani_sugeno import sugeno_engine
+from pipeline_trace import trace_stages
 
 def fuzzy_and(x, y):
     """Нечеткая операция AND (пересечение)"""
@@ -13,32 +18,10 @@ def fuzzy_not(x):
     """Нечеткая операция NOT (отрицание)"""
     return 1 - x
 
-def membership_low(value):
-    """Степень принадлежности к низкому множеству"""
-    if value <= 0:
-        return 1
-    elif 0 < value < 0.5:
-        return 1 - (value / 0.5)
-    else:
-        return 0
-
-def membership_medium(value):
-    """Степень принадлежности к среднему множеству"""
-    if 0 <= value <= 1:
-        if value < 0.5:
-            return 2 * value  # Линейное увеличение
-        elif value <= 1:
-            return 2 * (1 - value)  # Линейное уменьшение
-    return 0
-
-def membership_high(value):
-    """Степень принадлежности к высокому множеству"""
-    if value < 0.5:
-        return 0
-    elif 0.5 <= value < 1:
-        return (value - 0.5) / 0.5
-    else:
-        return 1
+# Функции принадлежности с точками излома 0.5 из mamdani_membership: скалярные
+# версии для пошагового вывода и векторизованные для массивов
+membership_low, membership_medium, membership_high = LOW.scalar, MEDIUM.scalar, HIGH.scalar
+membership_low_batch, membership_medium_batch, membership_high_batch = LOW.batch, MEDIUM.batch, HIGH.batch
 
 def fuzzy_rule(input1, input2):
     """Применяем нечеткие правила к входным значениям"""
@@ -68,8 +51,24 @@ def aggregation(outputs):
     return (aggregated_low, aggregated_medium, aggregated_high)
 
 
-def defuzzification(output):
-    """Дефузификация: вычисляет итоговое значение на основе нечетких значений"""
+# Выходные множества membership_low/medium/high в виде узлов кусочно-линейных функций
+OUTPUT_SETS = (
+    ((0, 0.5, 1), (1, 0, 0)),  # Низкое
+    ((0, 0.5, 1), (0, 1, 0)),  # Среднее
+    ((0, 0.5, 1), (0, 0, 1)),  # Высокое
+)
+
+def defuzzification(output, method="weighted", resolution=None):
+    """
+    Дефузификация: вычисляет итоговое значение на основе нечетких значений.
+
+    method="weighted" - взвешенное среднее по точкам 0, 0.5 и 1; "centroid",
+    "bisector", "mom" и "som" усекают выходные множества и считаются точно
+    (resolution=None) или на сетке из resolution точек.
+    """
+    if method != "weighted":
+        return defuzzify(output, OUTPUT_SETS, method, resolution)
+
     low, medium, high = output
 
     total_area = low + medium + high
@@ -80,23 +79,196 @@ def defuzzification(output):
     defuzzified_value = (0 * low + 0.5 * medium + 1 * high) / total_area
     return defuzzified_value
 
+def fuzzy_rule_batch(input1, input2):
+    """Нечеткие правила для массивов входных значений (аналог fuzzy_rule)"""
+    low1 = membership_low_batch(input1)
+    medium1 = membership_medium_batch(input1)
+    high1 = membership_high_batch(input1)
+
+    low2 = membership_low_batch(input2)
+    medium2 = membership_medium_batch(input2)
+    high2 = membership_high_batch(input2)
+
+    output_low = np.minimum(low1, high2)
+    output_medium = np.minimum(medium1, medium2)
+    output_high = np.minimum(high1, low2)
+
+    return (output_low, output_medium, output_high)
+
+def aggregation_batch(outputs):
+    """Агрегация выходных значений для массивов (аналог aggregation)"""
+    aggregated_low = np.maximum(outputs[0], outputs[1])
+    aggregated_medium = np.maximum(outputs[1], outputs[2])
+    aggregated_high = np.maximum(outputs[2], outputs[0])
+    return (aggregated_low, aggregated_medium, aggregated_high)
+
+def defuzzification_batch(output):
+    """Дефузификация для массивов (аналог defuzzification)"""
+    low, medium, high = output
+
+    total_area = low + medium + high
+    weighted = 0 * low + 0.5 * medium + 1 * high
+    # Там, где площадь равна нулю, результат 0, как и в скалярной версии
+    return np.divide(weighted, total_area, out=np.zeros_like(total_area), where=total_area != 0)
+
+_TERMS = {"low": LOW, "medium": MEDIUM, "high": HIGH}
+
+# Те же правила, что в fuzzy_rule + aggregation: агрегация OR переносит каждое
+# правило еще и на соседний выходной терм
+RULE_BASE = compile_rule_base({
+    "variables": {"input1": _TERMS, "input2": _TERMS},
+    "output": ["low", "medium", "high"],
+    "rules": [
+        {"if": [["input1", "low"], ["input2", "high"]], "then": "low"},
+        {"if": [["input1", "medium"], ["input2", "medium"]], "then": "low"},
+        {"if": [["input1", "medium"], ["input2", "medium"]], "then": "medium"},
+        {"if": [["input1", "high"], ["input2", "low"]], "then": "medium"},
+        {"if": [["input1", "high"], ["input2", "low"]], "then": "high"},
+        {"if": [["input1", "low"], ["input2", "high"]], "then": "high"},
+    ],
+})
+
+# Правила fuzzy_rule для вывода Сугено нулевого порядка: выход правила - центр
+# выходного терма (те же точки 0, 0.5 и 1, что и во взвешенной дефузификации)
+SUGENO = sugeno_engine({
+    "variables": {"input1": _TERMS, "input2": _TERMS},
+    "output": ["low", "medium", "high"],
+    "rules": [
+        {"if": [["input1", "low"], ["input2", "high"]], "then": "low"},
+        {"if": [["input1", "medium"], ["input2", "medium"]], "then": "medium"},
+        {"if": [["input1", "high"], ["input2", "low"]], "then": "high"},
+    ],
+}, {"low": 0.0, "medium": 0.5, "high": 1.0})
+
+MODES = ("mamdani", "sugeno")
+
+def infer_batch(inputs, method="weighted", resolution=None, rule_base=None, mode="mamdani"):
+    """
+    Пакетная нечеткая импликация Мамдани без графиков.
+
+    Args:
+        inputs (np.ndarray): Массив формы (N, 2) с парами входных значений.
+        method (str): Метод дефузификации, как в defuzzification.
+        resolution (int | None): Число точек сетки для методов усечения.
+        rule_base (CompiledRuleBase | None): База правил с выходными термами
+            low/medium/high; по умолчанию - правила fuzzy_rule и aggregation.
+        mode (str): "mamdani" или "sugeno" - взвешенное среднее выходов правил
+            SUGENO без агрегации и дефузификации.
+
+    Returns:
+        np.ndarray: Массив формы (N,) с результатами, совпадающими с
+        defuzzification(aggregation(fuzzy_rule(input1, input2))) в режиме "mamdani".
+    """
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим вывода: {mode!r}, доступны: {MODES}")
+    inputs = np.asarray(inputs, dtype=np.float64)
+    if mode == "sugeno":
+        return SUGENO.infer_batch(inputs)
+    if rule_base is not None:
+        aggregated_output = tuple(rule_base.evaluate(inputs).T)
+    else:
+        if inputs.ndim != 2 or inputs.shape[1] != 2:
+            raise ValueError(f"Ожидается массив формы (N, 2), получено {inputs.shape}")
+        output = fuzzy_rule_batch(inputs[:, 0], inputs[:, 1])
+        aggregated_output = aggregation_batch(output)
+    if method != "weighted":
+        return defuzzify_batch(np.column_stack(aggregated_output), OUTPUT_SETS, method, resolution)
+    return defuzzification_batch(aggregated_output)
+
+# Строк в срезе infer_into: рабочие массивы среза (9 по 64 КБ) помещаются в кэш L2
+SLICE_ROWS = 8192
+
+def _infer_weighted_into(input1, input2, out, buffers):
+    """
+    fuzzy_rule_batch, aggregation_batch и defuzzification_batch для одного
+    среза в заранее выделенных массивах, в том же порядке операций.
+    """
+    low1, medium1, high1, low2, medium2, high2, total, scratch, nonzero = buffers
+    LOW.batch_into(input1, low1, scratch)
+    MEDIUM.batch_into(input1, medium1, scratch)
+    HIGH.batch_into(input1, high1, scratch)
+    LOW.batch_into(input2, low2, scratch)
+    MEDIUM.batch_into(input2, medium2, scratch)
+    HIGH.batch_into(input2, high2, scratch)
+
+    # Выходы правил на месте степеней первого входа
+    np.minimum(low1, high2, out=low1)
+    np.minimum(medium1, medium2, out=medium1)
+    np.minimum(high1, low2, out=high1)
+    # Агрегация на месте степеней второго входа
+    np.maximum(low1, medium1, out=low2)
+    np.maximum(medium1, high1, out=medium2)
+    np.maximum(high1, low1, out=high2)
+
+    np.add(low2, medium2, out=total)
+    np.add(total, high2, out=total)
+    # 0 * low + 0.5 * medium + 1 * high: первое слагаемое - точный ноль
+    np.multiply(medium2, 0.5, out=medium2)
+    np.add(medium2, high2, out=medium2)
+    np.not_equal(total, 0, out=nonzero)
+    out.fill(0.0)
+    np.divide(medium2, total, out=out, where=nonzero)
+
+def infer_into(inputs, out, method="weighted", resolution=None, rule_base=None, mode="mamdani",
+               slice_rows=SLICE_ROWS):
+    """
+    Пакетный вывод в заранее выделенный массив результатов.
+
+    Вход и выход могут быть np.memmap больше оперативной памяти: данные
+    обрабатываются срезами по slice_rows строк. Для взвешенной дефузификации
+    по правилам fuzzy_rule рабочие массивы выделяются один раз на вызов, и на
+    срез не создается ни одного нового массива; остальные режимы вызывают
+    infer_batch на каждом срезе. Результаты совпадают с infer_batch побитно.
+
+    Args:
+        inputs (np.ndarray): Массив формы (N, 2), в том числе np.memmap.
+        out (np.ndarray): Массив float64 формы (N,), в том числе np.memmap.
+        method, resolution, rule_base, mode: Как в infer_batch.
+        slice_rows (int): Строк в срезе.
+
+    Returns:
+        np.ndarray: out.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим вывода: {mode!r}, доступны: {MODES}")
+    if inputs.ndim != 2 or inputs.shape[1] != 2:
+        raise ValueError(f"Ожидается массив формы (N, 2), получено {inputs.shape}")
+    if out.shape != (len(inputs),) or out.dtype != np.float64:
+        raise ValueError(f"Ожидается массив float64 формы ({len(inputs)},), получено {out.dtype} {out.shape}")
+
+    fused = mode == "mamdani" and method == "weighted" and rule_base is None
+    if fused:
+        buffers = [np.empty(min(slice_rows, len(inputs))) for _ in range(8)]
+        buffers.append(np.empty(len(buffers[0]), dtype=bool))
+    for start in range(0, len(inputs), slice_rows):
+        stop = min(start + slice_rows, len(inputs))
+        if not fused:
+            out[start:stop] = infer_batch(inputs[start:stop], method, resolution, rule_base, mode)
+            continue
+        rows = stop - start
+        view = [buffer[:rows] for buffer in buffers]
+        _infer_weighted_into(inputs[start:stop, 0], inputs[start:stop, 1], out[start:stop], view)
+    return out
+
 def plot_memberships(input1, input2, output):
     """Построение графиков степеней принадлежности"""
+    import matplotlib.pyplot as plt
+
     x_values = np.linspace(0, 1, 100)
 
     # Степени принадлежности для входных переменных
-    low1 = [membership_low(x) for x in x_values]
-    medium1 = [membership_medium(x) for x in x_values]
-    high1 = [membership_high(x) for x in x_values]
+    low1 = membership_low_batch(x_values)
+    medium1 = membership_medium_batch(x_values)
+    high1 = membership_high_batch(x_values)
 
-    low2 = [membership_low(x) for x in x_values]
-    medium2 = [membership_medium(x) for x in x_values]
-    high2 = [membership_high(x) for x in x_values]
+    low2 = membership_low_batch(x_values)
+    medium2 = membership_medium_batch(x_values)
+    high2 = membership_high_batch(x_values)
 
     # Степени принадлежности для выходных переменных
-    output_low = [min(membership_low(x), output[0]) for x in x_values]  # Низкое
-    output_medium = [min(membership_medium(x), output[1]) for x in x_values]  # Среднее
-    output_high = [min(membership_high(x), output[2]) for x in x_values]  # Высокое
+    output_low = np.minimum(membership_low_batch(x_values), output[0])  # Низкое
+    output_medium = np.minimum(membership_medium_batch(x_values), output[1])  # Среднее
+    output_high = np.minimum(membership_high_batch(x_values), output[2])  # Высокое
 
     plt.figure(figsize=(12, 8))
 
@@ -134,8 +306,13 @@ def plot_memberships(input1, input2, output):
     plt.tight_layout()
     plt.show()
 
-def main(input1, input2):
-    """Главная функция, которая осуществляет нечеткую импликацию Мамдани"""
+def main(input1, input2, plot=False, mode="mamdani"):
+    """Главная функция, которая осуществляет нечеткую импликацию Мамдани (или Сугено при mode="sugeno")"""
+    if mode == "sugeno":
+        # Выходных множеств у Сугено нет, поэтому и графиков тоже
+        return SUGENO(input1, input2)
+    if mode != "mamdani":
+        raise ValueError(f"Неизвестный режим вывода: {mode!r}, доступны: {MODES}")
     output = fuzzy_rule(input1, input2)
 
     # Агрегация выходных значений
@@ -144,14 +321,18 @@ def main(input1, input2):
     # Дефузификация
     result = defuzzification(aggregated_output)
 
-    # Построение графиков
-    plot_memberships(input1, input2, aggregated_output)
+    # Построение графиков (только по запросу, чтобы не импортировать matplotlib)
+    if plot:
+        plot_memberships(input1, input2, aggregated_output)
 
     return result
 
+# Этапы нечеткого вывода попадают в трассировку только при включенной трассировке
+trace_stages(globals(), "fuzzy_rule", "aggregation", "defuzzification", "plot_memberships")
+
 # Примеры использования
 if __name__ == "__main__":
     input1 = 0.4  # Пример входного значения 1
     input2 = 0.7  # Пример входного значения 2
-    result = main(input1, input2)
+    result = main(input1, input2, plot=True)
     print(f"Результат нечеткой импликации: {result:.2f}")
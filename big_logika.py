@@ -1,8 +1,15 @@
-
 import os
-from ultralytics import YOLO
 import numpy as np
-import matplotlib.pyplot as plt
+
+from pipeline_trace import span, trace_stages
+from yolo_registry import get_model
+from yolo_cascade import CascadeRunner
+from yolo_detect import detect_confidences
+from Mamdani_two_input import aggregation_batch, defuzzification_batch
+from mamdani_cache import function_version, rule_base_version
+from mamdani_membership import HIGH, LOW, MEDIUM
+from mamdani_rules import compile_rule_base
+from mamdani_sugeno import SugenoEngine
 
 def detect_objects(model, image_path, target_class):
     """
@@ -14,20 +21,10 @@ def detect_objects(model, image_path, target_class):
         target_class (str): Класс объекта, который нужно детектировать.
 
     Returns:
-        float: Достоверность детекции объекта.
+        float: Максимальная достоверность детекции объекта (0, если объект не найден).
     """
     try:
-        results = model(image_path)
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                xmin, ymin, xmax, ymax = box.xyxy[0]
-                conf = box.conf[0]
-                class_id = int(box.cls[0])
-                class_name = model.names[class_id]
-                if class_name == target_class:
-                    return conf
-        return 0
+        return float(detect_confidences(model, image_path, [target_class])[0])
     except Exception as e:
         print(f"Ошибка детекции объектов: {e}")
         return 0
@@ -70,56 +67,10 @@ def fuzzy_not(x):
     """
     return 1 - x
 
-def membership_low(value):
-    """
-    Функция принадлежности для низких значений.
-
-    Args:
-        value (float): Входной параметр.
-
-    Returns:
-        float: Значение принадлежности.
-    """
-    if value <= 0:
-        return 1
-    elif 0 < value < 0.5:
-        return 1 - (value / 0.5)
-    else:
-        return 0
-
-def membership_medium(value):
-    """
-    Функция принадлежности для средних значений.
-
-    Args:
-        value (float): Входной параметр.
-
-    Returns:
-        float: Значение принадлежности.
-    """
-    if 0 <= value <= 1:
-        if value < 0.5:
-            return 2 * value
-        elif value <= 1:
-            return 2 * (1 - value)
-    return 0
-
-def membership_high(value):
-    """
-    Функция принадлежности для высоких значений.
-
-    Args:
-        value (float): Входной параметр.
-
-    Returns:
-        float: Значение принадлежности.
-    """
-    if value < 0.5:
-        return 0
-    elif 0.5 <= value < 1:
-        return (value - 0.5) / 0.5
-    else:
-        return 1
+# Функции принадлежности с точками излома 0.5 из mamdani_membership: скалярные
+# версии для пошагового вывода и векторизованные для массивов
+membership_low, membership_medium, membership_high = LOW.scalar, MEDIUM.scalar, HIGH.scalar
+membership_low_batch, membership_medium_batch, membership_high_batch = LOW.batch, MEDIUM.batch, HIGH.batch
 
 def fuzzy_rule(input1, input2):
     """
@@ -185,6 +136,103 @@ def defuzzification(output):
     defuzzified_value = (0 * low + 0.5 * medium + 1 * high) / total_area
     return defuzzified_value
 
+def membership_high_boost(value):
+    """
+    Высокое значение, учитываемое только при значении больше 0.7 (усиление
+    выхода high в fuzzy_rule).
+
+    Args:
+        value (float | np.ndarray): Входной параметр.
+
+    Returns:
+        float | np.ndarray: Значение принадлежности.
+    """
+    if isinstance(value, (float, int)):
+        return membership_high(value) if value > 0.7 else 0.0
+    values = np.asarray(value, dtype=np.float64)
+    return np.where(values > 0.7, membership_high_batch(values), 0.0)
+
+_TERMS = {"low": LOW, "medium": MEDIUM, "high": HIGH, "high_boost": membership_high_boost}
+
+# Правила fuzzy_rule в скомпилированном виде; усиления выхода high записаны
+# отдельными правилами, а максимум по правилам одного терма совпадает с max в fuzzy_rule.
+# По ним работают fuzzy_rule_batch и вывод Сугено, по ним же считается версия для кэша
+RULE_BASE = compile_rule_base({
+    "variables": {"input1": _TERMS, "input2": _TERMS},
+    "output": ["low", "medium", "high"],
+    "rules": [
+        {"if": [["input1", "low"], ["input2", "high"]], "then": "low"},
+        {"if": [["input1", "medium"], ["input2", "medium"]], "then": "medium"},
+        {"if": [["input1", "high"], ["input2", "medium"]], "then": "high"},
+        {"if": [["input1", "high_boost"]], "then": "high"},
+        {"if": [["input2", "high_boost"]], "then": "high"},
+    ],
+})
+
+# Вывод Сугено нулевого порядка: выход правила - центр выходного терма
+SUGENO = SugenoEngine(RULE_BASE, {"low": 0.0, "medium": 0.5, "high": 1.0})
+
+def fuzzy_rule_batch(input1, input2):
+    """
+    Нечеткая логика Мамдани для массивов (аналог fuzzy_rule) по правилам RULE_BASE.
+
+    Args:
+        input1 (np.ndarray): Первые входные параметры.
+        input2 (np.ndarray): Вторые входные параметры.
+
+    Returns:
+        tuple: Массивы выходных значений нечеткой логики.
+    """
+    inputs = np.column_stack([np.asarray(input1, dtype=np.float64), np.asarray(input2, dtype=np.float64)])
+    return tuple(RULE_BASE.evaluate(inputs).T)
+
+MODES = ("mamdani", "sugeno")
+
+def logic_version(mode="mamdani"):
+    """
+    Версия нечеткой логики infer_batch для ключей кэша.
+
+    Учитывает базу правил RULE_BASE (термы с порогом 0.7, правила, веса), режим
+    и то, что выполняется после правил: для Мамдани - байт-код агрегации и
+    взвешенной дефузификации, для Сугено - выходы правил.
+
+    Args:
+        mode (str): "mamdani" или "sugeno".
+
+    Returns:
+        str: Версия.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим вывода: {mode!r}, доступны: {MODES}")
+    if mode == "sugeno":
+        stages = repr(SUGENO.coefficients.tolist())
+    else:
+        stages = "weighted:" + function_version(aggregation_batch, defuzzification_batch)
+    return f"{rule_base_version(RULE_BASE)}-{mode}-{stages}"
+
+def infer_batch(inputs, mode="mamdani"):
+    """
+    Пакетная нечеткая импликация без графиков.
+
+    Args:
+        inputs (np.ndarray): Массив формы (N, 2) с парами входных значений.
+        mode (str): "mamdani" или "sugeno" - взвешенное среднее выходов правил
+            RULE_BASE без агрегации и дефузификации.
+
+    Returns:
+        np.ndarray: Массив формы (N,) с результатами, совпадающими с main(input1, input2, mode=mode).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим вывода: {mode!r}, доступны: {MODES}")
+    inputs = np.asarray(inputs, dtype=np.float64)
+    if inputs.ndim != 2 or inputs.shape[1] != 2:
+        raise ValueError(f"Ожидается массив формы (N, 2), получено {inputs.shape}")
+    if mode == "sugeno":
+        return SUGENO.infer_batch(inputs)
+    # То же, что fuzzy_rule_batch, без разбора входа на столбцы и обратной сборки
+    output = tuple(RULE_BASE.evaluate(inputs).T)
+    return defuzzification_batch(aggregation_batch(output))
+
 def plot_memberships(input1, input2, output):
     """
     Построение графиков степеней принадлежности.
@@ -194,21 +242,23 @@ def plot_memberships(input1, input2, output):
         input2 (float): Второй входной параметр.
         output (tuple): Выходные значения нечеткой логике.
     """
+    import matplotlib.pyplot as plt
+
     x_values = np.linspace(0, 1, 100)
 
     # Степени принадлежности для входных переменных
-    low1 = [membership_low(x) for x in x_values]
-    medium1 = [membership_medium(x) for x in x_values]
-    high1 = [membership_high(x) for x in x_values]
+    low1 = membership_low_batch(x_values)
+    medium1 = membership_medium_batch(x_values)
+    high1 = membership_high_batch(x_values)
 
-    low2 = [membership_low(x) for x in x_values]
-    medium2 = [membership_medium(x) for x in x_values]
-    high2 = [membership_high(x) for x in x_values]
+    low2 = membership_low_batch(x_values)
+    medium2 = membership_medium_batch(x_values)
+    high2 = membership_high_batch(x_values)
 
     # Степени принадлежности для выходных переменных
-    output_low = [min(membership_low(x), output[0]) for x in x_values]
-    output_medium = [min(membership_medium(x), output[1]) for x in x_values]
-    output_high = [min(membership_high(x), output[2]) for x in x_values]
+    output_low = np.minimum(membership_low_batch(x_values), output[0])
+    output_medium = np.minimum(membership_medium_batch(x_values), output[1])
+    output_high = np.minimum(membership_high_batch(x_values), output[2])
 
     plt.figure(figsize=(12, 8))
 
@@ -246,23 +296,33 @@ def plot_memberships(input1, input2, output):
     plt.tight_layout()
     plt.show()
 
-def main(input1, input2):
+def main(input1, input2, plot=False, mode="mamdani"):
     """
     Главная функция, которая осуществляет нечеткую импликацию Мамдани.
 
     Args:
         input1 (float): Первый входной параметр.
         input2 (float): Второй входной параметр.
+        plot (bool): Строить ли графики степеней принадлежности (только для Мамдани).
+        mode (str): "mamdani" или "sugeno" - вывод Сугено без выходных множеств.
 
     Returns:
         float: Результат нечеткой импликации.
     """
+    if mode == "sugeno":
+        return SUGENO(input1, input2)
+    if mode != "mamdani":
+        raise ValueError(f"Неизвестный режим вывода: {mode!r}, доступны: {MODES}")
     output = fuzzy_rule(input1, input2)
     aggregated_output = aggregation(output)
     result = defuzzification(aggregated_output)
-    plot_memberships(input1, input2, aggregated_output)
+    if plot:
+        plot_memberships(input1, input2, aggregated_output)
     return result
 
+# Этапы нечеткого вывода попадают в трассировку только при включенной трассировке
+trace_stages(globals(), "fuzzy_rule", "aggregation", "defuzzification", "plot_memberships")
+
 if __name__ == "__main__":
     # Путь к файлам изображений
     image_path = '/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/maket/images (7).jpg'
@@ -271,22 +331,25 @@ if __name__ == "__main__":
     if not os.path.exists(image_path):
         print(f"Файл не найден: {image_path}")
     else:
-        # Загрузка моделей с весами
-        model1 = YOLO('/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/best.pt')
-        model2 = YOLO('/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/best1.pt')
+        # Модели из реестра: веса загружаются и прогреваются один раз на процесс
+        model1 = get_model('/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/best.pt')
+        model2 = get_model('/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/best1.pt')
 
-        # Детекция объектов на изображении
-        input1 = detect_objects(model1, image_path, "neck ass")
-        input2 = detect_objects(model2, image_path, "penis")
+        # Каскадная детекция: вторая модель не запускается, если по достоверности
+        # первой условие ниже (одна больше 0.7, другая равна 0) уже не выполнится
+        cascade = CascadeRunner([(model1, "neck ass"), (model2, "penis")], gate="big_logika", detect=detect_objects)
+        with span("detect", source=image_path):
+            outcome = cascade.run(image_path)
 
         # Проверяем, что хотя бы один объект обнаружен с достоверностью больше 0.7
-        if (input1 > 0.7 and input2 == 0) or (input2 > 0.7 and input1 == 0):
+        if outcome.passed:
+            input1, input2 = outcome.confidences
             if input1 > 0:
                 print(f"Объект 'neck ass' обнаружен с достоверностью {input1:.2f}")
             if input2 > 0:
                 print(f"Объект 'penis' обнаружен с достоверностью {input2:.2f}")
 
-            result = main(input1, input2)
+            result = main(input1, input2, plot=True)
             print(f"Результат нечеткой импликации: {result:.2f}")
         else:
             print("Не удалось получить достоверности для объектов 'neck ass' и 'penis' или оба объекта обнаружены.")
@@ -0,0 +1,63 @@
+"""Однократное декодирование изображений в общий буфер для детекторов и визуализации."""
+import numpy as np
+
+from pipeline_trace import span
+
+
+def _readonly(image):
+    # Буфер общий для всех потребителей, поэтому защищаем его от записи на месте
+    image.setflags(write=False)
+    return image
+
+
+def load_image(path):
+    """
+    Декодирует файл изображения один раз.
+
+    Массив BGR (как у cv2.imread) можно передавать напрямую в модели YOLO и в
+    plot_image_with_detections: они читают один и тот же буфер без копий.
+
+    Args:
+        path (str): Путь к изображению.
+
+    Returns:
+        np.ndarray: Изображение формы (H, W, 3), uint8, BGR, только для чтения.
+    """
+    import cv2
+
+    with span("image_decode", source=path):
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise FileNotFoundError(f"Не удалось прочитать изображение: {path}")
+    return _readonly(image)
+
+
+def decode_image(data):
+    """
+    Декодирует изображение из байтов (JPEG, PNG и т.д.).
+
+    Args:
+        data (bytes): Содержимое файла изображения.
+
+    Returns:
+        np.ndarray: Изображение формы (H, W, 3), uint8, BGR, только для чтения.
+    """
+    import cv2
+
+    with span("image_decode", bytes=len(data)):
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Не удалось декодировать изображение")
+    return _readonly(image)
+
+
+def as_image(source):
+    """Путь -> декодированный буфер; уже декодированный массив возвращается как есть"""
+    if isinstance(source, np.ndarray):
+        return source
+    return load_image(source)
+
+
+def rgb_view(image):
+    """Представление BGR-буфера в порядке RGB для matplotlib без копирования"""
+    return image[..., ::-1]
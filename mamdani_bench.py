@@ -0,0 +1,280 @@
+"""Воспроизводимые микробенчмарки этапов нечеткого вывода и детекции."""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+DEFAULT_SIZES = (1, 100, 10_000, 1_000_000)
+# Скалярные функции на больших размерах работают секундами, поэтому ограничены
+SCALAR_MAX_SIZE = 10_000
+BENCH_FORMAT_VERSION = 1
+
+
+class StubModel:
+    """
+    Локальная заглушка модели YOLO без весов и без torch.
+
+    Результаты детекции сгенерированы заранее с фиксированным зерном, поэтому
+    замеряется только разбор рамок, а не генерация данных.
+
+    Args:
+        n_boxes (int): Число рамок на изображение.
+        names (dict): Номер класса -> имя, как model.names у ultralytics.
+        seed (int): Зерно генератора.
+    """
+
+    def __init__(self, n_boxes=50, names=None, seed=0):
+        self.names = names or {0: "NR", 1: "neck ass", 2: "penis"}
+        rng = np.random.default_rng(seed)
+        corners = rng.uniform(0, 500, (n_boxes, 2))
+        boxes = SimpleNamespace(
+            xyxy=np.column_stack([corners, corners + rng.uniform(10, 200, (n_boxes, 2))]),
+            conf=rng.uniform(0.05, 1.0, n_boxes).astype(np.float32),
+            cls=rng.integers(0, len(self.names), n_boxes).astype(np.float32),
+        )
+        self._result = SimpleNamespace(boxes=boxes, orig_shape=(640, 640))
+
+    def predict(self, source, stream=False, **kwargs):
+        count = len(source) if isinstance(source, (list, tuple)) else 1
+        results = (self._result for _ in range(count))
+        return results if stream else list(results)
+
+    __call__ = predict
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(func, repeat=5, min_time=0.05):
+    """
+    Время одного вызова func().
+
+    Число вызовов в замере подбирается так, чтобы замер длился не меньше
+    min_time; из repeat замеров берутся лучший и медиана.
+
+    Returns:
+        dict: {"number", "best", "median"}; время в секундах на вызов.
+    """
+    func()  # Прогрев: ленивые импорты, кэши
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number = number * 10 if elapsed == 0 else max(number * 2, int(number * min_time / elapsed) + 1)
+
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return {"number": number, "best": min(timings), "median": float(np.median(timings))}
+
+
+def _scalar_cases(module, values1, values2):
+    """Скалярные этапы: цикл Python по size значениям"""
+    membership_low, membership_medium, membership_high = (
+        module.membership_low, module.membership_medium, module.membership_high
+    )
+    fuzzy_rule, aggregation, defuzzification = module.fuzzy_rule, module.aggregation, module.defuzzification
+    outputs = [fuzzy_rule(a, b) for a, b in zip(values1, values2)]
+    aggregated = [aggregation(output) for output in outputs]
+    return {
+        "membership_low": lambda: [membership_low(v) for v in values1],
+        "membership_medium": lambda: [membership_medium(v) for v in values1],
+        "membership_high": lambda: [membership_high(v) for v in values1],
+        "fuzzy_rule": lambda: [fuzzy_rule(a, b) for a, b in zip(values1, values2)],
+        "aggregation": lambda: [aggregation(output) for output in outputs],
+        "defuzzification": lambda: [defuzzification(output) for output in aggregated],
+        "main": lambda: [module.main(a, b) for a, b in zip(values1, values2)],
+        "main_sugeno": lambda: [module.main(a, b, mode="sugeno") for a, b in zip(values1, values2)],
+    }
+
+
+def _batch_cases(module, values1, values2):
+    """Пакетные этапы: один вызов на массив из size значений"""
+    outputs = module.fuzzy_rule_batch(values1, values2)
+    aggregated = module.aggregation_batch(outputs)
+    inputs = np.column_stack([values1, values2])
+    return {
+        "membership_low": lambda: module.membership_low_batch(values1),
+        "membership_medium": lambda: module.membership_medium_batch(values1),
+        "membership_high": lambda: module.membership_high_batch(values1),
+        "fuzzy_rule": lambda: module.fuzzy_rule_batch(values1, values2),
+        "aggregation": lambda: module.aggregation_batch(outputs),
+        "defuzzification": lambda: module.defuzzification_batch(aggregated),
+        "main": lambda: module.infer_batch(inputs),
+        "main_sugeno": lambda: module.infer_batch(inputs, mode="sugeno"),
+    }
+
+
+def _plot_cases():
+    """Отрисовка графиков: plot_memberships (pyplot) и MembershipRenderer (шаблон фигуры)"""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    import Mamdani_two_input
+    from mamdani_render import MembershipRenderer
+
+    output = Mamdani_two_input.aggregation(Mamdani_two_input.fuzzy_rule(0.4, 0.7))
+    renderer = MembershipRenderer()
+
+    # Оба случая сохраняют PNG в память, чтобы сравнение включало одинаковую работу
+    def plot_memberships():
+        Mamdani_two_input.plot_memberships(0.4, 0.7, output)
+        plt.savefig(io.BytesIO(), format="png")
+        plt.close("all")
+
+    return {
+        "plot_memberships": plot_memberships,
+        "render": lambda: renderer.render(0.4, 0.7, output, io.BytesIO()),
+    }
+
+
+def _detect_cases(n_boxes, batch_size=16):
+    """Разбор результатов детекции на заглушке модели с n_boxes рамками"""
+    from big_logika import detect_objects
+    from yolo_detect import detect_batched
+
+    model = StubModel(n_boxes)
+    paths = [f"image_{index}.jpg" for index in range(batch_size)]
+    return {
+        "detect_objects": lambda: detect_objects(model, "image.jpg", "neck ass"),
+        f"detect_batched[{batch_size}]": lambda: list(detect_batched(model, paths, ["neck ass", "penis"], batch_size)),
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=5, min_time=0.05, n_boxes=50, pattern=None, seed=0):
+    """
+    Запускает все бенчмарки.
+
+    Args:
+        sizes (sequence): Размеры входов для этапов нечеткого вывода.
+        repeat (int): Число замеров на бенчмарк.
+        min_time (float): Минимальная длительность одного замера, секунды.
+        n_boxes (int): Число рамок на изображение у заглушки модели.
+        pattern (str | None): Запускать только бенчмарки, имя которых содержит подстроку.
+        seed (int): Зерно генератора входов.
+
+    Returns:
+        dict: {"meta": {...}, "results": {имя: {"size", "number", "best", "median", "per_item"}}}.
+    """
+    import Mamdani_two_input
+
+    rng = np.random.default_rng(seed)
+    results = {}
+
+    def record(name, func, size):
+        if pattern and pattern not in name:
+            return
+        timing = measure(func, repeat, min_time)
+        timing["size"] = size
+        timing["per_item"] = timing["median"] / size
+        results[name] = timing
+        print(f"{name:<48} {timing['median'] * 1e6:>14.2f} мкс  {timing['per_item'] * 1e9:>12.1f} нс/элемент",
+              file=sys.stderr)
+
+    for size in sizes:
+        values1 = rng.uniform(0, 1, size)
+        values2 = rng.uniform(0, 1, size)
+        if size <= SCALAR_MAX_SIZE:
+            scalar1, scalar2 = values1.tolist(), values2.tolist()
+            for stage, func in _scalar_cases(Mamdani_two_input, scalar1, scalar2).items():
+                record(f"scalar/{stage}[{size}]", func, size)
+        for stage, func in _batch_cases(Mamdani_two_input, values1, values2).items():
+            record(f"batch/{stage}[{size}]", func, size)
+
+    if not pattern or any(pattern in name for name in ("plot/plot_memberships", "plot/render")):
+        for stage, func in _plot_cases().items():
+            record(f"plot/{stage}", func, 1)
+    for stage, func in _detect_cases(n_boxes).items():
+        record(f"detect/{stage}[{n_boxes} boxes]", func, 1)
+
+    return {
+        "meta": {
+            "format": BENCH_FORMAT_VERSION,
+            "commit": _git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "sizes": list(sizes),
+            "repeat": repeat,
+            "n_boxes": n_boxes,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Сравнивает два набора результатов по лучшему времени (наименее шумная оценка).
+
+    Args:
+        baseline (dict): Результаты базового коммита.
+        current (dict): Текущие результаты.
+        threshold (float): Допустимое относительное замедление.
+
+    Returns:
+        list: Кортежи (имя, базовое время, текущее время, отношение, признак регрессии)
+        для бенчмарков, присутствующих в обоих наборах.
+    """
+    rows = []
+    for name, timing in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = timing["best"] / base["best"] if base["best"] else float("inf")
+        rows.append((name, base["best"], timing["best"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Микробенчмарки нечеткого вывода Мамдани и детекции")
+    parser.add_argument("--out", default=None, help="Файл JSON для результатов")
+    parser.add_argument("--compare", default=None, help="Файл JSON базового коммита для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Допустимое замедление (0.10 = 10%%)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Минимальная длительность замера, секунды")
+    parser.add_argument("--boxes", type=int, default=50, help="Число рамок у заглушки модели")
+    parser.add_argument("--filter", default=None, help="Только бенчмарки с этой подстрокой в имени")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.repeat, args.min_time, args.boxes, args.filter)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(baseline, report, args.threshold)
+        print(f"Сравнение с {baseline['meta'].get('commit')} (порог {args.threshold:.0%}):")
+        for name, base, current, ratio, regressed in rows:
+            mark = "РЕГРЕССИЯ" if regressed else ""
+            print(f"{name:<48} {base * 1e6:>12.2f} -> {current * 1e6:>12.2f} мкс  x{ratio:.2f} {mark}")
+        if any(row[4] for row in rows):
+            sys.exit(1)
@@ -0,0 +1,223 @@
+"""Кэш результатов детекции и нечеткой оценки по содержимому изображения."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+_CHUNK = 1 << 20
+
+# Хэши файлов весов: (путь, размер, время изменения) -> sha256
+_WEIGHTS_DIGESTS = {}
+
+
+def bytes_digest(data):
+    """sha256 содержимого изображения"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path):
+    """sha256 файла, читаемого по частям"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def weights_digest(path):
+    """sha256 файла весов; пересчитывается только при изменении файла"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _WEIGHTS_DIGESTS:
+        _WEIGHTS_DIGESTS[key] = file_digest(path)
+    return _WEIGHTS_DIGESTS[key]
+
+
+def _term_description(function):
+    """
+    Описание функции принадлежности для версии базы правил.
+
+    Учитываются параметры терма: описание to_spec() для Membership, узлы
+    points для piecewise_linear; для прочих функций - имя и байт-код с
+    константами, чтобы правка порога внутри функции тоже меняла версию.
+    """
+    if hasattr(function, "to_spec"):
+        return json.dumps(function.to_spec())
+    if hasattr(function, "points"):
+        return json.dumps({"points": function.points})
+    code = getattr(function, "__code__", None)
+    name = f"{getattr(function, '__module__', '')}.{getattr(function, '__qualname__', '')}"
+    if code is not None:
+        return f"{name}:{code.co_code.hex()}:{code.co_consts!r}"
+    return f"{name}:{function!r}"
+
+
+def function_version(*functions):
+    """
+    Версия функций по их байт-коду и константам.
+
+    Нужна для этапов вывода, заданных кодом, а не базой правил (агрегация,
+    дефузификация): правка такой функции дает новую версию.
+    """
+    digest = hashlib.sha256()
+    for function in functions:
+        digest.update(_term_description(function).encode())
+    return digest.hexdigest()[:16]
+
+
+def rule_base_version(rule_base):
+    """
+    Версия скомпилированной базы правил для ключа кэша.
+
+    Учитываются индексные массивы правил, веса и параметры функций принадлежности,
+    поэтому любое изменение правил или точек излома дает новую версию.
+    """
+    digest = hashlib.sha256()
+    # Индексы приводятся к int64, чтобы версия не зависела от их типа в памяти
+    for array in (rule_base.antecedents, rule_base.consequents):
+        digest.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+    for array in (rule_base.negated, rule_base.is_or, rule_base.weights):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    for variable, name, function in rule_base.terms:
+        digest.update(f"{variable}:{name}:{_term_description(function)}".encode())
+    digest.update("|".join(rule_base.output_terms).encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(image_digest, weights_digests, class_names, rule_version, mode="mamdani"):
+    """
+    Ключ кэша.
+
+    Args:
+        image_digest (str): Хэш содержимого изображения.
+        weights_digests (sequence): Хэши весов моделей в порядке детекторов.
+        class_names (sequence): Имена классов каждого детектора в том же порядке:
+            сохраненные достоверности относятся именно к этим классам.
+        rule_version (str): Версия нечеткой логики.
+        mode (str): Режим нечеткого вывода.
+
+    Returns:
+        str: Ключ.
+    """
+    parts = [image_digest, list(weights_digests), [list(names) for names in class_names], str(rule_version), mode]
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Ограниченный LRU-кэш в памяти поверх хранилища SQLite на диске.
+
+    Хранит достоверности классов и итоговую оценку Мамдани. Записи на диске
+    переживают перезапуск процесса; при попадании на диск запись поднимается
+    в память.
+
+    Args:
+        path (str | None): Файл SQLite; None - только память.
+        capacity (int): Максимальное число записей в памяти.
+    """
+
+    def __init__(self, path=None, capacity=4096):
+        self.capacity = capacity
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, confidences BLOB, score REAL)"
+            )
+            self._db.commit()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Результат по ключу.
+
+        Returns:
+            tuple | None: (np.ndarray достоверностей, оценка) или None при промахе.
+        """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            if self._db is not None:
+                row = self._db.execute("SELECT confidences, score FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = (np.frombuffer(row[0], dtype=np.float64), row[1])
+                    self._remember(key, value)
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, confidences, score):
+        """Сохраняет достоверности и оценку в память и на диск, возвращает сохраненную запись"""
+        confidences = np.array(confidences, dtype=np.float64)
+        confidences.setflags(write=False)
+        value = (confidences, float(score))
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, confidences, score) VALUES (?, ?, ?)",
+                    (key, confidences.tobytes(), value[1]),
+                )
+                self._db.commit()
+        return value
+
+    def stats(self):
+        """Счетчики попаданий и промахов"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def cached_score(cache, image_digest, weights_digests, class_names, rule_version, compute, mode="mamdani"):
+    """
+    Результат из кэша или вычисленный compute() и сохраненный в кэш.
+
+    Args:
+        cache (ResultCache): Кэш.
+        image_digest (str): Хэш содержимого изображения (bytes_digest или file_digest).
+        weights_digests (sequence): Хэши весов моделей (weights_digest).
+        class_names (sequence): Имена классов каждого детектора.
+        rule_version (str): Версия нечеткой логики.
+        compute (callable): compute() -> (достоверности, оценка); вызывается только при промахе.
+        mode (str): Режим нечеткого вывода.
+
+    Returns:
+        tuple: (np.ndarray достоверностей, оценка).
+    """
+    key = cache_key(image_digest, weights_digests, class_names, rule_version, mode)
+    value = cache.get(key)
+    if value is None:
+        confidences, score = compute()
+        value = cache.put(key, confidences, score)
+    return value
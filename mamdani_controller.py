@@ -0,0 +1,302 @@
+"""Компактный двоичный формат настроенного нечеткого контроллера с загрузкой через отображение в память."""
+import argparse
+import json
+import math
+
+import numpy as np
+
+from mamdani_defuzz import defuzzify_batch
+from mamdani_membership import from_spec
+from mamdani_rules import CompiledRuleBase, piecewise_linear
+from mamdani_sugeno import SugenoEngine
+from mamdani_surface import MamdaniSurface
+
+CONTROLLER_MAGIC = b"MAMDCTL\x00"
+CONTROLLER_FORMAT_VERSION = 1
+# Начало заголовка и каждого массива выравнивается на 64 байта
+_ALIGN = 64
+_PREFIX_SIZE = len(CONTROLLER_MAGIC) + 8
+
+MODES = ("mamdani", "sugeno", "surface")
+
+
+def _aligned(size):
+    return -(-size // _ALIGN) * _ALIGN
+
+
+def _term_spec(variable, name, function):
+    """Описание терма для заголовка: {"kind", "params"} или {"points"}"""
+    membership = getattr(function, "__self__", function)
+    if hasattr(membership, "to_spec"):
+        spec = membership.to_spec()
+    elif hasattr(function, "points"):
+        spec = {"points": function.points}
+    else:
+        raise ValueError(
+            f"Терм {name!r} задан произвольной функцией и не сохраняется; используйте "
+            "mamdani_membership, узлы points или только поверхность (surface)"
+        )
+    return {"variable": int(variable), "name": name, **spec}
+
+
+def _json_float(value):
+    # Бесконечности плеч трапеций и NaN в JSON записываются строками, которые читает float()
+    return value if math.isfinite(value) else str(float(value))
+
+
+def export_controller(path, rule_base=None, sugeno=None, method="weighted", centers=(0.0, 0.5, 1.0),
+                      output_sets=None, resolution=None, surface=None, metadata=None):
+    """
+    Сохраняет настроенный контроллер в один двоичный файл.
+
+    Файл: сигнатура, версия формата, заголовок JSON (переменные, термы с
+    параметрами, дефузификация, таблица массивов) и выровненные массивы
+    правил (индексы посылок, отрицания, OR, выходные термы, веса),
+    коэффициенты Сугено и сетка поверхности.
+
+    Args:
+        path (str): Путь к файлу.
+        rule_base (CompiledRuleBase | None): База правил Мамдани.
+        sugeno (SugenoEngine | None): Движок Сугено (вместо rule_base).
+        method (str): "weighted" (взвешенное среднее центров centers, как
+            defuzzification) или метод mamdani_defuzz для output_sets.
+        centers (sequence): Центры выходных термов для "weighted".
+        output_sets (sequence | None): Узлы (xs, ys) выходных множеств для
+            остальных методов.
+        resolution (int | None): Сетка методов дефузификации.
+        surface (MamdaniSurface | None): Предвычисленная поверхность; без
+            rule_base и sugeno контроллер состоит только из нее.
+        metadata (dict | None): Произвольные сведения (источник, дата и т.д.).
+
+    Returns:
+        str: path.
+    """
+    if sugeno is not None:
+        rule_base, mode = sugeno.rule_base, "sugeno"
+    elif rule_base is not None:
+        mode = "mamdani"
+    elif surface is not None:
+        mode = "surface"
+    else:
+        raise ValueError("Нужна база правил, движок Сугено или поверхность")
+
+    header = {"format": CONTROLLER_FORMAT_VERSION, "mode": mode, "metadata": metadata or {}}
+    arrays = {}
+    if rule_base is not None:
+        header["variables"] = list(rule_base.variables)
+        header["output_terms"] = list(rule_base.output_terms)
+        terms = [_term_spec(*term) for term in rule_base.terms]
+        for term in terms:
+            if "params" in term:
+                term["params"] = [_json_float(p) for p in term["params"]]
+        header["terms"] = terms
+        arrays.update({
+            "antecedents": rule_base.antecedents.astype("<i4"),
+            "negated": rule_base.negated.astype("|b1"),
+            "is_or": rule_base.is_or.astype("|b1"),
+            "consequents": rule_base.consequents.astype("<i4"),
+            "weights": rule_base.weights.astype("<f8"),
+        })
+    if mode == "sugeno":
+        # Коэффициенты по выходным термам: у всех правил одного терма они одинаковы
+        outputs = np.zeros((len(rule_base.output_terms), sugeno.coefficients.shape[1]))
+        outputs[rule_base.consequents] = sugeno.coefficients
+        arrays["sugeno_outputs"] = outputs.astype("<f8")
+    elif mode == "mamdani":
+        if method == "weighted":
+            if len(centers) != len(rule_base.output_terms):
+                raise ValueError(f"Нужно {len(rule_base.output_terms)} центров, получено {len(centers)}")
+            header["defuzzification"] = {"method": method, "centers": [float(c) for c in centers]}
+        else:
+            if output_sets is None:
+                raise ValueError(f"Для метода {method!r} нужны output_sets")
+            sets = [[list(map(float, xs)), list(map(float, ys))] for xs, ys in output_sets]
+            header["defuzzification"] = {"method": method, "sets": sets, "resolution": resolution}
+    if surface is not None:
+        header["surface"] = {"bounds": list(surface.bounds), "max_error": _json_float(surface.max_error)}
+        arrays["surface"] = surface.grid.astype("<f8")
+
+    # Смещения массивов считаются от начала данных, поэтому не зависят от длины заголовка
+    table, offset = {}, 0
+    for name, array in arrays.items():
+        table[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset = _aligned(offset + array.nbytes)
+    header["arrays"] = table
+
+    encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _aligned(_PREFIX_SIZE + len(encoded))
+    with open(path, "wb") as f:
+        f.write(CONTROLLER_MAGIC)
+        f.write(np.array([CONTROLLER_FORMAT_VERSION, len(encoded)], dtype="<u4").tobytes())
+        f.write(encoded.ljust(data_start - _PREFIX_SIZE, b" "))
+        for name, array in arrays.items():
+            f.seek(data_start + table[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    return path
+
+
+def _term_function(term):
+    if "points" in term:
+        return piecewise_linear(term["points"])
+    return from_spec({"kind": term["kind"], "params": [float(p) for p in term["params"]]})
+
+
+class Controller:
+    """
+    Контроллер, загруженный из файла export_controller.
+
+    Массивы правил и поверхность - представления отображенного в память
+    файла (индексы <i4 CompiledRuleBase принимает без приведения к intp),
+    поэтому загрузка не читает и не копирует крупные данные. Контроллер,
+    сохраненный только как поверхность, лишь приближает исходный скрипт. Модуль
+    зависит только от NumPy: ни ultralytics, ни torch, ни matplotlib, ни cv2
+    не импортируются.
+
+    Attributes:
+        mode (str): "mamdani", "sugeno" или "surface".
+        rule_base (CompiledRuleBase | None): Восстановленная база правил.
+        surface (MamdaniSurface | None): Поверхность, если сохранена.
+        metadata (dict): Сведения из заголовка.
+    """
+
+    def __init__(self, header, arrays):
+        self.header = header
+        self.mode = header["mode"]
+        self.metadata = header.get("metadata", {})
+        self.rule_base = None
+        self.surface = None
+        self._sugeno = None
+
+        if "terms" in header:
+            terms = [(term["variable"], term["name"], _term_function(term)) for term in header["terms"]]
+            self.rule_base = CompiledRuleBase(
+                header["variables"], terms, header["output_terms"], arrays["antecedents"], arrays["negated"],
+                arrays["is_or"], arrays["consequents"], arrays["weights"],
+            )
+        if self.mode == "sugeno":
+            outputs = dict(zip(header["output_terms"], arrays["sugeno_outputs"]))
+            self._sugeno = SugenoEngine(self.rule_base, outputs)
+        if "surface" in header:
+            info = header["surface"]
+            self.surface = MamdaniSurface(arrays["surface"], tuple(info["bounds"]), float(info["max_error"]))
+
+    def infer_batch(self, inputs, use_surface=False):
+        """
+        Пакетный вывод.
+
+        Args:
+            inputs (np.ndarray): Входы формы (N, V).
+            use_surface (bool): Интерполировать по поверхности вместо точного вывода.
+
+        Returns:
+            np.ndarray: Результаты формы (N,).
+        """
+        if use_surface or self.mode == "surface":
+            if self.surface is None:
+                raise ValueError("В файле контроллера нет поверхности")
+            return self.surface.query_batch(inputs)
+        if self._sugeno is not None:
+            return self._sugeno.infer_batch(inputs)
+
+        aggregated = self.rule_base.evaluate(inputs)
+        defuzz = self.header["defuzzification"]
+        if defuzz["method"] != "weighted":
+            sets = [(np.array(xs), np.array(ys)) for xs, ys in defuzz["sets"]]
+            return defuzzify_batch(aggregated, sets, defuzz["method"], defuzz["resolution"])
+        # Тот же порядок сложения, что в defuzzification_batch: 0 * low + 0.5 * medium + 1 * high
+        centers = defuzz["centers"]
+        weighted = centers[0] * aggregated[:, 0]
+        total = aggregated[:, 0]
+        for column in range(1, len(centers)):
+            weighted = weighted + centers[column] * aggregated[:, column]
+            total = total + aggregated[:, column]
+        return np.divide(weighted, total, out=np.zeros_like(total), where=total != 0)
+
+    def __call__(self, *inputs):
+        """Вывод для одного набора входов"""
+        if self._sugeno is not None:
+            return self._sugeno(*inputs)
+        return float(self.infer_batch(np.array([inputs], dtype=np.float64))[0])
+
+
+def load_controller(path):
+    """
+    Загружает контроллер, отображая файл в память.
+
+    Args:
+        path (str): Файл, созданный export_controller.
+
+    Returns:
+        Controller: Контроллер.
+    """
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    if bytes(data[:len(CONTROLLER_MAGIC)]) != CONTROLLER_MAGIC:
+        raise ValueError(f"{path} не является файлом контроллера")
+    version, header_size = np.frombuffer(data[len(CONTROLLER_MAGIC):_PREFIX_SIZE], dtype="<u4")
+    if version != CONTROLLER_FORMAT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия формата контроллера: {version}")
+    header = json.loads(bytes(data[_PREFIX_SIZE:_PREFIX_SIZE + header_size]).decode("utf-8"))
+    if header.get("mode") not in MODES:
+        raise ValueError(f"Неизвестный режим контроллера: {header.get('mode')!r}, доступны: {MODES}")
+    data_start = _aligned(_PREFIX_SIZE + int(header_size))
+
+    arrays = {}
+    for name, info in header["arrays"].items():
+        dtype = np.dtype(info["dtype"])
+        start = data_start + info["offset"]
+        count = int(np.prod(info["shape"], dtype=np.int64))
+        arrays[name] = data[start:start + count * dtype.itemsize].view(dtype).reshape(info["shape"])
+    return Controller(header, arrays)
+
+
+def export_module(module_name, path, mode="mamdani", method="weighted", surface_resolution=None,
+                  surface_only=False):
+    """
+    Сохраняет контроллер модуля репозитория.
+
+    Точный вывод сохраняется из RULE_BASE (и OUTPUT_SETS для методов
+    дефузификации, кроме "weighted") или SUGENO модуля; поверхность - через
+    mamdani_surface.compile_module.
+    """
+    import importlib
+
+    from mamdani_surface import compile_module
+
+    module = importlib.import_module(module_name)
+    surface = None
+    if surface_resolution or surface_only:
+        surface = compile_module(module_name, surface_resolution or 257)
+    metadata = {"module": module_name, "mode": mode, "method": method}
+    if surface_only:
+        return export_controller(path, surface=surface, metadata=metadata)
+    if mode == "sugeno":
+        return export_controller(path, sugeno=module.SUGENO, surface=surface, metadata=metadata)
+    if not hasattr(module, "RULE_BASE"):
+        raise ValueError(f"В модуле {module_name} нет RULE_BASE; сохраните поверхность (--surface-only)")
+    return export_controller(path, module.RULE_BASE, method=method, output_sets=getattr(module, "OUTPUT_SETS", None),
+                             surface=surface, metadata=metadata)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сохранение и просмотр файлов нечетких контроллеров")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Сохранить контроллер модуля")
+    export.add_argument("module", help="Модуль с контроллером, например Mamdani_two_input")
+    export.add_argument("out", help="Файл контроллера")
+    export.add_argument("--mode", default="mamdani", choices=["mamdani", "sugeno"])
+    export.add_argument("--method", default="weighted", help="Метод дефузификации")
+    export.add_argument("--surface", type=int, default=None, help="Добавить поверхность с этим числом узлов")
+    export.add_argument("--surface-only", action="store_true", help="Сохранить только поверхность")
+    info = commands.add_parser("info", help="Показать заголовок файла")
+    info.add_argument("path", help="Файл контроллера")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_module(args.module, args.out, args.mode, args.method, args.surface, args.surface_only)
+        print(f"Контроллер сохранен в {args.out}")
+    else:
+        controller = load_controller(args.path)
+        header = dict(controller.header)
+        header.pop("terms", None)
+        print(json.dumps(header, ensure_ascii=False, indent=2))
@@ -0,0 +1,186 @@
+"""Дефузификация по усеченным выходным множествам: центр тяжести, биссектриса, MOM и SOM."""
+import numpy as np
+
+METHODS = ("centroid", "bisector", "mom", "som")
+
+# Ограничение на размер промежуточных массивов (число элементов) при обработке пакета
+_CHUNK_ELEMENTS = 1 << 22
+
+
+def _check_method(method):
+    if method not in METHODS:
+        raise ValueError(f"Неизвестный метод дефузификации: {method!r}, доступны {METHODS}")
+
+
+def _as_sets(sets):
+    """Приводит выходные множества к списку пар массивов (xs, ys) кусочно-линейных функций"""
+    result = []
+    for xs, ys in sets:
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if xs.shape != ys.shape or xs.ndim != 1 or len(xs) < 2 or np.any(np.diff(xs) < 0):
+            raise ValueError("Выходное множество задается возрастающими узлами (xs, ys) одинаковой длины")
+        result.append((xs, ys))
+    return result
+
+
+def _chunks(n_rows, row_elements):
+    step = max(1, _CHUNK_ELEMENTS // max(1, row_elements))
+    for start in range(0, n_rows, step):
+        yield slice(start, min(start + step, n_rows))
+
+
+def _aggregate(points, strengths, sets):
+    """Агрегированная функция принадлежности max_j min(m_j(x), s_j) в точках points"""
+    mu = np.zeros(points.shape, dtype=np.float64)
+    for j, (xs, ys) in enumerate(sets):
+        clipped = np.minimum(np.interp(points, xs, ys), strengths[:, j, None])
+        np.maximum(mu, clipped, out=mu)
+    return mu
+
+
+def _reduce(points, mu, method):
+    """
+    Дефузификация кусочно-линейной функции mu, заданной значениями в точках points.
+
+    Между соседними точками mu считается линейной, поэтому для сетки это метод
+    трапеций, а для точек излома - точное интегрирование.
+    """
+    a, b = points[:, :-1], points[:, 1:]
+    fa, fb = mu[:, :-1], mu[:, 1:]
+    width = b - a
+    segment_area = width * (fa + fb) / 2
+    area = segment_area.sum(axis=1)
+    nonzero = area > 0
+    result = np.zeros(len(points), dtype=np.float64)
+
+    if method == "centroid":
+        moment = (width * (a * (2 * fa + fb) + b * (fa + 2 * fb)) / 6).sum(axis=1)
+        np.divide(moment, area, out=result, where=nonzero)
+
+    elif method == "bisector":
+        cumulative = np.cumsum(segment_area, axis=1)
+        half = area / 2
+        k = np.minimum((cumulative < half[:, None]).sum(axis=1), width.shape[1] - 1)
+        rows = np.arange(len(points))
+        before = np.where(k > 0, cumulative[rows, np.maximum(k - 1, 0)], 0.0)
+        rest = np.maximum(half - before, 0.0)
+        f0 = fa[rows, k]
+        slope = np.divide(fb[rows, k] - f0, width[rows, k], out=np.zeros_like(f0), where=width[rows, k] > 0)
+        # Решение f0*t + slope*t^2/2 = rest в устойчивой форме
+        denominator = f0 + np.sqrt(np.maximum(f0 * f0 + 2 * slope * rest, 0.0))
+        t = np.divide(2 * rest, denominator, out=np.zeros_like(rest), where=denominator > 0)
+        result = np.where(nonzero, a[rows, k] + np.minimum(t, width[rows, k]), 0.0)
+
+    else:
+        peak = mu.max(axis=1)
+        at_peak = mu >= peak[:, None] - 1e-12
+        if method == "som":
+            result = np.where(nonzero, np.where(at_peak, points, np.inf).min(axis=1), 0.0)
+        else:
+            # Среднее максимумов: по длине плато, а если плато нет - по отдельным точкам
+            plateau = at_peak[:, :-1] & at_peak[:, 1:]
+            plateau_length = (width * plateau).sum(axis=1)
+            plateau_moment = (width * (a + b) / 2 * plateau).sum(axis=1)
+            distinct = np.ones(points.shape, dtype=bool)
+            distinct[:, 1:] = width > 0
+            single = at_peak & distinct
+            single_mean = (points * single).sum(axis=1) / np.maximum(single.sum(axis=1), 1)
+            mom = np.where(
+                plateau_length > 0,
+                plateau_moment / np.where(plateau_length > 0, plateau_length, 1.0),
+                single_mean,
+            )
+            result = np.where(nonzero, mom, 0.0)
+
+    return result
+
+
+def _segment_crossings(sets):
+    """Точки пересечения отрезков разных выходных множеств (не зависят от входов)"""
+    crossings = []
+    segments = [
+        (xs[k], ys[k], xs[k + 1], ys[k + 1], j)
+        for j, (xs, ys) in enumerate(sets)
+        for k in range(len(xs) - 1)
+        if xs[k + 1] > xs[k]
+    ]
+    for p, (x0, y0, x1, y1, j) in enumerate(segments):
+        for u0, v0, u1, v1, i in segments[p + 1:]:
+            if i == j:
+                continue
+            lo, hi = max(x0, u0), min(x1, u1)
+            if lo >= hi:
+                continue
+            s1 = (y1 - y0) / (x1 - x0)
+            s2 = (v1 - v0) / (u1 - u0)
+            if s1 == s2:
+                continue
+            x = (v0 - s2 * u0 - y0 + s1 * x0) / (s1 - s2)
+            if lo <= x <= hi:
+                crossings.append(x)
+    return crossings
+
+
+def _exact_points(strengths, sets, universe):
+    """Все точки излома агрегированной функции для каждой строки пакета"""
+    lo, hi = universe
+    fixed = [lo, hi] + [x for xs, _ in sets for x in xs] + _segment_crossings(sets)
+    fixed = np.clip(np.unique(fixed), lo, hi)
+
+    # Пересечения каждого отрезка с каждым уровнем усечения s_j
+    x0 = np.concatenate([xs[:-1] for xs, _ in sets])
+    x1 = np.concatenate([xs[1:] for xs, _ in sets])
+    y0 = np.concatenate([ys[:-1] for _, ys in sets])
+    y1 = np.concatenate([ys[1:] for _, ys in sets])
+    sloped = y1 != y0
+    x0, x1, y0, y1 = x0[sloped], x1[sloped], y0[sloped], y1[sloped]
+
+    t = (strengths[:, :, None] - y0) / (y1 - y0)
+    crossing = x0 + t * (x1 - x0)
+    crossing = np.where((t >= 0) & (t <= 1), crossing, lo).reshape(len(strengths), -1)
+
+    points = np.concatenate([np.broadcast_to(fixed, (len(strengths), len(fixed))), np.clip(crossing, lo, hi)], axis=1)
+    points.sort(axis=1)
+    return points
+
+
+def defuzzify_batch(strengths, sets, method="centroid", resolution=None, universe=(0.0, 1.0)):
+    """
+    Дефузификация пакета по усеченным выходным множествам.
+
+    Args:
+        strengths (np.ndarray): Степени активации выходных множеств, форма (N, J).
+        sets (sequence): J выходных множеств, каждое - пара (xs, ys) узлов
+            кусочно-линейной функции принадлежности.
+        method (str): "centroid", "bisector", "mom" или "som".
+        resolution (int | None): Число точек сетки на универсуме. None - точный
+            расчет по точкам излома кусочно-линейной функции.
+        universe (tuple): Границы (lo, hi) выходного универсума.
+
+    Returns:
+        np.ndarray: Массив формы (N,). Если все степени равны нулю, результат 0.
+    """
+    _check_method(method)
+    sets = _as_sets(sets)
+    strengths = np.atleast_2d(np.asarray(strengths, dtype=np.float64))
+    if strengths.shape[1] != len(sets):
+        raise ValueError(f"Число столбцов ({strengths.shape[1]}) не совпадает с числом множеств ({len(sets)})")
+
+    result = np.empty(len(strengths), dtype=np.float64)
+    if resolution is None:
+        row_elements = len(sets) * sum(len(xs) for xs, _ in sets) * 2
+        for rows in _chunks(len(strengths), row_elements):
+            points = _exact_points(strengths[rows], sets, universe)
+            result[rows] = _reduce(points, _aggregate(points, strengths[rows], sets), method)
+    else:
+        grid = np.linspace(universe[0], universe[1], int(resolution))
+        for rows in _chunks(len(strengths), len(sets) * len(grid)):
+            points = np.broadcast_to(grid, (rows.stop - rows.start, len(grid)))
+            result[rows] = _reduce(points, _aggregate(points, strengths[rows], sets), method)
+    return result
+
+
+def defuzzify(output, sets, method="centroid", resolution=None, universe=(0.0, 1.0)):
+    """Скалярная версия defuzzify_batch для одного кортежа степеней активации"""
+    return float(defuzzify_batch(np.asarray([output]), sets, method, resolution, universe)[0])
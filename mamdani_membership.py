@@ -0,0 +1,282 @@
+"""Параметризованные функции принадлежности для скаляров и массивов NumPy."""
+import math
+from abc import ABC, abstractmethod
+from numbers import Real
+
+import numpy as np
+
+_INF = math.inf
+
+
+class Membership(ABC):
+    """
+    Базовый класс функции принадлежности.
+
+    Вызов membership(value) для числа возвращает float без NumPy, для массива -
+    np.ndarray той же формы за один векторизованный проход. Методы scalar и
+    batch вызывают соответствующую ветку напрямую.
+    """
+
+    __slots__ = ()
+    kind = None
+    fields = ()
+
+    def __call__(self, value):
+        # Скаляры NumPy (np.float32, np.float64) тоже идут по скалярной ветке и дают float
+        if isinstance(value, Real):
+            return self.scalar(float(value))
+        return self.batch(value)
+
+    @abstractmethod
+    def scalar(self, value):
+        """Значение для числа"""
+
+    @abstractmethod
+    def batch(self, values):
+        """Значения для массива"""
+
+    def batch_into(self, values, out, scratch):
+        """
+        Пакетное значение в готовый массив out без новых массивов.
+
+        Args:
+            values (np.ndarray): Входы.
+            out (np.ndarray): Массив результата той же формы (float64).
+            scratch (np.ndarray): Рабочий массив той же формы.
+
+        Returns:
+            np.ndarray: out.
+        """
+        out[...] = self.batch(values)
+        return out
+
+    @property
+    def params(self):
+        return tuple(getattr(self, name) for name in self.fields)
+
+    def to_spec(self):
+        """Описание для JSON: {"kind": ..., "params": [...]}"""
+        return {"kind": self.kind, "params": list(self.params)}
+
+    def __reduce__(self):
+        return type(self), self.params
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(map(repr, self.params))})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.params == other.params
+
+    def __hash__(self):
+        return hash((type(self), self.params))
+
+
+def _trapezoid_scalar(a, b, c, d):
+    """
+    Скалярная трапеция, специализированная под форму.
+
+    Для плеч лишние сравнения с бесконечностями не выполняются: скалярный
+    вывод вызывает функции принадлежности по нескольку раз на каждый вход.
+    """
+    if b == -_INF:
+        def left(value):
+            if value <= c:
+                return 1.0
+            if value < d:
+                return 1 - (value - c) / (d - c)
+            return 0.0
+        return left
+
+    if c == _INF:
+        def right(value):
+            if value < a:
+                return 0.0
+            if value < b:
+                return (value - a) / (b - a)
+            return 1.0
+        return right
+
+    def trapezoid(value):
+        # Сравнения с NaN ложны, поэтому NaN попадает сюда и дает 0
+        if not a <= value <= d:
+            return 0.0
+        if value < b:
+            return (value - a) / (b - a)
+        if value <= c:
+            return 1.0
+        return 1 - (value - c) / (d - c)
+    return trapezoid
+
+
+class Trapezoidal(Membership):
+    """
+    Трапеция: 0 до a, рост до 1 на [a, b], 1 на [b, c], спад до 0 на [c, d].
+
+    Бесконечные a = b = -inf или c = d = inf дают левое или правое "плечо".
+    Формулы ребер (v - a) / (b - a) и 1 - (v - c) / (d - c) совпадают с
+    исходными membership_low/medium/high, поэтому значения равны побитно.
+
+    NaN, как и в исходных функциях (где все сравнения с NaN ложны), получает
+    значение на +inf: 1 для правого плеча, 0 для остальных форм.
+    """
+
+    __slots__ = ("a", "b", "c", "d", "scalar")
+    kind = "trapezoidal"
+    fields = ("a", "b", "c", "d")
+
+    def __init__(self, a, b, c, d):
+        if not a <= b <= c <= d:
+            raise ValueError(f"Параметры трапеции должны не убывать: {(a, b, c, d)}")
+        self.a = float(a)
+        self.b = float(b)
+        self.c = float(c)
+        self.d = float(d)
+        self.scalar = _trapezoid_scalar(self.a, self.b, self.c, self.d)
+
+    @classmethod
+    def left(cls, c, d):
+        """Левое плечо: 1 до c, спад до 0 на [c, d]"""
+        return cls(-_INF, -_INF, c, d)
+
+    @classmethod
+    def right(cls, a, b):
+        """Правое плечо: 0 до a, рост до 1 на [a, b]"""
+        return cls(a, b, _INF, _INF)
+
+    def batch(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        result = np.ones_like(values)
+        # Для плеч соответствующее ребро отсутствует. fmin пропускает NaN
+        # восходящего ребра, minimum нисходящего передает NaN дальше, а fmax
+        # заменяет его нулем: NaN получает значение на +inf
+        if self.b > -_INF:
+            np.fmin(result, (values - self.a) / (self.b - self.a), out=result)
+        if self.c < _INF:
+            np.minimum(result, 1 - (values - self.c) / (self.d - self.c), out=result)
+        return np.fmax(result, 0.0, out=result)
+
+    def batch_into(self, values, out, scratch):
+        # Те же операции, что в batch, поэтому значения совпадают побитно
+        out.fill(1.0)
+        if self.b > -_INF:
+            np.subtract(values, self.a, out=scratch)
+            np.divide(scratch, self.b - self.a, out=scratch)
+            np.fmin(out, scratch, out=out)
+        if self.c < _INF:
+            np.subtract(values, self.c, out=scratch)
+            np.divide(scratch, self.d - self.c, out=scratch)
+            np.subtract(1, scratch, out=scratch)
+            np.minimum(out, scratch, out=out)
+        return np.fmax(out, 0.0, out=out)
+
+    def knots(self):
+        """
+        Узлы (xs, ys) кусочно-линейной функции для точной дефузификации.
+
+        Бесконечные параметры не попадают в узлы: за крайними узлами значение
+        продолжается постоянным.
+        """
+        points = [(self.a, 0.0), (self.b, 1.0), (self.c, 1.0), (self.d, 0.0)]
+        points = [(x, y) for x, y in points if math.isfinite(x)]
+        xs, ys = zip(*points)
+        return xs, ys
+
+
+class Triangular(Trapezoidal):
+    """Треугольник с вершиной в b: частный случай трапеции с b = c"""
+
+    __slots__ = ()
+    kind = "triangular"
+
+    def __init__(self, a, b, c):
+        super().__init__(a, b, b, c)
+
+    @property
+    def params(self):
+        return (self.a, self.b, self.d)
+
+
+class Gaussian(Membership):
+    """Гауссова функция exp(-((v - mean) / sigma)^2 / 2); для NaN возвращает NaN"""
+
+    __slots__ = ("mean", "sigma")
+    kind = "gaussian"
+    fields = __slots__
+
+    def __init__(self, mean, sigma):
+        if sigma <= 0:
+            raise ValueError(f"sigma должна быть положительной, получено {sigma}")
+        self.mean = float(mean)
+        self.sigma = float(sigma)
+
+    def scalar(self, value):
+        z = (value - self.mean) / self.sigma
+        return math.exp(-0.5 * z * z)
+
+    def batch(self, values):
+        z = (np.asarray(values, dtype=np.float64) - self.mean) / self.sigma
+        return np.exp(-0.5 * z * z)
+
+
+class Sigmoid(Membership):
+    """
+    Сигмоида 1 / (1 + exp(-slope * (v - center))).
+
+    Считается через tanh, что не переполняется при больших |slope * v|.
+    Отрицательный slope дает убывающую функцию. Для NaN возвращает NaN.
+    """
+
+    __slots__ = ("center", "slope")
+    kind = "sigmoid"
+    fields = __slots__
+
+    def __init__(self, center, slope):
+        self.center = float(center)
+        self.slope = float(slope)
+
+    def scalar(self, value):
+        return 0.5 * (1 + math.tanh(0.5 * self.slope * (value - self.center)))
+
+    def batch(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        return 0.5 * (1 + np.tanh(0.5 * self.slope * (values - self.center)))
+
+
+KINDS = {cls.kind: cls for cls in (Trapezoidal, Triangular, Gaussian, Sigmoid)}
+
+
+def from_spec(spec):
+    """
+    Функция принадлежности по описанию {"kind": ..., "params": [...]}.
+
+    Args:
+        spec (dict): kind - "trapezoidal", "triangular", "gaussian" или "sigmoid";
+            params - параметры конструктора по порядку.
+
+    Returns:
+        Membership: Функция принадлежности.
+    """
+    kind = spec.get("kind")
+    if kind not in KINDS:
+        raise ValueError(f"Неизвестный вид функции принадлежности: {kind!r}, доступны: {sorted(KINDS)}")
+    return KINDS[kind](*(float(p) for p in spec["params"]))
+
+
+def three_terms(low_end=0.5, high_start=0.5, peak=0.5):
+    """
+    Термы low, medium, high на отрезке [0, 1], как в скриптах проекта.
+
+    Args:
+        low_end (float): Где low опускается до 0 (0.5 в big_logika.py, 0.3 в
+            YOLOv8_and_mamdani_telo.py и synthesize_codes_Mamdani_or_YOLOv8.py).
+        high_start (float): Где high начинает расти (0.5 и 0.3 соответственно).
+        peak (float): Вершина треугольника medium.
+
+    Returns:
+        tuple: (low, medium, high).
+    """
+    return Trapezoidal.left(0, low_end), Triangular(0, peak, 1), Trapezoidal.right(high_start, 1)
+
+
+# Термы с точками излома 0.5 (Mamdani.py, Mamdani_two_input.py, big_logika.py)
+LOW, MEDIUM, HIGH = three_terms()
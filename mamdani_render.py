@@ -0,0 +1,193 @@
+"""Пакетная отрисовка графиков степеней принадлежности в файлы без дисплея (backend Agg)."""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Mamdani_two_input import aggregation_batch, fuzzy_rule_batch
+from mamdani_membership import HIGH, LOW, MEDIUM
+
+DEFAULT_MEMBERSHIPS = (LOW, MEDIUM, HIGH)
+_LABELS = ("Низкое", "Среднее", "Высокое")
+_COLORS = ("blue", "green", "red")
+
+# Рендерер рабочего процесса, создается один раз в _init_worker
+_WORKER_RENDERER = None
+
+
+class MembershipRenderer:
+    """
+    Рендерер графиков plot_memberships с переиспользуемым шаблоном фигуры.
+
+    Статические кривые входов вычисляются один раз, а при каждой отрисовке
+    обновляются только маркеры входов и усеченные выходные множества. Для PNG
+    статическая часть (оси, подписи, кривые входов) растеризуется один раз и
+    сохраняется как фон: отрисовка восстанавливает фон и рисует поверх только
+    изменяемые элементы и легенды, без полного savefig. SVG сохраняется
+    обычным savefig, но тоже без перестроения фигуры.
+
+    Args:
+        memberships (tuple): Функции low, medium, high от массивов (по умолчанию LOW, MEDIUM, HIGH).
+        figsize (tuple): Размер фигуры в дюймах.
+        dpi (int): Разрешение PNG.
+        n_points (int): Число точек кривых.
+    """
+
+    def __init__(self, memberships=DEFAULT_MEMBERSHIPS, figsize=(12, 8), dpi=100, n_points=100):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from matplotlib.patches import Polygon
+
+        self.x_values = np.linspace(0, 1, n_points)
+        # Кривые входов 1 и 2 одинаковы, поэтому считаются один раз
+        self._curves = np.stack([f(self.x_values) for f in memberships])
+
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.figure)
+
+        self._markers = []
+        for i in range(2):
+            ax = self.figure.add_subplot(3, 2, i + 1)
+            ax.set_title(f"Вход {i + 1}: Степени принадлежности")
+            for curve, label, color in zip(self._curves, _LABELS, _COLORS):
+                ax.plot(self.x_values, curve, label=label, color=color)
+            self._markers.append(ax.axvline(0, color='black', linestyle='--', label=f'Вход {i + 1}'))
+            ax.legend()
+
+        ax = self.figure.add_subplot(3, 1, 2)
+        ax.set_title("Выход: Степени принадлежности")
+        self._output_lines = [
+            ax.plot(self.x_values, np.zeros(n_points), label=label, color=color)[0]
+            for label, color in zip(_LABELS, _COLORS)
+        ]
+        # Линии 0 и 1 добавлены после выходных кривых и рисуются поверх них
+        hlines = [ax.axhline(0, color='black', lw=0.5), ax.axhline(1, color='black', lw=0.5)]
+        self._fills = []
+        for color in _COLORS:
+            fill = Polygon(self._fill_vertices(np.zeros(n_points)), closed=True, color=color, alpha=0.1, lw=0)
+            ax.add_patch(fill)
+            self._fills.append(fill)
+        ax.legend()
+        self.figure.tight_layout()
+
+        # Изменяемые элементы и то, что лежит над ними, в порядке отрисовки фигуры
+        # (сортировка устойчива, поэтому при равном zorder сохраняется порядок добавления)
+        legends = [axes.get_legend() for axes in self.figure.axes]
+        overlay = self._fills + self._output_lines + hlines + self._markers
+        self._dynamic = sorted(overlay, key=lambda a: a.get_zorder()) + legends
+        self._background = None
+        self._animated = False
+
+    def _fill_vertices(self, curve):
+        x = self.x_values
+        return np.column_stack([np.r_[x[0], x, x[-1]], np.r_[0, curve, 0]])
+
+    def update(self, input1, input2, output):
+        """Обновляет маркеры входов и усеченные выходные множества"""
+        for marker, value in zip(self._markers, (input1, input2)):
+            marker.set_xdata([value, value])
+        clipped = np.minimum(self._curves, np.asarray(output, dtype=np.float64)[:, None])
+        for line, fill, curve in zip(self._output_lines, self._fills, clipped):
+            line.set_ydata(curve)
+            fill.set_xy(self._fill_vertices(curve))
+
+    def _set_animated(self, animated):
+        # Элементы с animated=True не попадают в обычную отрисовку фигуры
+        if self._animated != animated:
+            for artist in self._dynamic:
+                artist.set_animated(animated)
+            self._animated = animated
+
+    def _render_png(self, path):
+        from matplotlib.image import imsave
+
+        canvas = self.figure.canvas
+        self._set_animated(True)
+        if self._background is None:
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self.figure.bbox)
+        canvas.restore_region(self._background)
+        for artist in self._dynamic:
+            self.figure.draw_artist(artist)
+        imsave(path, np.asarray(canvas.buffer_rgba()), format="png", dpi=self.figure.dpi)
+
+    def render(self, input1, input2, output, path):
+        """
+        Рисует график для одного набора значений и сохраняет его в файл.
+
+        Args:
+            input1 (float): Первый входной параметр.
+            input2 (float): Второй входной параметр.
+            output (tuple): Агрегированные выходные значения (low, medium, high).
+            path (str | file): Путь к файлу; формат (PNG, SVG) определяется
+                расширением, файловый объект получает PNG.
+
+        Returns:
+            str: Путь к сохраненному файлу.
+        """
+        self.update(input1, input2, output)
+        fmt = os.path.splitext(path)[1][1:].lower() if isinstance(path, str) else "png"
+        if fmt == "png":
+            self._render_png(path)
+        else:
+            self._set_animated(False)
+            self.figure.savefig(path, format=fmt)
+        return path
+
+
+def _init_worker(memberships, figsize, dpi):
+    global _WORKER_RENDERER
+    _WORKER_RENDERER = MembershipRenderer(memberships, figsize, dpi)
+
+
+def _render_chunk(chunk):
+    return [_WORKER_RENDERER.render(*item) for item in chunk]
+
+
+def render_batch(items, out_dir, fmt="png", workers=None, memberships=DEFAULT_MEMBERSHIPS,
+                 figsize=(12, 8), dpi=100, chunk_size=64):
+    """
+    Отрисовывает множество графиков в файлы пулом процессов.
+
+    Args:
+        items (iterable): Кортежи (input1, input2, output).
+        out_dir (str): Каталог для файлов.
+        fmt (str): "png" или "svg".
+        workers (int | None): Число процессов; 1 - без пула.
+        memberships (tuple): Пакетные функции low, medium, high (должны
+            сериализоваться pickle: функции уровня модуля или объекты mamdani_membership).
+        figsize (tuple): Размер фигуры в дюймах.
+        dpi (int): Разрешение PNG.
+        chunk_size (int): Число графиков в одной задаче процесса.
+
+    Returns:
+        list: Пути к файлам в порядке items.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [
+        (input1, input2, tuple(output), os.path.join(out_dir, f"{index:06d}.{fmt}"))
+        for index, (input1, input2, output) in enumerate(items)
+    ]
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+
+    if workers == 1:
+        _init_worker(memberships, figsize, dpi)
+        return [path for chunk in chunks for path in _render_chunk(chunk)]
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(memberships, figsize, dpi)) as pool:
+        return [path for paths in pool.map(_render_chunk, chunks) for path in paths]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пакетная отрисовка графиков степеней принадлежности")
+    parser.add_argument("inputs", help="CSV со столбцами input1,input2 (строка заголовка пропускается)")
+    parser.add_argument("--out", default="plots", help="Каталог для файлов")
+    parser.add_argument("--format", default="png", choices=["png", "svg"])
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов")
+    args = parser.parse_args()
+
+    inputs = np.loadtxt(args.inputs, delimiter=",", skiprows=1, ndmin=2)
+    outputs = np.column_stack(aggregation_batch(fuzzy_rule_batch(inputs[:, 0], inputs[:, 1])))
+    paths = render_batch(zip(inputs[:, 0], inputs[:, 1], outputs), args.out, args.format, args.workers)
+    print(f"Сохранено графиков: {len(paths)} в {args.out}")
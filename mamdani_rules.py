@@ -0,0 +1,251 @@
+"""Декларативная база нечетких правил, компилируемая в индексные массивы."""
+import json
+
+import numpy as np
+
+from mamdani_membership import KINDS, from_spec
+
+
+def piecewise_linear(points):
+    """
+    Функция принадлежности, заданная узлами кусочно-линейной функции.
+
+    Args:
+        points (sequence): Пары (x, y) с возрастающими x. Вне узлов значение
+            равно значению в крайнем узле.
+
+    Returns:
+        callable: Функция f(values) -> np.ndarray.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    xs, ys = points[:, 0], points[:, 1]
+
+    def membership(values):
+        return np.interp(np.asarray(values, dtype=np.float64), xs, ys)
+    # Узлы нужны для сохранения терма (mamdani_controller)
+    membership.points = points.tolist()
+    return membership
+
+
+def _term_function(term):
+    if callable(term):
+        return term
+    if isinstance(term, dict) and "points" in term:
+        return piecewise_linear(term["points"])
+    if isinstance(term, dict) and term.get("kind") in KINDS:
+        return from_spec(term)
+    raise ValueError(
+        "Терм задается функцией, словарем {'points': [...]} или {'kind': ..., 'params': [...]}, "
+        f"получено {term!r}"
+    )
+
+
+def _index_array(values):
+    """
+    Целочисленный массив индексов без лишней копии.
+
+    Массив любого целого типа (например, <i4 из отображенного в память файла
+    контроллера) сохраняется как есть: индексация NumPy принимает его
+    напрямую. Прочие значения приводятся к intp.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values
+    return values.astype(np.intp)
+
+
+def _parse_term(term):
+    """'not high' -> ('high', True)"""
+    words = term.split()
+    if len(words) == 2 and words[0] == "not":
+        return words[1], True
+    return term, False
+
+
+class CompiledRuleBase:
+    """
+    Скомпилированная база правил.
+
+    Все термы всех переменных образуют столбцы матрицы принадлежностей, а
+    правила хранятся как индексы этих столбцов. Для вывода индексы заранее
+    переводятся в кортежи, и правила обходятся по одному над одномерными
+    массивами степеней принадлежности.
+
+    Attributes:
+        variables (tuple): Имена входных переменных в порядке столбцов входа.
+        output_terms (tuple): Имена выходных термов в порядке столбцов выхода.
+        antecedents (np.ndarray): Индексы столбцов термов (целый тип), форма (R, L).
+        negated (np.ndarray): Признак отрицания для каждой посылки, форма (R, L).
+        is_or (np.ndarray): Правила с операцией OR, форма (R,).
+        consequents (np.ndarray): Индексы выходных термов, форма (R,).
+        weights (np.ndarray): Веса правил, форма (R,).
+    """
+
+    def __init__(self, variables, terms, output_terms, antecedents, negated, is_or, consequents, weights):
+        self.variables = tuple(variables)
+        self.terms = list(terms)
+        self.output_terms = tuple(output_terms)
+        self.antecedents = _index_array(antecedents)
+        self.negated = np.asarray(negated, dtype=bool)
+        self.is_or = np.asarray(is_or, dtype=bool)
+        self.consequents = _index_array(consequents)
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+        # Правила в виде кортежей Python для обхода по одному: посылки (терм, отрицание)
+        # без повторов от дополнения до общей ширины, операция и вес
+        self._rules = [
+            (
+                list(dict.fromkeys(zip(self.antecedents[rule].tolist(), self.negated[rule].tolist()))),
+                np.maximum if self.is_or[rule] else np.minimum,
+                float(self.weights[rule]),
+            )
+            for rule in range(len(self.consequents))
+        ]
+        # Номера правил каждого выходного терма для агрегации
+        self._rules_by_term = [np.flatnonzero(self.consequents == term).tolist() for term in range(len(self.output_terms))]
+
+    @property
+    def term_names(self):
+        return [(self.variables[v], name) for v, name, _ in self.terms]
+
+    def _term_rows(self, inputs):
+        """Степени принадлежности всех термов: список одномерных массивов (N,)"""
+        inputs = np.asarray(inputs, dtype=np.float64)
+        if inputs.ndim != 2 or inputs.shape[1] != len(self.variables):
+            raise ValueError(f"Ожидается массив формы (N, {len(self.variables)}), получено {inputs.shape}")
+        columns = [np.ascontiguousarray(inputs[:, variable]) for variable in range(inputs.shape[1])]
+        return [function(columns[variable]) for variable, _, function in self.terms]
+
+    def _rule_rows(self, inputs):
+        """
+        Степени активации правил: список одномерных массивов (N,).
+
+        Правила обходятся по одному над одномерными массивами, как в
+        SugenoEngine.infer_batch: выборка (N, R, L) по индексам с редукцией по
+        последней оси на больших пачках в несколько раз медленнее из-за
+        больших временных массивов.
+        """
+        mu = self._term_rows(inputs)
+        rows = []
+        for antecedents, reduce, weight in self._rules:
+            degrees = [1 - mu[term] if negated else mu[term] for term, negated in antecedents]
+            strength = degrees[0]
+            for degree in degrees[1:]:
+                strength = reduce(strength, degree)
+            if weight != 1:
+                strength = strength * weight
+            rows.append(strength)
+        return rows
+
+    def memberships(self, inputs):
+        """
+        Матрица степеней принадлежности всех термов.
+
+        Args:
+            inputs (np.ndarray): Входы формы (N, V), V = len(variables).
+
+        Returns:
+            np.ndarray: Массив формы (N, C), C - общее число термов.
+        """
+        return np.array(self._term_rows(inputs)).T
+
+    def firing(self, inputs):
+        """Степени активации всех правил, форма (N, R)"""
+        return np.array(self._rule_rows(inputs)).T
+
+    def evaluate(self, inputs):
+        """
+        Агрегированные (операцией OR) степени выходных термов.
+
+        Args:
+            inputs (np.ndarray): Входы формы (N, V).
+
+        Returns:
+            np.ndarray: Массив формы (N, len(output_terms)). Термы без правил равны 0.
+        """
+        strengths = self._rule_rows(inputs)
+        result = np.zeros((len(self.output_terms), len(inputs)), dtype=np.float64)
+        for row, rules in zip(result, self._rules_by_term):
+            if len(rules) == 1:
+                row[:] = strengths[rules[0]]
+            elif rules:
+                np.maximum(strengths[rules[0]], strengths[rules[1]], out=row)
+                for rule in rules[2:]:
+                    np.maximum(row, strengths[rule], out=row)
+        return result.T
+
+
+def compile_rule_base(spec):
+    """
+    Компилирует декларативное описание базы правил.
+
+    Формат описания::
+
+        {
+            "variables": {"input1": {"low": f, "medium": f, "high": f}, ...},
+            "output": ["low", "medium", "high"],
+            "rules": [
+                {"if": [["input1", "low"], ["input2", "not high"]], "op": "and",
+                 "then": "low", "weight": 1.0},
+                ...
+            ],
+        }
+
+    Терм задается функцией от массива, словарем {"points": [[x, y], ...]} или
+    параметрами из mamdani_membership: {"kind": "gaussian", "params": [0.5, 0.1]}.
+    "op" - "and" (по умолчанию, минимум) или "or" (максимум).
+
+    Args:
+        spec (dict): Описание базы правил.
+
+    Returns:
+        CompiledRuleBase: Скомпилированная база правил.
+    """
+    variables = list(spec["variables"])
+    output_terms = list(spec["output"])
+    terms = []
+    columns = {}
+    for v, variable in enumerate(variables):
+        for name, term in spec["variables"][variable].items():
+            columns[(variable, name)] = len(terms)
+            terms.append((v, name, _term_function(term)))
+
+    rules = spec["rules"]
+    if not rules:
+        raise ValueError("База правил пуста")
+    width = max(len(rule["if"]) for rule in rules)
+    antecedents = np.zeros((len(rules), width), dtype=np.intp)
+    negated = np.zeros((len(rules), width), dtype=bool)
+    is_or = np.zeros(len(rules), dtype=bool)
+    consequents = np.zeros(len(rules), dtype=np.intp)
+    weights = np.ones(len(rules), dtype=np.float64)
+
+    for r, rule in enumerate(rules):
+        if not rule["if"]:
+            raise ValueError(f"Правило {r} не содержит посылок")
+        for k, (variable, term) in enumerate(rule["if"]):
+            name, negate = _parse_term(term)
+            if (variable, name) not in columns:
+                raise ValueError(f"Правило {r}: неизвестный терм {variable!r}/{name!r}")
+            antecedents[r, k] = columns[(variable, name)]
+            negated[r, k] = negate
+        # Недостающие посылки дополняются первой: min/max от повтора не меняется
+        antecedents[r, len(rule["if"]):] = antecedents[r, 0]
+        negated[r, len(rule["if"]):] = negated[r, 0]
+
+        op = rule.get("op", "and")
+        if op not in ("and", "or"):
+            raise ValueError(f"Правило {r}: неизвестная операция {op!r}")
+        is_or[r] = op == "or"
+        if rule["then"] not in output_terms:
+            raise ValueError(f"Правило {r}: неизвестный выходной терм {rule['then']!r}")
+        consequents[r] = output_terms.index(rule["then"])
+        weights[r] = rule.get("weight", 1.0)
+
+    return CompiledRuleBase(variables, terms, output_terms, antecedents, negated, is_or, consequents, weights)
+
+
+def load_rule_base(path):
+    """Загружает и компилирует базу правил из JSON-файла (термы заданы узлами "points")"""
+    with open(path, encoding="utf-8") as f:
+        return compile_rule_base(json.load(f))
@@ -0,0 +1,506 @@
+"""Пакетная переоценка больших файлов достоверностей детекторов логикой Mamdani_two_input по частям в пуле процессов."""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Mamdani_two_input import MODES, infer_batch, infer_into
+
+DEFAULT_CHUNK_SIZE = 1 << 18
+# Сырые двоичные файлы без заголовка: расширение -> тип элементов (little-endian)
+RAW_DTYPES = {".f64": np.dtype("<f8"), ".f32": np.dtype("<f4")}
+# Размер заголовка .npy с запасом под любое число строк; кратен 64, как требует формат
+_NPY_HEADER_SIZE = 128
+
+# Параметры вывода рабочего процесса, задаются в _init_worker
+_WORKER_OPTIONS = None
+
+
+def _init_worker(options):
+    global _WORKER_OPTIONS
+    _WORKER_OPTIONS = options
+
+
+def _parse_csv_block(block, usecols):
+    """Строки CSV (bytes) -> массив (n, len(usecols))"""
+    lines = block.decode("utf-8").splitlines()
+    return np.loadtxt(lines, delimiter=",", usecols=usecols, ndmin=2, dtype=np.float64)
+
+
+def score_chunk(chunk, usecols=None, method="weighted", resolution=None, mode="mamdani"):
+    """
+    Оценка одной части входа.
+
+    Args:
+        chunk (np.ndarray | bytes): Массив (n, 2) или блок целых строк CSV;
+            текст разбирается здесь, чтобы разбор тоже шел в рабочих процессах.
+        usecols (tuple | None): Номера столбцов достоверностей для CSV.
+        method, resolution, mode: Как в Mamdani_two_input.infer_batch.
+
+    Returns:
+        np.ndarray: Результаты формы (n,).
+    """
+    if isinstance(chunk, bytes):
+        chunk = _parse_csv_block(chunk, usecols)
+    return infer_batch(chunk, method=method, resolution=resolution, mode=mode)
+
+
+def encode_chunk(chunk, encode, options):
+    """
+    Оценка части и кодирование результатов для записи.
+
+    Кодирование (текст CSV или байты .npy) выполняется там же, где вывод, -
+    в рабочем процессе, а основному процессу остается только запись.
+
+    Returns:
+        tuple: (число строк, bytes).
+    """
+    scores = score_chunk(chunk, **options)
+    return len(scores), encode(scores)
+
+
+def _score_in_worker(chunk):
+    encode, options = _WORKER_OPTIONS
+    return encode_chunk(chunk, encode, options)
+
+
+def _is_header(line):
+    try:
+        [float(field) for field in line.split(",")]
+    except ValueError:
+        return True
+    return False
+
+
+def _resolve_columns(columns, names):
+    """Имена или номера столбцов -> номера"""
+    if columns is None:
+        if names and all(name in names for name in ("input1", "input2")):
+            return (names.index("input1"), names.index("input2"))
+        return (0, 1)
+    indices = []
+    for column in columns:
+        if names and column in names:
+            indices.append(names.index(column))
+        elif str(column).isdigit():
+            indices.append(int(column))
+        else:
+            raise ValueError(f"Нет столбца {column!r}, доступны: {names}")
+    return tuple(indices)
+
+
+class CsvReader:
+    """
+    Чтение CSV блоками байтов по границам строк.
+
+    Блоки нарезаются без разбора строк в Python: разбор чисел выполняют
+    рабочие процессы (score_chunk), а основной процесс только читает файл.
+
+    Args:
+        path (str): Путь к CSV; первая строка - заголовок, если она не числовая.
+        columns (sequence | None): Имена или номера столбцов input1 и input2.
+        chunk_size (int): Примерное число строк в блоке.
+    """
+
+    def __init__(self, path, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, raw_width=2):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.total_bytes = os.path.getsize(path)
+        self.position = 0
+        with open(path, "rb") as f:
+            first = f.readline()
+            names = None
+            self._start = 0
+            if _is_header(first.decode("utf-8")):
+                names = [name.strip() for name in first.decode("utf-8").split(",")]
+                self._start = len(first)
+                first = f.readline()
+        self.usecols = _resolve_columns(columns, names)
+        # Размер блока оценивается по длине первой строки данных
+        self.block_bytes = max(chunk_size * max(len(first), 8), 1 << 16)
+
+    def fraction(self):
+        return self.position / self.total_bytes if self.total_bytes else 1.0
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            f.seek(self._start)
+            tail = b""
+            while True:
+                block = f.read(self.block_bytes)
+                if not block:
+                    break
+                self.position = f.tell()
+                block = tail + block
+                cut = block.rfind(b"\n") + 1
+                if cut == 0:
+                    tail = block
+                    continue
+                tail = block[cut:]
+                yield block[:cut]
+            if tail.strip():
+                yield tail
+
+
+def _extension(path):
+    return os.path.splitext(path)[1].lower()
+
+
+def open_array(path, raw_width=2):
+    """
+    Вход .npy или сырой двоичный (.f64, .f32) как np.memmap формы (N, k) только для чтения.
+
+    Args:
+        path (str): Путь к файлу.
+        raw_width (int): Число столбцов k сырого файла.
+    """
+    extension = _extension(path)
+    if extension in RAW_DTYPES:
+        return np.memmap(path, dtype=RAW_DTYPES[extension], mode="r").reshape(-1, raw_width)
+    array = np.load(path, mmap_mode="r")
+    if array.ndim != 2:
+        raise ValueError(f"Ожидается массив формы (N, k), получено {array.shape}")
+    return array
+
+
+def column_view(array, usecols):
+    """Столбцы (i, j) массива (N, k) как представление (N, 2) без копирования"""
+    first, second = usecols
+    step = second - first
+    if step == 0:
+        raise ValueError(f"Столбцы input1 и input2 совпадают: {usecols}")
+    stop = second + (1 if step > 0 else -1)
+    return array[:, first:stop if stop >= 0 else None:step]
+
+
+def create_output(path, rows):
+    """Предварительно выделенный выход .npy или .f64 на rows чисел float64 (np.memmap)"""
+    if _extension(path) == ".npy":
+        return np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(rows,))
+    return np.memmap(path, dtype=np.float64, mode="w+", shape=(rows,))
+
+
+def open_output(path):
+    """Уже созданный выход create_output для записи из другого процесса"""
+    if _extension(path) == ".npy":
+        return np.load(path, mmap_mode="r+")
+    return np.memmap(path, dtype=np.float64, mode="r+")
+
+
+class NpyReader:
+    """
+    Чтение .npy или сырого двоичного файла формы (N, k) частями через отображение в память.
+
+    Args:
+        path (str): Путь к .npy, .f64 или .f32.
+        columns (sequence | None): Номера столбцов input1 и input2.
+        chunk_size (int): Число строк в части.
+        raw_width (int): Число столбцов сырого файла.
+    """
+
+    def __init__(self, path, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, raw_width=2):
+        self.array = open_array(path, raw_width)
+        self.usecols = _resolve_columns(columns, None)
+        self.chunk_size = chunk_size
+        self.position = 0
+
+    def fraction(self):
+        return self.position / len(self.array) if len(self.array) else 1.0
+
+    def __iter__(self):
+        for start in range(0, len(self.array), self.chunk_size):
+            self.position = min(start + self.chunk_size, len(self.array))
+            # Копия только нужных столбцов части: в процесс передаются n * 2 чисел
+            yield np.ascontiguousarray(self.array[start:self.position][:, list(self.usecols)], dtype=np.float64)
+
+
+class ParquetReader:
+    """
+    Чтение Parquet пачками строк (нужен pyarrow).
+
+    Args:
+        path (str): Путь к файлу Parquet.
+        columns (sequence | None): Имена столбцов input1 и input2.
+        chunk_size (int): Число строк в пачке.
+    """
+
+    def __init__(self, path, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, raw_width=2):
+        import pyarrow.parquet as pq
+
+        self.file = pq.ParquetFile(path)
+        names = self.file.schema_arrow.names
+        self.columns = [names[index] for index in _resolve_columns(columns, names)]
+        self.chunk_size = chunk_size
+        self.total_rows = self.file.metadata.num_rows
+        self.position = 0
+
+    def fraction(self):
+        return self.position / self.total_rows if self.total_rows else 1.0
+
+    def __iter__(self):
+        for batch in self.file.iter_batches(batch_size=self.chunk_size, columns=self.columns):
+            self.position += batch.num_rows
+            yield np.column_stack([
+                batch.column(index).to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+                for index in range(batch.num_columns)
+            ])
+
+
+READERS = {
+    ".csv": CsvReader, ".npy": NpyReader, ".f64": NpyReader, ".f32": NpyReader,
+    ".parquet": ParquetReader, ".pq": ParquetReader,
+}
+
+
+def open_reader(path, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, raw_width=2):
+    """Читатель по расширению файла: .csv, .npy, .f64/.f32, .parquet/.pq"""
+    extension = _extension(path)
+    if extension not in READERS:
+        raise ValueError(f"Неизвестный формат входа {extension!r}, доступны: {sorted(READERS)}")
+    return READERS[extension](path, columns, chunk_size, raw_width)
+
+
+class CsvWriter:
+    """Результаты в CSV: заголовок score и по одному числу в строке"""
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.file.write(b"score\n")
+        self.rows = 0
+
+    @staticmethod
+    def encode(scores):
+        """Текст части; repr дает кратчайшую запись, которая читается обратно без потерь"""
+        if not len(scores):
+            return b""
+        return ("\n".join(map(repr, scores.tolist())) + "\n").encode("ascii")
+
+    def write(self, rows, data):
+        self.rows += rows
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+
+class NpyWriter:
+    """
+    Результаты в .npy, дописываемые частями.
+
+    Число строк заранее неизвестно (CSV), поэтому заголовок фиксированной
+    длины пишется сразу и переписывается с итоговой формой при закрытии.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.rows = 0
+        self._write_header()
+
+    def _write_header(self):
+        header = repr({"descr": "<f8", "fortran_order": False, "shape": (self.rows,)}).encode("latin1")
+        padding = _NPY_HEADER_SIZE - 10 - len(header) - 1
+        self.file.write(b"\x93NUMPY\x01\x00" + (_NPY_HEADER_SIZE - 10).to_bytes(2, "little"))
+        self.file.write(header + b" " * padding + b"\n")
+
+    @staticmethod
+    def encode(scores):
+        return np.ascontiguousarray(scores, dtype="<f8").tobytes()
+
+    def write(self, rows, data):
+        self.rows += rows
+        self.file.write(data)
+
+    def close(self):
+        self.file.seek(0)
+        self._write_header()
+        self.file.close()
+
+
+class RawWriter(NpyWriter):
+    """Результаты в сыром двоичном файле float64 без заголовка"""
+
+    def _write_header(self):
+        pass
+
+
+WRITERS = {".csv": CsvWriter, ".npy": NpyWriter, ".f64": RawWriter}
+
+
+def open_writer(path):
+    """Писатель по расширению файла: .csv, .npy или .f64"""
+    extension = _extension(path)
+    if extension not in WRITERS:
+        raise ValueError(f"Неизвестный формат выхода {extension!r}, доступны: {sorted(WRITERS)}")
+    return WRITERS[extension](path)
+
+
+class Progress:
+    """Строка прогресса в stderr не чаще раза в interval секунд"""
+
+    def __init__(self, interval=1.0, stream=sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.started = time.perf_counter()
+        self._last = 0.0
+
+    def update(self, rows, fraction, force=False):
+        now = time.perf_counter()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        elapsed = now - self.started
+        rate = rows / elapsed if elapsed else 0.0
+        print(f"\r{fraction:7.1%}  {rows:>14,} строк  {rate:>12,.0f} строк/с  {elapsed:8.1f} с",
+              end="", file=self.stream, flush=True)
+
+    def finish(self, rows):
+        self.update(rows, 1.0, force=True)
+        print(file=self.stream)
+
+
+def _init_memmap_worker(source, raw_width, usecols, destination, options):
+    global _WORKER_OPTIONS
+    _WORKER_OPTIONS = (column_view(open_array(source, raw_width), usecols), open_output(destination), options)
+
+
+def _score_range_in_worker(bounds):
+    inputs, out, options = _WORKER_OPTIONS
+    start, stop = bounds
+    infer_into(inputs[start:stop], out[start:stop], **options)
+    return stop - start
+
+
+def score_memmap(source, destination, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+                 method="weighted", resolution=None, mode="mamdani", progress=True, raw_width=2):
+    """
+    Оценка .npy или сырого двоичного файла в предварительно выделенный выход через отображение в память.
+
+    Вход и выход отображаются в память в каждом рабочем процессе; процессам
+    передаются только границы частей, а результаты записываются прямо в
+    выходной файл через infer_into срезами Mamdani_two_input.SLICE_ROWS строк.
+    Данные могут быть больше оперативной памяти.
+
+    Args:
+        source (str): Вход .npy, .f64 или .f32 формы (N, k).
+        destination (str): Выход .npy или .f64 (float64, N чисел).
+        raw_width (int): Число столбцов сырого входа.
+        Остальные: Как в score_file.
+
+    Returns:
+        dict: {"rows", "seconds", "rows_per_second"}.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим вывода: {mode!r}, доступны: {MODES}")
+    usecols = _resolve_columns(columns, None)
+    inputs = column_view(open_array(source, raw_width), usecols)
+    out = create_output(destination, len(inputs))
+    options = {"method": method, "resolution": resolution, "mode": mode}
+    workers = os.cpu_count() if workers is None else workers
+    bounds = [(start, min(start + chunk_size, len(inputs))) for start in range(0, len(inputs), chunk_size)]
+    meter = Progress() if progress else None
+    started = time.perf_counter()
+    rows = 0
+    if not workers:
+        for start, stop in bounds:
+            infer_into(inputs[start:stop], out[start:stop], **options)
+            rows += stop - start
+            if meter:
+                meter.update(rows, rows / len(inputs))
+    else:
+        initargs = (source, raw_width, usecols, destination, options)
+        with ProcessPoolExecutor(workers, initializer=_init_memmap_worker, initargs=initargs) as pool:
+            for count in pool.map(_score_range_in_worker, bounds):
+                rows += count
+                if meter:
+                    meter.update(rows, rows / len(inputs))
+    out.flush()
+    seconds = time.perf_counter() - started
+    if meter:
+        meter.finish(rows)
+    return {"rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else 0.0}
+
+
+def score_file(source, destination, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+               method="weighted", resolution=None, mode="mamdani", progress=True, raw_width=2):
+    """
+    Оценка файла достоверностей с записью результатов по порядку.
+
+    Части входа читаются последовательно и раздаются рабочим процессам; в
+    работе одновременно не больше 2 * workers частей, а результаты пишутся
+    строго в порядке входа. Память не зависит от размера файла. Если и вход,
+    и выход отображаются в память (.npy, .f64, .f32), работает score_memmap.
+
+    Args:
+        source (str): Вход .csv, .npy, .f64/.f32 или .parquet.
+        destination (str): Выход .csv, .npy или .f64.
+        columns (sequence | None): Столбцы input1 и input2 (имена или номера).
+        chunk_size (int): Строк в части.
+        workers (int | None): Число процессов; 0 - в текущем процессе.
+        method, resolution, mode: Как в Mamdani_two_input.infer_batch.
+        progress (bool): Печатать прогресс и пропускную способность в stderr.
+        raw_width (int): Число столбцов сырого двоичного входа.
+
+    Returns:
+        dict: {"rows", "seconds", "rows_per_second"}.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим вывода: {mode!r}, доступны: {MODES}")
+    if _extension(source) in (".npy", *RAW_DTYPES) and _extension(destination) in (".npy", ".f64"):
+        return score_memmap(source, destination, columns, chunk_size, workers, method, resolution, mode,
+                            progress, raw_width)
+    reader = open_reader(source, columns, chunk_size, raw_width)
+    options = {"usecols": getattr(reader, "usecols", None), "method": method, "resolution": resolution, "mode": mode}
+    workers = os.cpu_count() if workers is None else workers
+    writer = open_writer(destination)
+    meter = Progress() if progress else None
+    started = time.perf_counter()
+    try:
+        if not workers:
+            for chunk in reader:
+                writer.write(*encode_chunk(chunk, writer.encode, options))
+                if meter:
+                    meter.update(writer.rows, reader.fraction())
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=((writer.encode, options),)) as pool:
+                pending = deque()
+                for chunk in reader:
+                    pending.append(pool.submit(_score_in_worker, chunk))
+                    if len(pending) >= 2 * workers:
+                        writer.write(*pending.popleft().result())
+                        if meter:
+                            meter.update(writer.rows, reader.fraction())
+                while pending:
+                    writer.write(*pending.popleft().result())
+                    if meter:
+                        meter.update(writer.rows, reader.fraction())
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - started
+    if meter:
+        meter.finish(writer.rows)
+    return {"rows": writer.rows, "seconds": seconds, "rows_per_second": writer.rows / seconds if seconds else 0.0}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пакетная переоценка файлов достоверностей логикой Мамдани")
+    parser.add_argument("source", help="Вход: .csv, .npy, .f64/.f32 (сырой float) или .parquet")
+    parser.add_argument("destination", help="Выход: .csv, .npy или .f64")
+    parser.add_argument("--columns", nargs=2, default=None, help="Столбцы input1 и input2 (имена или номера)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Строк в части")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов (0 - без пула)")
+    parser.add_argument("--method", default="weighted", help="Метод дефузификации")
+    parser.add_argument("--resolution", type=int, default=None)
+    parser.add_argument("--mode", default="mamdani", choices=MODES)
+    parser.add_argument("--raw-width", type=int, default=2, help="Столбцов в сыром двоичном входе")
+    parser.add_argument("--quiet", action="store_true", help="Без строки прогресса")
+    args = parser.parse_args()
+
+    result = score_file(
+        args.source, args.destination, args.columns, args.chunk_size, args.workers,
+        args.method, args.resolution, args.mode, not args.quiet, args.raw_width,
+    )
+    print(f"{result['rows']} строк за {result['seconds']:.2f} с ({result['rows_per_second']:,.0f} строк/с)")
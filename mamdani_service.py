@@ -0,0 +1,355 @@
+"""Долгоживущий asyncio-сервис оценки изображений с микропакетированием запросов."""
+import argparse
+import asyncio
+import functools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from big_logika import infer_batch, logic_version
+from image_buffer import decode_image, load_image
+from mamdani_cache import ResultCache, bytes_digest, cache_key, file_digest, weights_digest
+from pipeline_trace import request_span, span
+from yolo_detect import class_confidences, class_ids
+from yolo_ensemble import EnsembleRunner
+
+_MAX_BODY = 64 * 1024 * 1024
+
+
+class MicroBatcher:
+    """
+    Собирает одновременные запросы в пачки.
+
+    Пачка отправляется, когда набралось max_batch_size элементов или с момента
+    первого элемента прошло max_wait секунд. Обработка пачки выполняется в
+    пуле потоков, чтобы не блокировать цикл событий.
+
+    Args:
+        process_batch (callable): Функция process_batch(items) -> список результатов той же длины.
+        max_batch_size (int): Максимальный размер пачки.
+        max_wait (float): Максимальное ожидание добора пачки, секунды.
+        executor (Executor | None): Пул для process_batch.
+    """
+
+    def __init__(self, process_batch, max_batch_size=32, max_wait=0.005, executor=None):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor
+        self.batches = 0
+        self.items = 0
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, item):
+        """Ставит элемент в очередь и ждет его результата"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, items)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+def _detect_batch(model, images, class_names):
+    """Детекция пачки изображений одной моделью: массив формы (N, len(class_names))"""
+    ids = class_ids(model, class_names)
+    with span("predict", size=len(images)):
+        results = model.predict(list(images), verbose=False)
+    with span("boxes"):
+        return np.array([class_confidences(result, ids) for result in results]).reshape(len(images), len(ids))
+
+
+class ScoringService:
+    """
+    Сервис оценки: изображения -> достоверности классов -> результат Мамдани.
+
+    Args:
+        detectors (list): Пары (путь к весам, [имена классов]); по одному входу
+            нечеткой логики на класс.
+        fuzzy_batch (callable | None): Пакетный нечеткий вывод fuzzy_batch(inputs[N, k]);
+            по умолчанию - big_logika.infer_batch в режиме mode.
+        max_batch_size (int): Максимальный размер микропакета.
+        max_wait (float): Максимальное ожидание добора микропакета, секунды.
+        cache (ResultCache | None): Кэш результатов по содержимому изображения.
+        rule_version (str | None): Версия нечеткой логики для ключей кэша; по
+            умолчанию - big_logika.logic_version(mode) (база правил RULE_BASE, по
+            которой работает infer_batch, и дефузификация), поэтому изменение
+            правил или точек излома делает старые записи кэша недоступными.
+            Для своего fuzzy_batch с кэшем обязательна.
+        mode (str): Режим нечеткого вывода big_logika; входит в ключ кэша.
+    """
+
+    def __init__(self, detectors, fuzzy_batch=None, max_batch_size=32, max_wait=0.005,
+                 cache=None, rule_version=None, mode="mamdani"):
+        self.class_names = [name for _, names in detectors for name in names]
+        if fuzzy_batch is None:
+            fuzzy_batch = functools.partial(infer_batch, mode=mode)
+            if rule_version is None:
+                rule_version = logic_version(mode)
+        elif cache is not None and rule_version is None:
+            raise ValueError("Для своего fuzzy_batch с кэшем нужно явно указать rule_version")
+        self.fuzzy_batch = fuzzy_batch
+        self.mode = mode
+        self.cache = cache
+        self.rule_version = rule_version
+        self._detectors = detectors
+        self._weights_digests = None
+        self._ensemble = None
+        self._executor = ThreadPoolExecutor(2, thread_name_prefix="scoring")
+        self.detect_batcher = MicroBatcher(self._process_images, max_batch_size, max_wait, self._executor)
+        self.fuzzy_batcher = MicroBatcher(self._process_confidences, max_batch_size, max_wait, self._executor)
+
+    def _process_images(self, images):
+        if self._ensemble is None:
+            # Модели загружаются из реестра при первой пачке изображений
+            self._ensemble = EnsembleRunner(self._detectors, detect=_detect_batch)
+        with span("detect_batch", size=len(images)):
+            return list(np.hstack(self._ensemble.run(images)))
+
+    def _process_confidences(self, rows):
+        with span("fuzzy_batch", size=len(rows)):
+            return list(self.fuzzy_batch(np.asarray(rows, dtype=np.float64)))
+
+    async def start(self):
+        self.detect_batcher.start()
+        self.fuzzy_batcher.start()
+
+    async def stop(self):
+        await self.detect_batcher.stop()
+        await self.fuzzy_batcher.stop()
+        if self._ensemble is not None:
+            self._ensemble.close()
+        if self.cache is not None:
+            self.cache.close()
+        self._executor.shutdown()
+
+    async def score(self, image=None, confidences=None):
+        """
+        Оценка одного изображения или готового вектора достоверностей.
+
+        Returns:
+            dict: {"score": float, "confidences": {класс: достоверность}}.
+        """
+        if confidences is None:
+            confidences = await self.detect_batcher.submit(image)
+        confidences = np.asarray(confidences, dtype=np.float64)
+        if confidences.shape != (len(self.class_names),):
+            raise ValueError(f"Ожидается {len(self.class_names)} достоверностей, получено {confidences.shape}")
+        score = await self.fuzzy_batcher.submit(confidences)
+        return {
+            "score": float(score),
+            "confidences": dict(zip(self.class_names, map(float, confidences))),
+        }
+
+    async def score_image(self, load, digest):
+        """
+        Оценка изображения с учетом кэша: при попадании детекция не выполняется.
+
+        Args:
+            load (callable): load() -> декодированное изображение; вызывается только при промахе.
+            digest (callable): digest() -> хэш содержимого изображения.
+        """
+        loop = asyncio.get_running_loop()
+        if self.cache is None:
+            return await self.score(image=await loop.run_in_executor(None, load))
+
+        if self._weights_digests is None:
+            self._weights_digests = await loop.run_in_executor(
+                None, lambda: [weights_digest(weights) for weights, _ in self._detectors]
+            )
+        key = cache_key(
+            await loop.run_in_executor(None, digest),
+            self._weights_digests,
+            [names for _, names in self._detectors],
+            self.rule_version,
+            self.mode,
+        )
+        # Чтение и запись SQLite выполняются в пуле, чтобы медленный диск не останавливал цикл событий
+        cached = await loop.run_in_executor(None, self.cache.get, key)
+        if cached is not None:
+            confidences, score = cached
+            return {"score": score, "confidences": dict(zip(self.class_names, map(float, confidences)))}
+
+        response = await self.score(image=await loop.run_in_executor(None, load))
+        await loop.run_in_executor(None, self.cache.put, key, list(response["confidences"].values()), response["score"])
+        return response
+
+    async def handle_request(self, method, path, headers, body):
+        """Обработка одного HTTP-запроса: (код, объект для JSON-ответа)"""
+        with request_span(f"{method} {path}", bytes=len(body)):
+            return await self._handle_request(method, path, headers, body)
+
+    async def _handle_request(self, method, path, headers, body):
+        if method == "GET" and path == "/health":
+            health = {
+                "status": "ok",
+                "batches": self.detect_batcher.batches + self.fuzzy_batcher.batches,
+                "items": self.detect_batcher.items + self.fuzzy_batcher.items,
+            }
+            if self.cache is not None:
+                health["cache"] = self.cache.stats()
+            return 200, health
+        if method != "POST" or path != "/score":
+            return 404, {"error": "Ожидается POST /score или GET /health"}
+
+        content_type = headers.get("content-type", "")
+        if content_type.startswith("application/json"):
+            request = json.loads(body)
+            if not isinstance(request, dict):
+                return 400, {"error": "Тело запроса должно быть объектом JSON"}
+            if "confidences" in request:
+                return 200, await self.score(confidences=request["confidences"])
+            if "image_path" in request:
+                image_path = request["image_path"]
+                return 200, await self.score_image(lambda: load_image(image_path), lambda: file_digest(image_path))
+            return 400, {"error": "Нужно поле confidences или image_path"}
+
+        # Иначе тело запроса - файл изображения
+        return 200, await self.score_image(lambda: decode_image(body), lambda: bytes_digest(body))
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > _MAX_BODY:
+        raise ValueError("Слишком большое тело запроса")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+
+async def _handle_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                request, status, payload = None, 400, {"error": str(e)}
+            else:
+                if request is None:
+                    break
+                try:
+                    status, payload = await service.handle_request(*request)
+                except ValueError as e:
+                    status, payload = 400, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            keep_alive = request is not None and request[2].get("connection", "").lower() != "close"
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def serve(service, host="127.0.0.1", port=8080, unix_path=None):
+    """Запускает HTTP-сервер на TCP-порту или unix-сокете и обслуживает запросы до отмены"""
+    await service.start()
+
+    def handler(reader, writer):
+        return _handle_connection(service, reader, writer)
+
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.unlink(unix_path)
+        server = await asyncio.start_unix_server(handler, path=unix_path)
+    else:
+        server = await asyncio.start_server(handler, host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сервис оценки изображений YOLO + Мамдани с микропакетированием")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", default=None, help="Путь к unix-сокету вместо TCP")
+    parser.add_argument("--weights1", default="best.pt", help="Веса первой модели")
+    parser.add_argument("--class1", default="neck ass", help="Класс первой модели")
+    parser.add_argument("--weights2", default="best1.pt", help="Веса второй модели")
+    parser.add_argument("--class2", default="penis", help="Класс второй модели")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--mode", default="mamdani", choices=["mamdani", "sugeno"], help="Режим нечеткого вывода")
+    parser.add_argument("--cache", default=None, help="Файл SQLite для кэша результатов")
+    parser.add_argument("--cache-size", type=int, default=4096, help="Число записей кэша в памяти")
+    args = parser.parse_args()
+
+    scoring = ScoringService(
+        [(args.weights1, [args.class1]), (args.weights2, [args.class2])],
+        max_batch_size=args.max_batch_size,
+        max_wait=args.max_wait_ms / 1000,
+        cache=ResultCache(args.cache, args.cache_size) if args.cache else None,
+        mode=args.mode,
+    )
+    try:
+        asyncio.run(serve(scoring, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,211 @@
+"""Вывод Такаги-Сугено нулевого и первого порядка на тех же термах и посылках правил."""
+from functools import lru_cache
+
+import numpy as np
+
+from mamdani_rules import compile_rule_base
+
+
+class SugenoEngine:
+    """
+    Нечеткий вывод Сугено: взвешенное среднее выходов правил без интегрирования
+    по универсуму выхода.
+
+    Выход правила r - константа (нулевой порядок) или линейная функция входов
+    z_r = p0 + p1 * x1 + ... + pk * xk (первый порядок). Результат:
+    sum(w_r * z_r) / sum(w_r), где w_r - степень активации правила
+    (min/max посылок с учетом веса), и 0, если ни одно правило не активно.
+
+    Args:
+        rule_base (CompiledRuleBase): Правила; их выходные термы задают, какой
+            выход z использует правило.
+        outputs (dict): Выходной терм -> константа или последовательность
+            коэффициентов [p0, p1, ..., pk] (k - число входных переменных).
+    """
+
+    def __init__(self, rule_base, outputs):
+        n_inputs = len(rule_base.variables)
+        missing = [term for term in rule_base.output_terms if term not in outputs]
+        if missing:
+            raise ValueError(f"Не заданы выходы Сугено для термов {missing}")
+
+        coefficients = np.zeros((len(rule_base.output_terms), n_inputs + 1), dtype=np.float64)
+        for row, term in enumerate(rule_base.output_terms):
+            value = np.atleast_1d(np.asarray(outputs[term], dtype=np.float64))
+            if len(value) not in (1, n_inputs + 1):
+                raise ValueError(
+                    f"Выход терма {term!r}: ожидается константа или {n_inputs + 1} коэффициентов, получено {len(value)}"
+                )
+            coefficients[row, :len(value)] = value
+
+        self.rule_base = rule_base
+        self.order = 1 if np.any(coefficients[:, 1:]) else 0
+        # Коэффициенты по правилам: форма (R, k + 1)
+        self.coefficients = coefficients[rule_base.consequents]
+
+        # Только термы, на которые ссылаются правила
+        self._used_terms = sorted(set(int(i) for i in rule_base.antecedents.ravel()))
+        # Для пакетного вывода: (терм, переменная, функция для массива) и правила в виде
+        # кортежей Python, чтобы на малых пачках не обращаться к массивам правил
+        self._batch_terms = [
+            (i, rule_base.terms[i][0], getattr(rule_base.terms[i][2], "batch", rule_base.terms[i][2]))
+            for i in self._used_terms
+        ]
+        self._batch_rules = [
+            (
+                [(int(i), bool(negated)) for i, negated in zip(rule_base.antecedents[rule], rule_base.negated[rule])],
+                np.maximum if rule_base.is_or[rule] else np.minimum,
+                float(rule_base.weights[rule]),
+                float(self.coefficients[rule, 0]),
+            )
+            for rule in range(len(rule_base.consequents))
+        ]
+        self._scalar = self._compile_scalar()
+
+    def _rule_strength_source(self, rule):
+        """Выражение степени активации правила для скалярного вывода"""
+        rb = self.rule_base
+        degrees = [
+            f"(1 - m{i})" if negated else f"m{i}"
+            for i, negated in zip(rb.antecedents[rule], rb.negated[rule])
+        ]
+        if len(degrees) == 1:
+            expression = degrees[0]
+        elif len(degrees) == 2:
+            a, b = degrees
+            # Условное выражение быстрее вызова min/max для двух посылок
+            expression = f"({a} if {a} > {b} else {b})" if rb.is_or[rule] else f"({a} if {a} < {b} else {b})"
+        else:
+            expression = f"{'max' if rb.is_or[rule] else 'min'}({', '.join(degrees)})"
+        weight = float(rb.weights[rule])
+        return expression if weight == 1 else f"{expression} * {weight!r}"
+
+    def _rule_output_source(self, rule):
+        """Выражение выхода z правила"""
+        p0, *slopes = (float(p) for p in self.coefficients[rule])
+        terms = [repr(p0)] + [f"{p!r} * x{k}" for k, p in enumerate(slopes) if p]
+        return terms[0] if len(terms) == 1 else f"({' + '.join(terms)})"
+
+    def _compile_scalar(self):
+        """
+        Скалярный вывод, развернутый в одну функцию Python.
+
+        Правила известны заранее, поэтому вместо обхода списков правил на
+        каждом вызове генерируется прямолинейный код: степени принадлежности,
+        min/max посылок и взвешенное среднее.
+        """
+        rb = self.rule_base
+        arguments = ", ".join(f"x{k}" for k in range(len(rb.variables)))
+        namespace = {f"t{i}": getattr(rb.terms[i][2], "scalar", rb.terms[i][2]) for i in self._used_terms}
+        lines = [f"def infer({arguments}):"]
+        lines += [f"    m{i} = t{i}(x{rb.terms[i][0]})" for i in self._used_terms]
+        lines += [f"    w{r} = {self._rule_strength_source(r)}" for r in range(len(rb.consequents))]
+        lines.append(f"    total = {' + '.join(f'w{r}' for r in range(len(rb.consequents)))}")
+        lines += ["    if total == 0:", "        return 0"]
+        products = [
+            f"w{r} * {self._rule_output_source(r)}"
+            for r in range(len(rb.consequents))
+            if self.order or self.coefficients[r, 0] != 0
+        ]
+        lines.append(f"    return ({' + '.join(products) or '0.0'}) / total")
+        exec("\n".join(lines), namespace)
+        return namespace["infer"]
+
+    def rule_outputs(self, inputs):
+        """Выходы z всех правил, форма (N, R)"""
+        inputs = np.asarray(inputs, dtype=np.float64)
+        if self.order == 0:
+            return np.broadcast_to(self.coefficients[:, 0], (len(inputs), len(self.coefficients)))
+        return self.coefficients[:, 0] + inputs @ self.coefficients[:, 1:].T
+
+    def infer_batch(self, inputs):
+        """
+        Пакетный вывод Сугено.
+
+        Правила обходятся по одному над одномерными столбцами степеней
+        принадлежности: для нескольких правил это быстрее, чем выборка
+        (N, R, L) по индексам, и вычисляются только термы из посылок.
+
+        Args:
+            inputs (np.ndarray): Входы формы (N, k).
+
+        Returns:
+            np.ndarray: Результаты формы (N,).
+        """
+        rb = self.rule_base
+        inputs = np.asarray(inputs, dtype=np.float64)
+        if inputs.ndim != 2 or inputs.shape[1] != len(rb.variables):
+            raise ValueError(f"Ожидается массив формы (N, {len(rb.variables)}), получено {inputs.shape}")
+        mu = {i: function(inputs[:, variable]) for i, variable, function in self._batch_terms}
+
+        # Суммы начинаются с первого слагаемого, а не с нулевого массива: на малых
+        # пачках время уходит на число операций NumPy, а не на их размер
+        total = weighted = None
+        for rule, (antecedents, reduce, weight, p0) in enumerate(self._batch_rules):
+            degrees = [1 - mu[i] if negated else mu[i] for i, negated in antecedents]
+            strength = degrees[0]
+            for degree in degrees[1:]:
+                strength = reduce(strength, degree)
+            if weight != 1:
+                strength = strength * weight
+            total = strength if total is None else total + strength
+            if self.order:
+                part = strength * (p0 + inputs @ self.coefficients[rule, 1:])
+            elif p0 != 0:
+                part = strength * p0
+            else:
+                continue
+            weighted = part if weighted is None else weighted + part
+        if weighted is None:
+            return np.zeros(len(inputs), dtype=np.float64)
+        return np.divide(weighted, total, out=np.zeros_like(total), where=total != 0)
+
+    def __call__(self, *inputs):
+        """
+        Скалярный вывод Сугено для одного набора входов без NumPy.
+
+        Args:
+            *inputs (float): Значения входных переменных по порядку.
+
+        Returns:
+            float: Результат.
+        """
+        return self._scalar(*inputs)
+
+
+def sugeno_engine(spec, outputs):
+    """
+    Движок Сугено по декларативному описанию правил (как в compile_rule_base).
+
+    Args:
+        spec (dict): Описание базы правил.
+        outputs (dict): Выходной терм -> константа или коэффициенты [p0, ..., pk].
+
+    Returns:
+        SugenoEngine: Движок.
+    """
+    return SugenoEngine(compile_rule_base(spec), outputs)
+
+
+@lru_cache(maxsize=32)
+def _cached_engine(rule_base, outputs):
+    return SugenoEngine(rule_base, {term: list(value) for term, value in outputs})
+
+
+def engine_for(rule_base, outputs):
+    """
+    Движок Сугено для базы правил из кэша.
+
+    Сборка движка генерирует код скалярного вывода, поэтому движки кэшируются
+    по базе правил (по объекту) и выходам. Кэш ограничен: вытесненный движок
+    отпускает свою базу правил.
+
+    Args:
+        rule_base (CompiledRuleBase): Правила.
+        outputs (dict): Выходной терм -> константа или коэффициенты [p0, ..., pk].
+
+    Returns:
+        SugenoEngine: Движок.
+    """
+    key = tuple((term, tuple(np.atleast_1d(np.asarray(value, dtype=np.float64)).tolist())) for term, value in outputs.items())
+    return _cached_engine(rule_base, key)
@@ -0,0 +1,218 @@
+"""Предвычисленная поверхность (таблица) для нечетких контроллеров с двумя входами."""
+import argparse
+import importlib
+
+import numpy as np
+
+SURFACE_FORMAT_VERSION = 1
+
+
+def scalar_chain(fuzzy_rule, aggregation, defuzzification):
+    """
+    Собирает скалярную цепочку fuzzy_rule -> aggregation -> defuzzification без графиков.
+
+    Args:
+        fuzzy_rule (callable): Функция правил вида fuzzy_rule(input1, input2).
+        aggregation (callable): Функция агрегации.
+        defuzzification (callable): Функция дефузификации.
+
+    Returns:
+        callable: Функция f(input1, input2) -> float.
+    """
+    def controller(input1, input2):
+        return float(defuzzification(aggregation(fuzzy_rule(input1, input2))))
+    return controller
+
+
+def _check_bounds(bounds):
+    lo, hi = float(bounds[0]), float(bounds[1])
+    if not lo < hi:
+        raise ValueError(f"Границы сетки должны удовлетворять lo < hi, получено {(lo, hi)}")
+    return lo, hi
+
+
+class MamdaniSurface:
+    """
+    Поверхность контроллера на равномерной сетке с билинейной интерполяцией.
+
+    Входы с NaN дают NaN.
+
+    Args:
+        grid (np.ndarray): Значения контроллера в узлах сетки, форма (n1, n2).
+        bounds (tuple): Границы (lo, hi) для обоих входов, lo < hi.
+        max_error (float): Оценка ошибки интерполяции - наибольшее отклонение на
+            проверочной сетке при компиляции. Это не гарантированная граница: у
+            разрывного контроллера (big_logika.py, порог 0.7) ошибка между точками
+            проверки может быть больше, если разрыв не передан в breakpoints.
+    """
+
+    def __init__(self, grid, bounds=(0.0, 1.0), max_error=float("nan")):
+        grid = np.ascontiguousarray(grid, dtype=np.float64)
+        if grid.ndim != 2 or min(grid.shape) < 2:
+            raise ValueError(f"Сетка должна иметь форму (n1, n2), n >= 2, получено {grid.shape}")
+        self.grid = grid
+        self.bounds = _check_bounds(bounds)
+        self.max_error = float(max_error)
+        lo, hi = self.bounds
+        self._scale = (np.array(grid.shape, dtype=np.float64) - 1) / (hi - lo)
+
+    @property
+    def resolution(self):
+        return self.grid.shape
+
+    def query(self, input1, input2):
+        """
+        Значение контроллера в точках (input1, input2) билинейной интерполяцией.
+
+        Args:
+            input1 (float | np.ndarray): Первый входной параметр.
+            input2 (float | np.ndarray): Второй входной параметр.
+
+        Returns:
+            float | np.ndarray: Интерполированное значение.
+        """
+        scalar = np.ndim(input1) == 0 and np.ndim(input2) == 0
+        lo, hi = self.bounds
+        n1, n2 = self.grid.shape
+
+        # Входы за пределами сетки прижимаются к границам
+        u = (np.clip(np.asarray(input1, dtype=np.float64), lo, hi) - lo) * self._scale[0]
+        v = (np.clip(np.asarray(input2, dtype=np.float64), lo, hi) - lo) * self._scale[1]
+        # Приведение NaN к целому не определено: такие точки считаются в узле 0, а результат заменяется на NaN
+        invalid = np.isnan(u) | np.isnan(v)
+        has_invalid = bool(invalid.any())
+        if has_invalid:
+            u = np.where(invalid, 0.0, u)
+            v = np.where(invalid, 0.0, v)
+        i = np.minimum(u.astype(np.intp), n1 - 2)
+        j = np.minimum(v.astype(np.intp), n2 - 2)
+        tu = u - i
+        tv = v - j
+
+        g = self.grid
+        top = g[i, j] * (1 - tv) + g[i, j + 1] * tv
+        bottom = g[i + 1, j] * (1 - tv) + g[i + 1, j + 1] * tv
+        result = top * (1 - tu) + bottom * tu
+        if has_invalid:
+            result = np.where(invalid, np.nan, result)
+        return float(result) if scalar else result
+
+    def query_batch(self, inputs):
+        """
+        Значения контроллера для массива входов формы (N, 2).
+
+        Args:
+            inputs (np.ndarray): Массив пар входных значений.
+
+        Returns:
+            np.ndarray: Массив формы (N,).
+        """
+        inputs = np.asarray(inputs, dtype=np.float64)
+        return self.query(inputs[:, 0], inputs[:, 1])
+
+    __call__ = query
+
+    def save(self, path):
+        """Сохраняет поверхность в файл .npz"""
+        np.savez(
+            path,
+            version=np.int64(SURFACE_FORMAT_VERSION),
+            grid=self.grid,
+            bounds=np.array(self.bounds),
+            max_error=np.float64(self.max_error),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Загружает поверхность, сохраненную методом save"""
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            if version != SURFACE_FORMAT_VERSION:
+                raise ValueError(f"Неподдерживаемая версия поверхности: {version}")
+            return cls(data["grid"], tuple(data["bounds"]), float(data["max_error"]))
+
+
+def compile_surface(func, resolution=257, bounds=(0.0, 1.0), batch=True, check_factor=4, breakpoints=()):
+    """
+    Компилирует контроллер в поверхность на сетке и оценивает ошибку интерполяции.
+
+    Ошибка измеряется только в точках проверочной сетки, поэтому max_error -
+    оценка снизу. Разрывы контроллера (например, порог 0.7 в big_logika.py)
+    стоит передать в breakpoints: тогда точки по обе стороны разрыва входят в
+    проверку и оценка учитывает скачок между узлами.
+
+    Args:
+        func (callable): Пакетная функция f(inputs[N, 2]) -> [N] (например,
+            infer_batch) или скалярная f(input1, input2), если batch=False.
+        resolution (int | tuple): Число узлов сетки по каждому входу.
+        bounds (tuple): Границы (lo, hi) для обоих входов.
+        batch (bool): Является ли func пакетной функцией.
+        check_factor (int): Во сколько раз мельче сетка, на которой проверяется
+            ошибка интерполяции.
+        breakpoints (sequence): Значения входов, где контроллер разрывен или
+            меняет наклон; проверяются с обеих сторон по каждому входу.
+
+    Returns:
+        MamdaniSurface: Скомпилированная поверхность с заполненной оценкой max_error.
+    """
+    if np.ndim(resolution) == 0:
+        resolution = (int(resolution), int(resolution))
+    n1, n2 = resolution
+    lo, hi = _check_bounds(bounds)
+
+    if batch:
+        evaluate = func
+    else:
+        vectorized = np.vectorize(func, otypes=[np.float64])
+
+        def evaluate(inputs):
+            return vectorized(inputs[:, 0], inputs[:, 1])
+
+    def sample(xs, ys):
+        xx, yy = np.meshgrid(xs, ys, indexing="ij")
+        values = evaluate(np.column_stack([xx.ravel(), yy.ravel()]))
+        return np.asarray(values, dtype=np.float64).reshape(xx.shape)
+
+    grid = sample(np.linspace(lo, hi, n1), np.linspace(lo, hi, n2))
+    surface = MamdaniSurface(grid, bounds)
+
+    # Ошибка проверяется на более мелкой сетке, включающей середины ячеек и ребер,
+    # и в соседних точках по обе стороны от каждого разрыва
+    sides = [np.nextafter(b, side) for b in breakpoints for side in (-np.inf, np.inf)]
+    extra = np.clip(np.array(sides, dtype=np.float64), lo, hi)
+    check_x = np.union1d(np.linspace(lo, hi, (n1 - 1) * check_factor + 1), extra)
+    check_y = np.union1d(np.linspace(lo, hi, (n2 - 1) * check_factor + 1), extra)
+    exact = sample(check_x, check_y)
+    xx, yy = np.meshgrid(check_x, check_y, indexing="ij")
+    surface.max_error = float(np.max(np.abs(surface.query(xx, yy) - exact)))
+    return surface
+
+
+def compile_module(module_name, resolution=257, check_factor=4, breakpoints=()):
+    """
+    Компилирует контроллер из модуля репозитория (Mamdani_two_input, big_logika и т.д.).
+
+    Если в модуле есть infer_batch, используется он, иначе скалярная цепочка
+    fuzzy_rule -> aggregation -> defuzzification.
+    """
+    module = importlib.import_module(module_name)
+    if hasattr(module, "infer_batch"):
+        return compile_surface(module.infer_batch, resolution, check_factor=check_factor, breakpoints=breakpoints)
+    controller = scalar_chain(module.fuzzy_rule, module.aggregation, module.defuzzification)
+    return compile_surface(controller, resolution, batch=False, check_factor=check_factor, breakpoints=breakpoints)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Компиляция поверхности нечеткого контроллера")
+    parser.add_argument("--module", default="Mamdani_two_input", help="Модуль с контроллером")
+    parser.add_argument("--resolution", type=int, default=257, help="Число узлов сетки по каждому входу")
+    parser.add_argument("--check-factor", type=int, default=4, help="Измельчение сетки для оценки ошибки")
+    parser.add_argument("--breakpoints", type=float, nargs="*", default=[],
+                        help="Разрывы контроллера для проверки ошибки (например, 0.7 для big_logika)")
+    parser.add_argument("--out", default="surface.npz", help="Файл для сохранения поверхности")
+    args = parser.parse_args()
+
+    surface = compile_module(args.module, args.resolution, args.check_factor, args.breakpoints)
+    surface.save(args.out)
+    print(f"Поверхность {surface.resolution} сохранена в {args.out}, "
+          f"оценка ошибки на проверочной сетке: {surface.max_error:.2e}")
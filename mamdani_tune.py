@@ -0,0 +1,372 @@
+"""Подбор точек излома функций принадлежности и весов правил по размеченным данным."""
+import argparse
+import csv
+import functools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Mamdani_two_input import infer_batch
+from mamdani_membership import three_terms
+from mamdani_rules import compile_rule_base
+from mamdani_sugeno import SugenoEngine
+
+OUTPUT_TERMS = ("low", "medium", "high")
+SUGENO_OUTPUTS = {"low": 0.0, "medium": 0.5, "high": 1.0}
+
+# Правила fuzzy_rule разных скриптов: (терм input1, терм input2) -> выходной терм
+RULE_SETS = {
+    "two_input": [(("low", "high"), "low"), (("medium", "medium"), "medium"), (("high", "low"), "high")],
+    "big_logika": [(("low", "high"), "low"), (("medium", "medium"), "medium"), (("high", "medium"), "high")],
+}
+# В big_logika выход high дополнительно усиливается, если вход больше порога boost
+BOOSTED_RULE_SETS = ("big_logika",)
+
+ENGINES = ("mamdani", "mamdani-centroid", "sugeno")
+METRICS = ("accuracy", "mae", "rmse")
+
+# Границы параметров: (имя, минимум, максимум)
+BREAKPOINT_BOUNDS = [("low_end", 0.05, 0.95), ("high_start", 0.05, 0.95), ("peak", 0.1, 0.9)]
+BOOST_BOUNDS = ("boost", 0.5, 0.95)
+
+# Данные рабочего процесса, задаются в _init_worker
+_WORKER_DATA = None
+
+
+def parameter_bounds(rules):
+    """Имена и границы параметров для набора правил"""
+    bounds = list(BREAKPOINT_BOUNDS)
+    if rules in BOOSTED_RULE_SETS:
+        bounds.append(BOOST_BOUNDS)
+        n_rules = len(RULE_SETS[rules]) + 2
+    else:
+        n_rules = len(RULE_SETS[rules])
+    bounds += [(f"w{index}", 0.0, 1.0) for index in range(n_rules)]
+    return bounds
+
+
+def default_parameters(rules, low_end=0.5, high_start=0.5):
+    """Параметры, выбранные в скриптах вручную (все веса правил равны 1)"""
+    values = [low_end, high_start, 0.5]
+    if rules in BOOSTED_RULE_SETS:
+        values.append(0.7)
+    return np.array(values + [1.0] * (len(parameter_bounds(rules)) - len(values)))
+
+
+def _boost_term(high, threshold):
+    def membership(values):
+        return np.where(values > threshold, high(values), 0.0)
+    return membership
+
+
+def build_rule_base(rules, params, mamdani_aggregation):
+    """
+    База правил для вектора параметров.
+
+    Args:
+        rules (str): Набор правил из RULE_SETS.
+        params (np.ndarray): Параметры в порядке parameter_bounds(rules).
+        mamdani_aggregation (bool): Переносить ли каждое правило и на соседний
+            выходной терм, как aggregation в скриптах.
+
+    Returns:
+        CompiledRuleBase: База правил.
+    """
+    names = [name for name, _, _ in parameter_bounds(rules)]
+    values = dict(zip(names, params))
+    low, medium, high = three_terms(values["low_end"], values["high_start"], values["peak"])
+    terms = {"low": low, "medium": medium, "high": high}
+    if rules in BOOSTED_RULE_SETS:
+        terms["high_boost"] = _boost_term(high.batch, values["boost"])
+
+    base_rules = [([["input1", a], ["input2", b]], then) for (a, b), then in RULE_SETS[rules]]
+    if rules in BOOSTED_RULE_SETS:
+        base_rules += [([["input1", "high_boost"]], "high"), ([["input2", "high_boost"]], "high")]
+
+    spec_rules = []
+    for index, (antecedents, then) in enumerate(base_rules):
+        weight = float(values[f"w{index}"])
+        targets = [then]
+        if mamdani_aggregation:
+            # aggregation: выход терма j попадает еще и в терм j - 1 (low -> high)
+            targets.append(OUTPUT_TERMS[OUTPUT_TERMS.index(then) - 1])
+        spec_rules += [{"if": antecedents, "then": target, "weight": weight} for target in targets]
+
+    return compile_rule_base({
+        "variables": {"input1": terms, "input2": terms},
+        "output": list(OUTPUT_TERMS),
+        "rules": spec_rules,
+    })
+
+
+def build_inference(rules, engine, params):
+    """Функция infer(inputs[N, 2]) -> результаты (N,) для параметров и движка"""
+    if engine == "sugeno":
+        return SugenoEngine(build_rule_base(rules, params, False), SUGENO_OUTPUTS).infer_batch
+
+    method = "weighted" if engine == "mamdani" else "centroid"
+    return functools.partial(infer_batch, method=method, rule_base=build_rule_base(rules, params, True))
+
+
+def score(predictions, labels, metric, threshold=0.5):
+    """
+    Качество предсказаний; больше - лучше.
+
+    accuracy - доля совпадений (predictions >= threshold) с метками 0/1,
+    mae и rmse возвращаются со знаком минус.
+    """
+    if metric == "accuracy":
+        return float(np.mean((predictions >= threshold) == (labels >= 0.5)))
+    errors = predictions - labels
+    if metric == "mae":
+        return -float(np.mean(np.abs(errors)))
+    return -float(np.sqrt(np.mean(errors * errors)))
+
+
+def evaluate(candidates, inputs, labels, rules, engine, metric, threshold=0.5):
+    """Качество каждого вектора параметров из candidates (форма (M, P))"""
+    return [score(build_inference(rules, engine, params)(inputs), labels, metric, threshold) for params in candidates]
+
+
+def _init_worker(inputs, labels, rules, engine, metric, threshold):
+    global _WORKER_DATA
+    _WORKER_DATA = (inputs, labels, rules, engine, metric, threshold)
+
+
+def _evaluate_in_worker(candidates):
+    inputs, labels, rules, engine, metric, threshold = _WORKER_DATA
+    return evaluate(candidates, inputs, labels, rules, engine, metric, threshold)
+
+
+class Evaluator:
+    """
+    Оценка наборов параметров в пуле процессов.
+
+    Данные передаются в рабочие процессы один раз при запуске, а кандидаты -
+    пачками, чтобы накладные расходы на передачу были малы по сравнению с
+    пакетным выводом.
+
+    Args:
+        inputs (np.ndarray): Достоверности детекторов, форма (N, 2).
+        labels (np.ndarray): Ожидаемые результаты, форма (N,).
+        rules (str): Набор правил из RULE_SETS.
+        engine (str): Движок из ENGINES.
+        metric (str): Метрика из METRICS.
+        threshold (float): Порог для accuracy.
+        workers (int | None): Число процессов; 0 - без пула.
+    """
+
+    def __init__(self, inputs, labels, rules, engine, metric, threshold=0.5, workers=None):
+        self.args = (inputs, labels, rules, engine, metric, threshold)
+        self.workers = os.cpu_count() if workers is None else workers
+        self.evaluations = 0
+        self._pool = None
+        if self.workers:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=self.args)
+
+    def __call__(self, candidates):
+        candidates = np.atleast_2d(candidates)
+        self.evaluations += len(candidates)
+        if self._pool is None:
+            return np.array(evaluate(candidates, *self.args))
+        chunks = np.array_split(candidates, min(len(candidates), self.workers * 4))
+        return np.array([value for values in self._pool.map(_evaluate_in_worker, chunks) for value in values])
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _bounds_arrays(rules):
+    bounds = parameter_bounds(rules)
+    return np.array([low for _, low, _ in bounds]), np.array([high for _, _, high in bounds])
+
+
+def grid_search(evaluator, rules, steps=5):
+    """Сетка по точкам излома (и порогу усиления); веса правил равны 1"""
+    lower, upper = _bounds_arrays(rules)
+    n_breakpoints = len(BREAKPOINT_BOUNDS) + (1 if rules in BOOSTED_RULE_SETS else 0)
+    axes = [np.linspace(lower[i], upper[i], steps) for i in range(n_breakpoints)]
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, n_breakpoints)
+    candidates = np.hstack([grid, np.ones((len(grid), len(lower) - n_breakpoints))])
+    return candidates, evaluator(candidates)
+
+
+def random_search(evaluator, rules, samples=500, seed=0):
+    """Равномерная случайная выборка по всем параметрам"""
+    lower, upper = _bounds_arrays(rules)
+    rng = np.random.default_rng(seed)
+    candidates = rng.uniform(lower, upper, (samples, len(lower)))
+    return candidates, evaluator(candidates)
+
+
+def evolutionary_search(evaluator, rules, population=48, generations=30, seed=0, start=None):
+    """
+    Дифференциальная эволюция (DE/rand/1/bin) с отбором лучшего из родителя и потомка.
+
+    Каждое поколение оценивается одной пачкой в пуле процессов.
+    """
+    lower, upper = _bounds_arrays(rules)
+    rng = np.random.default_rng(seed)
+    members = rng.uniform(lower, upper, (population, len(lower)))
+    if start is not None:
+        members[0] = start
+    fitness = evaluator(members)
+    history = [members.copy()]
+    values = [fitness.copy()]
+
+    for _ in range(generations):
+        # Три различных случайных члена популяции для каждого потомка
+        picks = np.array([rng.choice(population, 3, replace=False) for _ in range(population)])
+        mutants = members[picks[:, 0]] + 0.7 * (members[picks[:, 1]] - members[picks[:, 2]])
+        crossover = rng.random(members.shape) < 0.8
+        crossover[np.arange(population), rng.integers(0, len(lower), population)] = True
+        trials = np.clip(np.where(crossover, mutants, members), lower, upper)
+
+        trial_fitness = evaluator(trials)
+        better = trial_fitness >= fitness
+        members[better] = trials[better]
+        fitness[better] = trial_fitness[better]
+        history.append(trials)
+        values.append(trial_fitness)
+
+    return np.vstack(history), np.concatenate(values)
+
+
+def measure_latency(infer, inputs, repeat=5):
+    """Медианное время пакетного вывода на строку, секунды"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        infer(inputs)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) / len(inputs)
+
+
+def load_labelled_csv(path, input_columns=("input1", "input2"), label_column="label"):
+    """
+    Размеченный CSV: столбцы достоверностей детекторов и ожидаемого результата.
+
+    Returns:
+        tuple: (np.ndarray входов формы (N, 2), np.ndarray меток формы (N,)).
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    missing = [name for name in (*input_columns, label_column) if rows and name not in rows[0]]
+    if not rows or missing:
+        raise ValueError(f"В {path} нет строк или столбцов {missing}")
+    inputs = np.array([[float(row[name]) for name in input_columns] for row in rows])
+    labels = np.array([float(row[label_column]) for row in rows])
+    return inputs, labels
+
+
+def tune(inputs, labels, rules="big_logika", engines=ENGINES, strategy="evolutionary", metric=None,
+         threshold=0.5, workers=None, steps=5, samples=500, population=48, generations=30, seed=0):
+    """
+    Подбор параметров для каждого движка.
+
+    Args:
+        inputs (np.ndarray): Достоверности детекторов, форма (N, 2).
+        labels (np.ndarray): Ожидаемые результаты: метки 0/1 или целевые оценки.
+        rules (str): Набор правил из RULE_SETS.
+        engines (sequence): Движки из ENGINES.
+        strategy (str): "grid", "random" или "evolutionary".
+        metric (str | None): Метрика; по умолчанию accuracy для меток 0/1, иначе mae.
+        threshold (float): Порог для accuracy.
+        workers (int | None): Число процессов; 0 - без пула.
+
+    Returns:
+        dict: Метрика, базовые значения и для каждого движка лучший набор параметров,
+        его качество, задержка на строку и число оценок.
+    """
+    if rules not in RULE_SETS:
+        raise ValueError(f"Неизвестный набор правил: {rules!r}, доступны: {sorted(RULE_SETS)}")
+    if strategy not in ("grid", "random", "evolutionary"):
+        raise ValueError(f"Неизвестная стратегия поиска: {strategy!r}")
+    if metric is None:
+        metric = "accuracy" if np.isin(labels, (0, 1)).all() else "mae"
+    if metric not in METRICS:
+        raise ValueError(f"Неизвестная метрика: {metric!r}, доступны: {METRICS}")
+
+    names = [name for name, _, _ in parameter_bounds(rules)]
+    defaults = {
+        "0.5": default_parameters(rules, 0.5, 0.5),
+        "0.3": default_parameters(rules, 0.3, 0.3),
+    }
+    report = {"rules": rules, "metric": metric, "strategy": strategy, "rows": len(labels), "engines": {}}
+
+    for engine in engines:
+        if engine not in ENGINES:
+            raise ValueError(f"Неизвестный движок: {engine!r}, доступны: {ENGINES}")
+        started = time.perf_counter()
+        with Evaluator(inputs, labels, rules, engine, metric, threshold, workers) as evaluator:
+            if strategy == "grid":
+                candidates, values = grid_search(evaluator, rules, steps)
+            elif strategy == "random":
+                candidates, values = random_search(evaluator, rules, samples, seed)
+            else:
+                candidates, values = evolutionary_search(
+                    evaluator, rules, population, generations, seed, start=defaults["0.5"]
+                )
+            evaluations = evaluator.evaluations
+
+        best = candidates[int(np.argmax(values))]
+        report["engines"][engine] = {
+            "best": dict(zip(names, map(float, best))),
+            "score": float(values.max()),
+            "baseline": {
+                name: score(build_inference(rules, engine, params)(inputs), labels, metric, threshold)
+                for name, params in defaults.items()
+            },
+            "latency_per_row": measure_latency(build_inference(rules, engine, best), inputs),
+            "evaluations": evaluations,
+            "search_seconds": time.perf_counter() - started,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Подбор точек излома и весов правил по размеченному CSV")
+    parser.add_argument("csv", help="CSV с достоверностями детекторов и ожидаемым результатом")
+    parser.add_argument("--inputs", nargs=2, default=["input1", "input2"], help="Столбцы достоверностей")
+    parser.add_argument("--label", default="label", help="Столбец ожидаемого результата")
+    parser.add_argument("--rules", default="big_logika", choices=sorted(RULE_SETS))
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--strategy", default="evolutionary", choices=["grid", "random", "evolutionary"])
+    parser.add_argument("--metric", default=None, choices=METRICS)
+    parser.add_argument("--threshold", type=float, default=0.5, help="Порог результата для accuracy")
+    parser.add_argument("--workers", type=int, default=None, help="Число процессов (0 - без пула)")
+    parser.add_argument("--steps", type=int, default=5, help="Шагов сетки на параметр")
+    parser.add_argument("--samples", type=int, default=500, help="Кандидатов случайного поиска")
+    parser.add_argument("--population", type=int, default=48)
+    parser.add_argument("--generations", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Файл JSON для отчета")
+    args = parser.parse_args()
+
+    inputs, labels = load_labelled_csv(args.csv, args.inputs, args.label)
+    report = tune(
+        inputs, labels, args.rules, args.engines, args.strategy, args.metric, args.threshold, args.workers,
+        args.steps, args.samples, args.population, args.generations, args.seed,
+    )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    sign = 1 if report["metric"] == "accuracy" else -1
+    print(f"Правила {report['rules']}, метрика {report['metric']}, строк {report['rows']}")
+    print(f"{'движок':<18} {'лучшее':>9} {'изломы 0.5':>11} {'изломы 0.3':>11} {'нс/строка':>10} {'оценок':>8}")
+    for engine, result in report["engines"].items():
+        baseline = result["baseline"]
+        print(f"{engine:<18} {sign * result['score']:>9.4f} {sign * baseline['0.5']:>11.4f} "
+              f"{sign * baseline['0.3']:>11.4f} {result['latency_per_row'] * 1e9:>10.1f} {result['evaluations']:>8}")
+        print("    " + ", ".join(f"{name}={value:.3f}" for name, value in result["best"].items()))
@@ -0,0 +1,227 @@
+"""Трассировка этапов конвейера с экспортом в формат Chrome trace-event (chrome://tracing, Perfetto)."""
+import atexit
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+
+# Текущий трассировщик; None - трассировка выключена
+_tracer = None
+
+# Зарегистрированные этапы: (пространство имен модуля, имя функции)
+_STAGES = []
+
+
+class _NullSpan:
+    """Пустой контекст для выключенной трассировки: не создается на каждый вызов"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        self.tracer.complete(self.name, self.start, end, self.args)
+        return False
+
+
+class _AsyncSpan:
+    __slots__ = ("tracer", "name", "args", "id")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.id = next(tracer.ids)
+
+    def __enter__(self):
+        self.tracer.async_event("b", self.name, self.id, self.args)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.async_event("e", self.name, self.id, None)
+        return False
+
+
+class Tracer:
+    """
+    Накопитель событий трассировки.
+
+    События добавляются в список без блокировок (append атомарен), время -
+    perf_counter_ns относительно создания трассировщика.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.ids = itertools.count(1)
+        self.pid = os.getpid()
+        self._origin = time.perf_counter_ns()
+        self._threads = {}
+
+    def _tid(self):
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        return tid
+
+    def _us(self, ns):
+        return (ns - self._origin) / 1000
+
+    def complete(self, name, start, end, args=None):
+        """Событие "X": этап с началом и длительностью в одном потоке"""
+        event = {"name": name, "ph": "X", "ts": self._us(start), "dur": (end - start) / 1000,
+                 "pid": self.pid, "tid": self._tid()}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def async_event(self, phase, name, span_id, args=None):
+        """События "b"/"e": интервал, который может переходить между задачами asyncio"""
+        event = {"name": name, "cat": "request", "ph": phase, "id": span_id,
+                 "ts": self._us(time.perf_counter_ns()), "pid": self.pid, "tid": self._tid()}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def to_json(self):
+        """Объект в формате Chrome trace-event"""
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._threads.items())
+        ]
+        return {"traceEvents": metadata + list(self.events), "displayTimeUnit": "ms"}
+
+    def export(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False)
+        return path
+
+
+def _traced(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+
+    wrapper.traced_stage = True
+    return wrapper
+
+
+def _wrap_stages(stages):
+    for namespace, name in stages:
+        func = namespace.get(name)
+        # Функция, импортированная из другого зарегистрированного модуля, уже обернута
+        if func is not None and not getattr(func, "traced_stage", False):
+            namespace[name] = _traced(name, func)
+
+
+def _unwrap_stages():
+    for namespace, name in _STAGES:
+        func = namespace.get(name)
+        if getattr(func, "traced_stage", False):
+            namespace[name] = func.__wrapped__
+
+
+def trace_stages(namespace, *names):
+    """
+    Регистрирует функции модуля как этапы трассировки.
+
+    Функции оборачиваются замером только пока трассировка включена, а при
+    выключенной в пространстве имен лежат исходные функции - накладных
+    расходов нет даже для этапов длительностью в микросекунды.
+
+    Args:
+        namespace (dict): globals() модуля.
+        *names (str): Имена функций-этапов.
+    """
+    stages = [(namespace, name) for name in names]
+    _STAGES.extend(stages)
+    if _tracer is not None:
+        _wrap_stages(stages)
+
+
+def enable():
+    """Включает трассировку и возвращает трассировщик"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+        _wrap_stages(_STAGES)
+    return _tracer
+
+
+def disable():
+    """Выключает трассировку; возвращает накопленный трассировщик или None"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    _unwrap_stages()
+    return tracer
+
+
+def enabled():
+    """Включена ли трассировка"""
+    return _tracer is not None
+
+
+def span(name, **args):
+    """
+    Контекст замера этапа.
+
+    При выключенной трассировке возвращает общий пустой контекст, поэтому
+    стоимость - один вызов функции и проверка.
+
+    Args:
+        name (str): Имя этапа, например "model1" или "fuzzy_rule".
+        **args: Дополнительные поля события (показываются в просмотрщике).
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, args)
+
+
+def request_span(name, **args):
+    """
+    Контекст замера запроса, который выполняется с await внутри.
+
+    Записывается асинхронными событиями, поэтому пересекающиеся запросы в
+    одном цикле событий отображаются отдельными дорожками.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _AsyncSpan(tracer, name, args)
+
+
+def export(path):
+    """Сохраняет накопленные события в JSON; None, если трассировка выключена"""
+    if _tracer is None:
+        return None
+    return _tracer.export(path)
+
+
+# MAMDANI_TRACE=trace.json включает трассировку для любого скрипта и сохраняет ее при выходе
+if os.environ.get("MAMDANI_TRACE"):
+    enable()
+    atexit.register(export, os.environ["MAMDANI_TRACE"])
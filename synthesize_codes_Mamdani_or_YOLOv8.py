@@ -1,7 +1,9 @@
 import os
-from ultralytics import YOLO
 import numpy as np
-import matplotlib.pyplot as plt
+
+from mamdani_membership import three_terms
+from yolo_registry import get_model
+from yolo_detect import detect_confidences
 
 # Путь к файлу изображения
 image_path = '/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/66.jpg'
@@ -10,37 +12,14 @@ image_path = '/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _
 if not os.path.exists(image_path):
     print(f"Файл не найден: {image_path}")
 else:
-    # Загрузка модели с весами
-    model = YOLO('/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/best.pt')
+    # Модель из реестра: веса загружаются и прогреваются один раз на процесс
+    model = get_model('/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/best.pt')
 
     # Функция для обработки изображения
     def detect_objects(image_path):
-        # Выполнение детекции на изображении
-        results = model(image_path)
-
-        # Инициализация переменных для хранения достоверностей
-        confidence_NR = 0
-        confidence_neck_ass = 0
-
-        # Обработка результатов
-        for result in results:
-            boxes = result.boxes  # Получаем объект с детекциями
-            for box in boxes:
-                xmin, ymin, xmax, ymax = box.xyxy[0]  # Координаты
-                confidence = box.conf[0]  # Достоверность
-                class_id = int(box.cls[0])  # ID класса
-                class_name = model.names[class_id]  # Название класса
-
-                # Выводим информацию о каждом найденном объекте
-                print(f"Объект: {class_name}, Достоверность: {confidence:.2f}, Координаты: ({xmin}, {ymin}, {xmax}, {ymax})")
-
-                # Сохраняем достоверности для нужных объектов
-                if class_name == "NR":
-                    confidence_NR = confidence
-                elif class_name == "neck ass":
-                    confidence_neck_ass = confidence
-
-        return confidence_NR, confidence_neck_ass
+        # Максимальные достоверности классов "NR" и "neck ass" по всем рамкам сразу
+        confidence_NR, confidence_neck_ass = detect_confidences(model, image_path, ["NR", "neck ass"])
+        return float(confidence_NR), float(confidence_neck_ass)
 
     # Нечеткая логика Мамдани
     def fuzzy_and(x, y):
@@ -49,29 +28,11 @@ else:
     def fuzzy_or(x, y):
         return max(x, y)
 
-    def membership_low(value):
-        if value <= 0:
-            return 1
-        elif 0 < value < 0.3:
-            return 1 - (value / 0.3)
-        else:
-            return 0
-
-    def membership_medium(value):
-        if 0 <= value <= 1:
-            if value < 0.5:
-                return 2 * value
-            elif value <= 1:
-                return 2 * (1 - value)
-        return 0
-
-    def membership_high(value):
-        if value < 0.3:
-            return 0
-        elif 0.3 <= value < 1:
-            return (value - 0.3) / 0.7
-        else:
-            return 1
+    # Функции принадлежности из mamdani_membership: low спадает до 0 к 0.3,
+    # high растет от 0.3 до 1, medium - треугольник с вершиной 0.5
+    terms = three_terms(low_end=0.3, high_start=0.3)
+    membership_low, membership_medium, membership_high = (term.scalar for term in terms)
+    membership_low_batch, membership_medium_batch, membership_high_batch = (term.batch for term in terms)
 
     def fuzzy_rule(input1, input2):
         low1 = membership_low(input1)
@@ -104,21 +65,23 @@ else:
 
     def plot_memberships(input1, input2, output):
         """Построение графиков степеней принадлежности"""
+        import matplotlib.pyplot as plt
+
         x_values = np.linspace(0, 1, 100)
 
         # Степени принадлежности для входных переменных
-        low1 = [membership_low(x) for x in x_values]
-        medium1 = [membership_medium(x) for x in x_values]
-        high1 = [membership_high(x) for x in x_values]
+        low1 = membership_low_batch(x_values)
+        medium1 = membership_medium_batch(x_values)
+        high1 = membership_high_batch(x_values)
 
-        low2 = [membership_low(x) for x in x_values]
-        medium2 = [membership_medium(x) for x in x_values]
-        high2 = [membership_high(x) for x in x_values]
+        low2 = membership_low_batch(x_values)
+        medium2 = membership_medium_batch(x_values)
+        high2 = membership_high_batch(x_values)
 
         # Степени принадлежности для выходных переменных
-        output_low = [min(membership_low(x), output[0]) for x in x_values]
-        output_medium = [min(membership_medium(x), output[1]) for x in x_values]
-        output_high = [min(membership_high(x), output[2]) for x in x_values]
+        output_low = np.minimum(membership_low_batch(x_values), output[0])
+        output_medium = np.minimum(membership_medium_batch(x_values), output[1])
+        output_high = np.minimum(membership_high_batch(x_values), output[2])
 
         plt.figure(figsize=(12, 8))
 
@@ -156,7 +119,7 @@ else:
         plt.tight_layout()
         plt.show()
 
-    def main(input1, input2):
+    def main(input1, input2, plot=False):
         """Главная функция, которая осуществляет нечеткую импликацию Мамдани"""
         output = fuzzy_rule(input1, input2)
 
@@ -166,8 +129,9 @@ else:
         # Дефузификация
         result = defuzzification(aggregated_output)
 
-        # Построение графиков
-        plot_memberships(input1, input2, aggregated_output)
+        # Построение графиков (только по запросу, чтобы не импортировать matplotlib)
+        if plot:
+            plot_memberships(input1, input2, aggregated_output)
 
         return result
 
@@ -178,7 +142,7 @@ else:
         
         # Проверяем, что достоверности не равны нулю
         if input1 > 0 and input2 > 0:
-            result = main(input1, input2)
+            result = main(input1, input2, plot=True)
             print(f"Результат нечеткой импликации: {result:.2f}")
         else:
             print("Не удалось получить достоверности для объектов 'NR' и 'neck ass'.")
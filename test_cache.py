@@ -0,0 +1,87 @@
+"""Проверки кэша результатов и версий нечеткой логики."""
+import numpy as np
+import pytest
+
+import big_logika
+from mamdani_cache import ResultCache, cache_key, cached_score, rule_base_version
+from mamdani_rules import compile_rule_base
+from mamdani_service import ScoringService
+
+
+def test_rule_base_version_depends_on_breakpoints():
+    def version(points):
+        return rule_base_version(compile_rule_base({
+            "variables": {"x": {"a": {"points": points}}},
+            "output": ["o"],
+            "rules": [{"if": [["x", "a"]], "then": "o"}],
+        }))
+    assert version([[0, 0], [0.2, 1]]) != version([[0, 0], [0.9, 1]])
+    assert version([[0, 0], [0.2, 1]]) == version([[0, 0], [0.2, 1]])
+
+
+def test_logic_version_follows_infer_batch():
+    assert big_logika.logic_version("mamdani") != big_logika.logic_version("sugeno")
+    assert big_logika.logic_version().startswith(rule_base_version(big_logika.RULE_BASE))
+    with pytest.raises(ValueError):
+        big_logika.logic_version("centroid")
+
+
+def test_cache_key_covers_class_names_and_mode():
+    base = cache_key("image", ["w1", "w2"], [["a"], ["b"]], "v1")
+    assert base == cache_key("image", ["w1", "w2"], [["a"], ["b"]], "v1", "mamdani")
+    assert base != cache_key("image", ["w1", "w2"], [["b"], ["a"]], "v1")
+    assert base != cache_key("image", ["w1", "w2"], [["a", "b"], []], "v1")
+    assert base != cache_key("image", ["w1", "w2"], [["a"], ["b"]], "v1", "sugeno")
+    assert base != cache_key("image", ["w1", "w2"], [["a"], ["b"]], "v2")
+
+
+def test_lru_eviction():
+    cache = ResultCache(capacity=2)
+    cache.put("a", [0.1], 0.1)
+    cache.put("b", [0.2], 0.2)
+    assert cache.get("a") is not None
+    cache.put("c", [0.3], 0.3)
+    # "b" использовался давнее всех и вытеснен
+    assert cache.get("b") is None
+    assert cache.get("a")[1] == 0.1
+    assert cache.get("c")[1] == 0.3
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_disk_fallthrough(tmp_path):
+    path = str(tmp_path / "results.db")
+    cache = ResultCache(path, capacity=1)
+    cache.put("a", [0.1, 0.2], 0.5)
+    cache.put("b", [0.3, 0.4], 0.7)
+    confidences, score = cache.get("a")
+    assert np.array_equal(confidences, [0.1, 0.2]) and score == 0.5
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+    reopened = ResultCache(path, capacity=1)
+    assert reopened.get("b")[1] == 0.7
+    assert reopened.stats() == {
+        "memory_hits": 0, "disk_hits": 1, "misses": 0, "hit_rate": 1.0, "memory_entries": 1,
+    }
+    reopened.close()
+
+
+def test_cached_score_computes_once():
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return [0.4, 0.9], 0.6
+
+    for _ in range(3):
+        confidences, score = cached_score(cache, "image", ["w"], [["a", "b"]], "v", compute)
+    assert len(calls) == 1 and score == 0.6
+
+
+def test_service_rule_version():
+    detectors = [("best.pt", ["a"]), ("best1.pt", ["b"])]
+    assert ScoringService(detectors, cache=ResultCache(), mode="sugeno").rule_version == big_logika.logic_version("sugeno")
+    with pytest.raises(ValueError):
+        ScoringService(detectors, fuzzy_batch=big_logika.infer_batch, cache=ResultCache())
+    assert ScoringService(detectors, fuzzy_batch=big_logika.infer_batch, cache=ResultCache(), rule_version="v").rule_version == "v"
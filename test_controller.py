@@ -0,0 +1,29 @@
+"""Проверки двоичного формата контроллера."""
+import numpy as np
+import pytest
+
+import Mamdani_two_input
+from mamdani_controller import export_module, load_controller
+
+
+@pytest.mark.parametrize("mode, method", [("mamdani", "weighted"), ("mamdani", "centroid"), ("sugeno", "weighted")])
+def test_controller_round_trip(tmp_path, mode, method):
+    path = str(tmp_path / "controller.mctl")
+    export_module("Mamdani_two_input", path, mode, method, surface_resolution=33)
+    controller = load_controller(path)
+    inputs = np.random.default_rng(6).uniform(-0.1, 1.1, (2000, 2))
+    expected = Mamdani_two_input.infer_batch(inputs, method=method, mode=mode)
+    assert np.array_equal(controller.infer_batch(inputs), expected)
+
+    # Массивы правил и поверхность - представления отображенного файла
+    for array in (controller.rule_base.antecedents, controller.rule_base.consequents, controller.surface.grid):
+        while not isinstance(array, np.memmap):
+            assert array.base is not None
+            array = array.base
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "controller.mctl"
+    path.write_bytes(b"not a controller")
+    with pytest.raises(ValueError):
+        load_controller(str(path))
@@ -0,0 +1,22 @@
+"""Проверки точной дефузификации по отсеченным выходным множествам."""
+import numpy as np
+import pytest
+
+import Mamdani_two_input
+from mamdani_defuzz import defuzzify_batch
+
+
+@pytest.mark.parametrize("method", ["centroid", "bisector"])
+def test_exact_defuzzification_matches_fine_grid(method):
+    strengths = np.random.default_rng(2).random((200, 3))
+    exact = defuzzify_batch(strengths, Mamdani_two_input.OUTPUT_SETS, method)
+    grid = defuzzify_batch(strengths, Mamdani_two_input.OUTPUT_SETS, method, resolution=100001)
+    assert np.allclose(exact, grid, atol=1e-4)
+
+
+def test_zero_strengths_and_unknown_method():
+    strengths = np.zeros((3, 3))
+    for method in ("centroid", "bisector", "mom", "som"):
+        assert np.array_equal(defuzzify_batch(strengths, Mamdani_two_input.OUTPUT_SETS, method), np.zeros(3))
+    with pytest.raises(ValueError):
+        defuzzify_batch(strengths, Mamdani_two_input.OUTPUT_SETS, "weighted")
@@ -0,0 +1,23 @@
+"""Проверки пакетного вывода infer_batch против скалярного main."""
+import numpy as np
+import pytest
+
+import Mamdani_two_input
+import big_logika
+
+# Входы на [0, 1] с точками излома и значениями за пределами отрезка
+EDGES = [0.0, 0.3, 0.5, 0.7, 1.0, -0.1, 1.1]
+
+
+def _pairs(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    grid = np.array([(a, b) for a in EDGES for b in EDGES])
+    return np.concatenate([grid, rng.random((n, 2))])
+
+
+@pytest.mark.parametrize("module", [Mamdani_two_input, big_logika])
+@pytest.mark.parametrize("mode", ["mamdani", "sugeno"])
+def test_infer_batch_matches_main(module, mode):
+    inputs = _pairs()
+    expected = [module.main(a, b, mode=mode) for a, b in inputs.tolist()]
+    assert np.array_equal(module.infer_batch(inputs, mode=mode), np.array(expected, dtype=np.float64))
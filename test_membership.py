@@ -0,0 +1,75 @@
+"""Проверки функций принадлежности mamdani_membership."""
+import numpy as np
+import pytest
+
+from mamdani_membership import HIGH, LOW, MEDIUM, Gaussian, Membership, Sigmoid, from_spec, three_terms
+
+EDGES = [0.0, 0.3, 0.5, 0.7, 1.0, -0.1, 1.1]
+
+
+# Прежние функции принадлежности скриптов до mamdani_membership
+def _old_low(value, end=0.5):
+    if value <= 0:
+        return 1
+    elif 0 < value < end:
+        return 1 - (value / end)
+    else:
+        return 0
+
+
+def _old_medium(value):
+    if 0 <= value <= 1:
+        if value < 0.5:
+            return 2 * value
+        elif value <= 1:
+            return 2 * (1 - value)
+    return 0
+
+
+def _old_high(value, start=0.5):
+    if value < start:
+        return 0
+    elif start <= value < 1:
+        return (value - start) / (1 - start)
+    else:
+        return 1
+
+
+@pytest.mark.parametrize("end", [0.5, 0.3])
+def test_terms_match_old_functions(end):
+    low, medium, high = three_terms(end, end)
+    values = np.concatenate([np.random.default_rng(3).uniform(-0.5, 1.5, 5000), EDGES, [np.nan]])
+    for term, old in ((low, lambda v: _old_low(v, end)), (medium, _old_medium), (high, lambda v: _old_high(v, end))):
+        expected = np.array([old(v) for v in values], dtype=np.float64)
+        assert np.array_equal([term.scalar(v) for v in values], expected)
+        assert np.array_equal(term.batch(values), expected)
+        out, scratch = np.empty_like(values), np.empty_like(values)
+        assert np.array_equal(term.batch_into(values, out, scratch), expected)
+
+
+def test_nan_gets_value_at_infinity():
+    assert (LOW.scalar(np.nan), MEDIUM.scalar(np.nan), HIGH.scalar(np.nan)) == (0.0, 0.0, 1.0)
+    assert np.array_equal(MEDIUM.batch(np.array([np.nan])), [0.0])
+
+
+@pytest.mark.parametrize("value", [0.3, 1, np.float32(0.3), np.float64(0.3), np.int64(1)])
+def test_call_returns_float_for_scalars(value):
+    for term in (LOW, MEDIUM, HIGH, Gaussian(0.5, 0.1), Sigmoid(0.5, 10)):
+        result = term(value)
+        assert type(result) is float
+        assert result == pytest.approx(term.batch(np.array([float(value)]))[0], rel=1e-15)
+
+
+def test_call_on_array_keeps_shape():
+    values = np.linspace(0, 1, 12).reshape(3, 4)
+    assert MEDIUM(values).shape == (3, 4)
+
+
+def test_spec_round_trip():
+    for term in (LOW, MEDIUM, HIGH, Gaussian(0.5, 0.1), Sigmoid(0.5, -4)):
+        assert from_spec(term.to_spec()) == term
+
+
+def test_membership_is_abstract():
+    with pytest.raises(TypeError):
+        Membership()
@@ -0,0 +1,45 @@
+"""Проверки скомпилированной базы правил."""
+import numpy as np
+import pytest
+
+import Mamdani
+from mamdani_rules import compile_rule_base
+
+
+def test_mamdani_k_inputs():
+    inputs = np.random.default_rng(1).random((500, 3))
+    expected = [Mamdani.main(row, rule_base=Mamdani.RULE_BASE_3) for row in inputs.tolist()]
+    assert np.array_equal(Mamdani.infer_batch(inputs, rule_base=Mamdani.RULE_BASE_3), expected)
+    with pytest.raises(ValueError):
+        Mamdani.infer_batch(inputs)
+    with pytest.raises(ValueError):
+        Mamdani.main([0.4, 0.7, 0.8])
+
+
+def test_operations_negation_and_weights():
+    rule_base = compile_rule_base({
+        "variables": {
+            "x": {"up": {"points": [[0, 0], [1, 1]]}},
+            "y": {"up": {"points": [[0, 0], [1, 1]]}},
+        },
+        "output": ["a", "b"],
+        "rules": [
+            {"if": [["x", "up"], ["y", "not up"]], "then": "a"},
+            {"if": [["x", "up"], ["y", "up"]], "op": "or", "then": "b", "weight": 0.5},
+            {"if": [["y", "up"]], "then": "b"},
+        ],
+    })
+    x, y = 0.8, 0.3
+    expected = [min(x, 1 - y), max(0.5 * max(x, y), y)]
+    assert np.allclose(rule_base.evaluate(np.array([[x, y]])), [expected])
+
+
+@pytest.mark.parametrize("rule, message", [
+    ({"if": [["x", "missing"]], "then": "a"}, "терм"),
+    ({"if": [["x", "up"]], "op": "xor", "then": "a"}, "операция"),
+    ({"if": [["x", "up"]], "then": "c"}, "выходной"),
+])
+def test_invalid_rules(rule, message):
+    spec = {"variables": {"x": {"up": {"points": [[0, 0], [1, 1]]}}}, "output": ["a"], "rules": [rule]}
+    with pytest.raises(ValueError, match=message):
+        compile_rule_base(spec)
@@ -0,0 +1,32 @@
+"""Проверки пакетной оценки файлов достоверностей."""
+import numpy as np
+import pytest
+
+import Mamdani_two_input
+from mamdani_score import score_file
+
+
+@pytest.mark.parametrize("source, destination", [("in.csv", "out.csv"), ("in.npy", "out.npy")])
+def test_score_file_keeps_order(tmp_path, source, destination):
+    inputs = np.random.default_rng(4).random((10007, 2))
+    source, destination = str(tmp_path / source), str(tmp_path / destination)
+    if source.endswith(".csv"):
+        np.savetxt(source, inputs, delimiter=",", header="input1,input2", comments="", fmt="%.17g")
+    else:
+        np.save(source, inputs)
+
+    score_file(source, destination, chunk_size=1000, workers=2, progress=False)
+    if destination.endswith(".csv"):
+        scores = np.loadtxt(destination, skiprows=1)
+    else:
+        scores = np.load(destination)
+    assert np.array_equal(scores, Mamdani_two_input.infer_batch(inputs))
+
+
+@pytest.mark.parametrize("mode", ["mamdani", "sugeno"])
+def test_infer_into_matches_infer_batch(mode):
+    inputs = np.random.default_rng(5).uniform(-0.1, 1.1, (5000, 2))
+    out = np.empty(len(inputs))
+    # Срезы меньше входа, чтобы проверить границы срезов и неполный последний срез
+    Mamdani_two_input.infer_into(inputs, out, mode=mode, slice_rows=333)
+    assert np.array_equal(out, Mamdani_two_input.infer_batch(inputs, mode=mode))
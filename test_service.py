@@ -0,0 +1,70 @@
+"""Проверки микропакетирования и сервиса оценки без моделей YOLO."""
+import asyncio
+
+import numpy as np
+import pytest
+
+import big_logika
+from mamdani_service import MicroBatcher, ScoringService
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_micro_batcher_batches_and_flushes():
+    sizes = []
+
+    def process(items):
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(process, max_batch_size=4, max_wait=0.05)
+        batcher.start()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        # Одиночный запрос не ждет добора пачки дольше max_wait
+        single = await asyncio.wait_for(batcher.submit(7), 1.0)
+        await batcher.stop()
+        return results, single, batcher
+
+    results, single, batcher = _run(scenario())
+    assert results == [i * 2 for i in range(10)] and single == 14
+    assert sizes == [4, 4, 2, 1]
+    assert (batcher.batches, batcher.items) == (4, 11)
+
+
+def test_micro_batcher_propagates_errors():
+    def process(items):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        batcher = MicroBatcher(process, max_wait=0.001)
+        batcher.start()
+        try:
+            with pytest.raises(RuntimeError):
+                await batcher.submit(1)
+        finally:
+            await batcher.stop()
+
+    _run(scenario())
+
+
+def test_service_scores_confidences():
+    service = ScoringService([("best.pt", ["a"]), ("best1.pt", ["b"])], max_wait=0.01)
+    inputs = np.random.default_rng(7).random((16, 2))
+
+    async def scenario():
+        await service.start()
+        try:
+            responses = await asyncio.gather(*(service.score(confidences=row) for row in inputs))
+            with pytest.raises(ValueError):
+                await service.score(confidences=[0.5])
+        finally:
+            await service.stop()
+        return responses
+
+    responses = _run(scenario())
+    assert [response["score"] for response in responses] == list(big_logika.infer_batch(inputs))
+    assert responses[0]["confidences"] == {"a": inputs[0, 0], "b": inputs[0, 1]}
+    assert service.fuzzy_batcher.items == len(inputs)
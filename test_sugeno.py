@@ -0,0 +1,31 @@
+"""Проверки вывода Сугено."""
+import numpy as np
+import pytest
+
+import Mamdani
+from mamdani_sugeno import SugenoEngine, engine_for
+
+
+def test_engine_cache():
+    engine = engine_for(Mamdani.RULE_BASE_3, Mamdani.SUGENO_OUTPUTS)
+    assert engine is Mamdani.sugeno(Mamdani.RULE_BASE_3)
+    assert engine is engine_for(Mamdani.RULE_BASE_3, {"low": [0.0], "medium": 0.5, "high": 1})
+    assert engine is not engine_for(Mamdani.RULE_BASE_3, {"low": 0.0, "medium": 0.6, "high": 1.0})
+
+
+@pytest.mark.parametrize("outputs", [
+    {"low": 0.0, "medium": 0.5, "high": 1.0},
+    {"low": [0.1, 0.2, -0.3, 0.0], "medium": 0.5, "high": [1.0, 0.0, 0.0, -0.5]},
+])
+def test_scalar_matches_batch(outputs):
+    engine = SugenoEngine(Mamdani.RULE_BASE_3, outputs)
+    inputs = np.random.default_rng(3).random((300, 3))
+    expected = [engine(*row) for row in inputs.tolist()]
+    assert np.allclose(engine.infer_batch(inputs), expected, rtol=1e-12, atol=0)
+
+
+def test_invalid_outputs():
+    with pytest.raises(ValueError):
+        SugenoEngine(Mamdani.RULE_BASE_3, {"low": 0.0, "medium": 0.5})
+    with pytest.raises(ValueError):
+        SugenoEngine(Mamdani.RULE_BASE_3, {"low": [0.0, 1.0], "medium": 0.5, "high": 1.0})
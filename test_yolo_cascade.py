@@ -0,0 +1,54 @@
+"""Проверки каскада детекторов на заглушках моделей."""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import big_logika
+from yolo_cascade import GATES, PATH_BOTH, PATH_SKIPPED_GATE, CascadeRunner
+
+
+def _runner(confidences, **kwargs):
+    """Каскад из двух заглушек: detect возвращает заданную достоверность модели и считает вызовы"""
+    models = [SimpleNamespace(confidence=value, calls=0) for value in confidences]
+
+    def detect(model, image, target):
+        model.calls += 1
+        return model.confidence, None
+
+    return CascadeRunner([(models[0], "a"), (models[1], "b")], detect=detect, **kwargs), models
+
+
+@pytest.mark.parametrize("gate", sorted(GATES))
+@pytest.mark.parametrize("first", [0, 1])
+def test_decision_matches_running_both(gate, first):
+    values = [0.0, 0.3, 0.7, 0.71, 0.9, 1.0]
+    for input1 in values:
+        for input2 in values:
+            runner, models = _runner([input1, input2], gate=gate, first=first)
+            result = runner.run("image.jpg")
+            assert result.passed == bool(GATES[gate].passes(input1, input2))
+            if result.path == PATH_SKIPPED_GATE:
+                assert models[1 - first].calls == 0 and result.confidences[1 - first] is None
+
+
+def test_path_counts():
+    runner, models = _runner([0.5, 0.0], gate="big_logika")
+    runner.run("image.jpg")
+    models[0].confidence = 0.9
+    runner.run("image.jpg")
+    runner.run("image.jpg")
+    stats = runner.stats()
+    assert stats["paths"] == {PATH_BOTH: 2, PATH_SKIPPED_GATE: 1}
+    assert stats["runs"] == 3 and stats["second_skipped"] == pytest.approx(1 / 3)
+    assert models[1].calls == 2
+
+
+def test_score_and_threshold():
+    runner, _ = _runner([0.9, 0.0], fuzzy_batch=big_logika.infer_batch, threshold=0.99)
+    result = runner.run("image.jpg")
+    expected = big_logika.infer_batch(np.array([[0.9, 0.0]]))[0]
+    assert result.path == PATH_BOTH and result.score == expected
+    assert result.passed == (expected >= 0.99)
+    with pytest.raises(ValueError):
+        _runner([0.9, 0.0], threshold=0.5)
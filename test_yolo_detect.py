@@ -0,0 +1,52 @@
+"""Проверки разбора рамок YOLO на заглушках результатов."""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from mamdani_bench import StubModel
+from yolo_detect import class_best_boxes, class_confidences, class_ids, detect_confidences
+
+
+def _result(conf, cls):
+    conf = np.asarray(conf, dtype=np.float32)
+    xyxy = np.column_stack([np.arange(len(conf))] * 2 + [np.arange(len(conf)) + 10] * 2).astype(np.float64)
+    return SimpleNamespace(boxes=SimpleNamespace(conf=conf, cls=np.asarray(cls, dtype=np.float32), xyxy=xyxy))
+
+
+def _reference(result, ids, top_k):
+    """Перебор рамок в цикле, как в исходных скриптах"""
+    rows = []
+    for class_id in ids:
+        values = sorted((float(c) for c, k in zip(result.boxes.conf, result.boxes.cls) if int(k) == class_id), reverse=True)
+        rows.append((values + [0.0] * top_k)[:top_k])
+    return np.array(rows)
+
+
+def test_max_per_class():
+    result = _result([0.2, 0.9, 0.4, 0.6], [1, 1, 2, 0])
+    assert np.allclose(class_confidences(result, [2, 1, 5]), [0.4, 0.9, 0.0])
+    assert np.array_equal(class_confidences(_result([], []), [0, 1]), [0.0, 0.0])
+
+
+@pytest.mark.parametrize("top_k", [1, 3, 10])
+def test_top_k_matches_loop(top_k):
+    result = StubModel(n_boxes=200, seed=top_k)._result
+    ids = [2, 0, 2, 7]
+    assert np.array_equal(class_confidences(result, ids, top_k), _reference(result, ids, top_k))
+    assert np.array_equal(class_confidences(result, ids), _reference(result, ids, 1)[:, 0])
+
+
+def test_best_boxes():
+    confidences, boxes = class_best_boxes(_result([0.2, 0.9, 0.4], [1, 1, 2]), [1, 0])
+    assert np.allclose(confidences, [0.9, 0.0])
+    assert np.array_equal(boxes[0], [1, 1, 11, 11]) and np.isnan(boxes[1]).all()
+
+
+def test_class_ids_and_detect():
+    model = StubModel()
+    assert list(class_ids(model, ["penis", "NR"])) == [2, 0]
+    with pytest.raises(ValueError):
+        class_ids(model, ["missing"])
+    expected = class_confidences(model._result, [1, 2])
+    assert np.array_equal(detect_confidences(model, "image.jpg", ["neck ass", "penis"]), expected)
@@ -0,0 +1,45 @@
+"""Проверки параллельного запуска детекторов на заглушках моделей."""
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+import yolo_registry
+from mamdani_bench import StubModel
+from yolo_ensemble import EnsembleRunner
+
+
+def _image_detect(model, image, target):
+    """Сумма пикселей и признак того, что пришел массив, а не путь"""
+    if isinstance(image, str):
+        return ("path", image, target)
+    return ("array", int(np.asarray(image, dtype=np.int64).sum()), image.flags.writeable, target)
+
+
+@pytest.fixture
+def stub_registry(monkeypatch):
+    # Рабочие процессы наследуют реестр с заглушками при fork
+    monkeypatch.setattr(yolo_registry, "registry", yolo_registry.ModelRegistry(lambda weights: StubModel()))
+
+
+def test_thread_backend_keeps_order():
+    models = [StubModel(seed=1), StubModel(seed=2)]
+    with EnsembleRunner([(models[0], 1), (models[1], 2)], detect=lambda model, image, target: (model, target)) as runner:
+        assert runner.run("image.jpg") == [(models[0], 1), (models[1], 2)]
+
+
+@pytest.mark.skipif(
+    os.name != "posix" or multiprocessing.get_start_method() != "fork",
+    reason="заглушки реестра передаются рабочим процессам только при fork",
+)
+def test_process_backend_shares_decoded_image(stub_registry):
+    image = np.arange(4 * 5 * 3, dtype=np.uint8).reshape(4, 5, 3)
+    with EnsembleRunner([("a.pt", 1), ("b.pt", 2)], detect=_image_detect, backend="process") as runner:
+        assert runner.run(image) == [("array", int(image.sum()), False, 1), ("array", int(image.sum()), False, 2)]
+        assert runner.run("image.jpg") == [("path", "image.jpg", 1), ("path", "image.jpg", 2)]
+
+
+def test_process_backend_needs_paths():
+    with pytest.raises(ValueError):
+        EnsembleRunner([(StubModel(), 1)], backend="process")
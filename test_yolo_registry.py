@@ -0,0 +1,48 @@
+"""Проверки реестра моделей на заглушке загрузчика."""
+import threading
+from types import SimpleNamespace
+
+from yolo_registry import ModelRegistry
+
+
+def _loader(calls):
+    def load(weights):
+        calls.append(weights)
+        model = SimpleNamespace(names={0: "a"}, predictions=[])
+        model.predict = lambda source=None, **kwargs: model.predictions.append(kwargs) or []
+        return model
+    return load
+
+
+def test_config_reaches_every_predict():
+    calls = []
+    registry = ModelRegistry(_loader(calls))
+    model = registry.get("best.pt", device="cpu", imgsz=320, half=True)
+    # Прогрев и обычный вызов получают конфигурацию реестра; явный параметр важнее
+    model.predict("image.jpg", verbose=False)
+    model("image.jpg", imgsz=640)
+    assert [p["imgsz"] for p in model.predictions] == [320, 320, 640]
+    assert all(p["device"] == "cpu" and p["half"] for p in model.predictions)
+    assert model.names == {0: "a"}
+
+
+def test_one_instance_per_config():
+    calls = []
+    registry = ModelRegistry(_loader(calls))
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get("best.pt"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and all(model is models[0] for model in models)
+    assert registry.get("best.pt", imgsz=320) is not models[0] and len(calls) == 2
+
+
+def test_contains_matches_get():
+    registry = ModelRegistry(_loader([]))
+    registry.get("best.pt", device="0", imgsz=320, half=True, warmup=False)
+    assert "best.pt" not in registry
+    assert ("best.pt", "0", 320, True) in registry
+    assert registry.contains("best.pt", device="0", imgsz=320, half=True)
+    assert registry.evict("best.pt", imgsz=320) == 1 and len(registry) == 0
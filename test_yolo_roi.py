@@ -0,0 +1,35 @@
+"""Проверки областей второго этапа вокруг рамок первой модели."""
+import numpy as np
+
+from yolo_roi import merge_regions, roi_regions
+
+
+def _overlap(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def test_merge_regions():
+    regions = np.array([[0, 0, 10, 10], [5, 5, 20, 20], [30, 30, 40, 40], [18, 0, 32, 4]])
+    merged = merge_regions(regions)
+    # Цепочка пересечений сливается в одну область, а касание по границе - не пересечение
+    assert sorted(map(tuple, merged)) == [(0, 0, 32, 20), (30, 30, 40, 40)]
+    assert merge_regions(np.zeros((0, 4))).shape == (0, 4)
+
+
+def test_merged_regions_do_not_overlap():
+    rng = np.random.default_rng(0)
+    corners = rng.integers(0, 900, (40, 2))
+    merged = merge_regions(np.column_stack([corners, corners + rng.integers(10, 120, (40, 2))]))
+    for i in range(len(merged)):
+        for j in range(i + 1, len(merged)):
+            assert not _overlap(merged[i], merged[j])
+
+
+def test_roi_regions_pad_min_size_and_clip():
+    boxes = np.array([[100, 100, 200, 180], [0, 0, 4, 4], [590, 470, 640, 480]])
+    regions = roi_regions(boxes, (480, 640, 3), pad=0.25, min_size=64, merge=False)
+    assert np.array_equal(regions[0], [75, 80, 225, 200])
+    # Маленькая рамка у края расширяется до min_size и обрезается изображением
+    assert np.array_equal(regions[1], [0, 0, 34, 34])
+    assert regions[:, 2].max() <= 640 and regions[:, 3].max() <= 480
+    assert roi_regions(np.zeros((0, 4)), (480, 640)).shape == (0, 4)
@@ -0,0 +1,43 @@
+"""Проверки разбиения на плитки и объединения рамок."""
+import numpy as np
+import pytest
+
+from yolo_tiled import nms, tile_grid
+
+
+@pytest.mark.parametrize("shape, tile, overlap", [((1080, 1920, 3), 640, 0.2), ((500, 300), 640, 0.2), ((2000, 2000), 512, 0.5)])
+def test_tile_grid_covers_image(shape, tile, overlap):
+    tiles = tile_grid(shape, tile, overlap)
+    covered = np.zeros(shape[:2], dtype=bool)
+    for x0, y0, x1, y1 in tiles:
+        assert x1 - x0 <= tile and y1 - y0 <= tile
+        covered[y0:y1, x0:x1] = True
+    assert covered.all()
+    assert tiles[:, 2].max() == shape[1] and tiles[:, 3].max() == shape[0]
+
+
+def test_tile_grid_overlap():
+    tiles = tile_grid((640, 1600), 640, 0.25)
+    assert list(tiles[:, 0]) == [0, 480, 960]
+    with pytest.raises(ValueError):
+        tile_grid((640, 640), overlap=1.0)
+
+
+def test_nms_per_class():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [0, 0, 10, 10], [50, 50, 60, 60]], dtype=np.float64)
+    scores = np.array([0.6, 0.9, 0.5, 0.3])
+    classes = np.array([0, 0, 1, 0])
+    # Рамка 0 подавлена рамкой 1 того же класса, рамка 2 другого класса остается
+    assert list(nms(boxes, scores, classes, iou=0.5)) == [1, 2, 3]
+    assert len(nms(np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.intp))) == 0
+
+
+def test_nms_ios_suppresses_tile_crops():
+    # Обрезок объекта на границе плитки внутри полной рамки: IoU мал, а IoS равен 1
+    boxes = np.array([[0, 0, 100, 100], [80, 0, 100, 100]], dtype=np.float64)
+    scores = np.array([0.9, 0.8])
+    classes = np.zeros(2, dtype=np.intp)
+    assert list(nms(boxes, scores, classes, metric="iou")) == [0, 1]
+    assert list(nms(boxes, scores, classes, metric="ios")) == [0]
+    with pytest.raises(ValueError):
+        nms(boxes, scores, classes, metric="giou")
@@ -0,0 +1,40 @@
+"""Проверки пропуска кадров и сглаживания в потоковой оценке видео."""
+import numpy as np
+import pytest
+
+from yolo_video import ExponentialSmoother, VideoScorer, WindowSmoother
+
+
+def _frames(values):
+    """Однотонные кадры BGR с заданной яркостью"""
+    return [(index, np.full((48, 64, 3), value, dtype=np.uint8)) for index, value in enumerate(values)]
+
+
+def _detect(frame):
+    level = frame[0, 0, 0] / 255
+    return [level, 1 - level]
+
+
+def test_detection_every_n_frames():
+    scorer = VideoScorer(_detect, lambda a, b: a, every=3, scene_threshold=None, smoothing="none")
+    items = list(scorer.process(_frames([10 * i for i in range(8)])))
+    assert [item.detected for item in items] == [True, False, False, True, False, False, True, False]
+    # Между детекциями переносятся последние достоверности и результат
+    assert items[2].score == items[0].score and items[4].score == items[3].score
+    assert (scorer.detections, scorer.frames) == (3, 8)
+
+
+def test_scene_change_forces_detection():
+    pytest.importorskip("cv2")
+    scorer = VideoScorer(_detect, lambda a, b: a, every=100, scene_threshold=0.08, smoothing="none")
+    items = list(scorer.process(_frames([20, 22, 21, 200, 201, 30])))
+    assert [item.detected for item in items] == [True, False, False, True, False, True]
+
+
+def test_smoothers():
+    ema = ExponentialSmoother(alpha=0.5)
+    assert [ema.update(v) for v in (1.0, 0.0, 0.0)] == [1.0, 0.5, 0.25]
+    window = WindowSmoother(window=2)
+    assert [window.update(v) for v in (1.0, 3.0, 5.0)] == [1.0, 2.0, 4.0]
+    with pytest.raises(ValueError):
+        VideoScorer(_detect, max, smoothing="median")
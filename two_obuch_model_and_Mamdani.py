@@ -1,64 +1,70 @@
+import argparse
 import os
-from ultralytics import YOLO
-import numpy as np
-import matplotlib.pyplot as plt
-import cv2  # Добавляем библиотеку OpenCV для работы с изображениями
 
-def detect_objects(model, image_path, target_class):
+from image_buffer import as_image, load_image, rgb_view
+from pipeline_trace import span, trace_stages
+from yolo_registry import get_model
+from yolo_cascade import CascadeRunner
+from yolo_roi import detect_two_stage
+from yolo_detect import class_best_boxes, class_ids
+from big_logika import fuzzy_rule, aggregation, defuzzification, plot_memberships
+
+def detect_objects(model, image, target_class):
     """
     Детекция объектов на изображении.
 
     Args:
         model (YOLO): Модель детекции объектов.
-        image_path (str): Путь к изображению.
+        image (str | np.ndarray): Путь к изображению или буфер из load_image.
         target_class (str): Класс объекта, который нужно детектировать.
 
     Returns:
-        tuple: Достоверность детекции объекта и координаты (xmin, ymin, xmax, ymax).
+        tuple: Максимальная достоверность детекции объекта и координаты его рамки
+        (xmin, ymin, xmax, ymax); (0, None), если объект не найден.
     """
     try:
-        results = model(image_path)
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                xmin, ymin, xmax, ymax = box.xyxy[0]
-                conf = box.conf[0]
-                class_id = int(box.cls[0])
-                class_name = model.names[class_id]
-                if class_name == target_class:
-                    return conf, (xmin, ymin, xmax, ymax)
+        ids = class_ids(model, [target_class])
+        with span("predict"):
+            result = model.predict(image, verbose=False)[0]
+        with span("boxes"):
+            confidences, boxes = class_best_boxes(result, ids)
+        if confidences[0] > 0:
+            return float(confidences[0]), tuple(boxes[0])
         return 0, None
     except Exception as e:
         print(f"Ошибка детекции объектов: {e}")
         return 0, None
 
-def plot_image_with_detections(image_path, detections):
+def plot_image_with_detections(image, detections):
     """
     Отображение изображения с детектированными объектами.
 
     Args:
-        image_path (str): Путь к изображению.
+        image (str | np.ndarray): Путь к изображению или буфер из load_image.
         detections (list): Список координат обнаруженных объектов.
     """
-    image = cv2.imread(image_path)
-    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)  # Преобразуем BGR в RGB для matplotlib
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Rectangle
 
+    # Рамки рисуются поверх изображения, сам буфер не копируется и не изменяется
+    plt.imshow(rgb_view(as_image(image)))
+    ax = plt.gca()
     for conf, (xmin, ymin, xmax, ymax) in detections:
-        cv2.rectangle(image, (int(xmin), int(ymin)), (int(xmax), int(ymax)), (255, 0, 0), 2)
+        ax.add_patch(Rectangle((xmin, ymin), xmax - xmin, ymax - ymin, fill=False, edgecolor='red', linewidth=2))
         plt.text(xmin, ymin, f'{conf:.2f}', color='white', fontsize=12, backgroundcolor='blue')
 
-    plt.imshow(image)
     plt.axis('off')
     plt.title('Обнаруженные объекты')
     plt.show()
 
-def main(input1, input2):
+def main(input1, input2, plot=False):
     """
     Главная функция, которая осуществляет нечеткую импликацию Мамдани.
 
     Args:
         input1 (float): Первый входной параметр.
         input2 (float): Второй входной параметр.
+        plot (bool): Строить ли графики степеней принадлежности.
 
     Returns:
         float: Результат нечеткой импликации.
@@ -66,10 +72,19 @@ def main(input1, input2):
     output = fuzzy_rule(input1, input2)
     aggregated_output = aggregation(output)
     result = defuzzification(aggregated_output)
-    plot_memberships(input1, input2, aggregated_output)
+    if plot:
+        plot_memberships(input1, input2, aggregated_output)
     return result
 
+# Этапы нечеткого вывода попадают в трассировку только при включенной трассировке
+trace_stages(globals(), "fuzzy_rule", "aggregation", "defuzzification", "plot_memberships")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Детекция двумя моделями YOLO и нечеткая импликация")
+    parser.add_argument("--roi", action="store_true",
+                        help="Запускать вторую модель только на вырезках вокруг рамок первой (yolo_roi)")
+    args = parser.parse_args()
+
     # Путь к файлам изображений
     image_path = '/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/66.jpg'
 
@@ -77,23 +92,38 @@ if __name__ == "__main__":
     if not os.path.exists(image_path):
         print(f"Файл не найден: {image_path}")
     else:
-        # Загрузка моделей с весами
-        model1 = YOLO('/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/best.pt')
-        model2 = YOLO('/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/best1.pt')
+        # Модели из реестра: веса загружаются и прогреваются один раз на процесс
+        model1 = get_model('/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/best.pt')
+        model2 = get_model('/content/drive/MyDrive/Rabota/Алгоритмы  Мамдани _от 18_11_24/YOLOv8_and_vesa_18_plus/best1.pt')
 
-        # Детекция объектов на изображении
-        input1, bbox1 = detect_objects(model1, image_path, "neck ass")
-        input2, bbox2 = detect_objects(model2, image_path, "penis")
+        # Изображение декодируется один раз и используется обеими моделями и визуализацией
+        image = load_image(image_path)
+
+        if args.roi:
+            # Двухэтапный режим: вторая модель только на вырезках вокруг рамок первой
+            with span("detect", source=image_path):
+                stage = detect_two_stage(model1, model2, image, "neck ass", "penis")
+            (input1, bbox1), (input2, bbox2) = stage.first, stage.second
+            passed = input1 > 0 and input2 > 0
+        else:
+            # Каскадная детекция: если первая модель не нашла объект, условие ниже
+            # (обе достоверности больше 0) не выполнится, и вторая модель не запускается
+            cascade = CascadeRunner([(model1, "neck ass"), (model2, "penis")], gate="two_obuch", detect=detect_objects)
+            with span("detect", source=image_path):
+                outcome = cascade.run(image)
+            passed = outcome.passed
+            if passed:
+                (input1, bbox1), (input2, bbox2) = outcome.results
 
         # Проверяем, что достоверности не равны нулю
-        if input1 > 0 and input2 > 0:
+        if passed:
             print(f"Объект 'neck ass' обнаружен с достоверностью {input1:.2f}")
             print(f"Объект 'penis' обнаружен с достоверностью {input2:.2f}")
-            result = main(input1, input2)
+            result = main(input1, input2, plot=True)
             print(f"Результат нечеткой импликации: {result:.2f}")
 
             # Отображаем изображение с детекцией
             detections = [(input1, bbox1), (input2, bbox2)]
-            plot_image_with_detections(image_path, detections)
+            plot_image_with_detections(image, detections)
         else:
             print("Не удалось получить достоверности для объектов 'neck ass' и 'penis'.")
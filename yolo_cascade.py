@@ -0,0 +1,178 @@
+"""Каскадный запуск двух детекторов: второй пропускается, если его результат не может изменить решение."""
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from pipeline_trace import span
+from yolo_detect import detect_confidences
+from yolo_registry import get_model
+
+# Пути каскада
+PATH_BOTH = "both"
+PATH_SKIPPED_GATE = "skipped_gate"
+PATHS = (PATH_BOTH, PATH_SKIPPED_GATE)
+
+CascadeResult = namedtuple("CascadeResult", ["results", "confidences", "passed", "score", "path"])
+CascadeResult.__doc__ = """
+Результат каскада.
+
+results - результаты detect по детекторам (None для пропущенного),
+confidences - достоверности (None для пропущенного), passed - выполнено ли
+условие запуска нечеткого вывода (и порог, если задан), score - результат
+нечеткого вывода или None, path - путь каскада из PATHS.
+"""
+
+
+def big_logika_passes(input1, input2):
+    """Условие big_logika.py: один объект уверенно найден (> 0.7), другой не найден"""
+    return (input1 > 0.7 and input2 == 0) or (input2 > 0.7 and input1 == 0)
+
+
+def big_logika_feasible(known):
+    """
+    Значения второй достоверности, при которых условие big_logika может выполниться.
+
+    Returns:
+        tuple | None: (lo, hi, lo_open) - отрезок [lo, hi] (или (lo, hi] при
+        lo_open); None, если условие не выполнится ни при каком значении.
+    """
+    if known > 0.7:
+        return (0.0, 0.0, False)
+    if known == 0:
+        return (0.7, 1.0, True)
+    return None
+
+
+def two_obuch_passes(input1, input2):
+    """Условие two_obuch_model_and_Mamdani.py: оба объекта найдены"""
+    return input1 > 0 and input2 > 0
+
+
+def two_obuch_feasible(known):
+    """Значения второй достоверности, при которых условие two_obuch может выполниться"""
+    if known > 0:
+        return (0.0, 1.0, True)
+    return None
+
+
+class Gate:
+    """
+    Условие запуска нечеткого вывода по достоверностям двух детекторов.
+
+    Условие должно быть симметричным, чтобы первым можно было запускать любой
+    из детекторов.
+
+    Args:
+        passes (callable): passes(input1, input2) -> bool.
+        feasible (callable): feasible(известная достоверность) -> (lo, hi, lo_open)
+            или None - множество значений второй достоверности, при которых
+            passes может выполниться.
+    """
+
+    def __init__(self, passes, feasible):
+        self.passes = passes
+        self.feasible = feasible
+
+
+GATES = {
+    "big_logika": Gate(big_logika_passes, big_logika_feasible),
+    "two_obuch": Gate(two_obuch_passes, two_obuch_feasible),
+}
+
+
+def _confidence(result):
+    """Достоверность из результата detect: число, массив или (достоверность, рамка)"""
+    if isinstance(result, tuple):
+        result = result[0]
+    return float(np.ravel(result)[0])
+
+
+class CascadeRunner:
+    """
+    Каскад из двух детекторов с пропуском второго.
+
+    Сначала запускается детектор first (обычно более дешевый). Если по его
+    достоверности условие gate не может выполниться ни при каком результате
+    второго детектора, второй не запускается. Пропуск точный: решение
+    каскада всегда совпадает с решением при запуске обоих детекторов. Если
+    задан порог threshold, решение - "условие выполнено и нечеткий результат
+    >= threshold"; порог на пропуск второго детектора не влияет.
+
+    Args:
+        detectors (list): Две пары (модель или путь к весам, цель детекции), как в EnsembleRunner.
+        gate (str | Gate): Условие из GATES или свой Gate.
+        detect (callable): Функция detect(model, image, target); результат - достоверность,
+            массив достоверностей (берется первая) или пара (достоверность, рамка).
+        fuzzy_batch (callable | None): Пакетный нечеткий вывод inputs (N, 2) -> (N,),
+            например big_logika.infer_batch; нужен для score и threshold.
+        threshold (float | None): Порог результата для решения.
+        first (int): Номер детектора, запускаемого первым (0 или 1).
+    """
+
+    def __init__(self, detectors, gate="big_logika", detect=detect_confidences, fuzzy_batch=None, threshold=None,
+                 first=0):
+        if len(detectors) != 2:
+            raise ValueError(f"Каскад строится из двух детекторов, получено {len(detectors)}")
+        if first not in (0, 1):
+            raise ValueError(f"first должен быть 0 или 1, получено {first}")
+        if threshold is not None and fuzzy_batch is None:
+            raise ValueError("Для порога threshold нужен fuzzy_batch")
+        if isinstance(gate, str):
+            if gate not in GATES:
+                raise ValueError(f"Неизвестное условие: {gate!r}, доступны: {sorted(GATES)}")
+            gate = GATES[gate]
+        self.detectors = [(get_model(model) if isinstance(model, str) else model, target) for model, target in detectors]
+        self.gate = gate
+        self.detect = detect
+        self.fuzzy_batch = fuzzy_batch
+        self.threshold = threshold
+        self.first = first
+        self.paths = Counter()
+
+    def _run_one(self, index, image):
+        model, target = self.detectors[index]
+        with span(f"model{index + 1}", target=str(target)):
+            return self.detect(model, image, target)
+
+    def run(self, image):
+        """
+        Каскадная детекция на изображении.
+
+        Args:
+            image (str | np.ndarray): Путь к изображению или изображение.
+
+        Returns:
+            CascadeResult: Результаты, решение и путь каскада.
+        """
+        second = 1 - self.first
+        results = [None, None]
+        results[self.first] = self._run_one(self.first, image)
+        known = _confidence(results[self.first])
+
+        path = PATH_SKIPPED_GATE if self.gate.feasible(known) is None else PATH_BOTH
+        self.paths[path] += 1
+
+        confidences = [None, None]
+        confidences[self.first] = known
+        if path != PATH_BOTH:
+            return CascadeResult(results, confidences, False, None, path)
+
+        results[second] = self._run_one(second, image)
+        confidences[second] = _confidence(results[second])
+        passed = bool(self.gate.passes(*confidences))
+        score = None
+        if passed and self.fuzzy_batch is not None:
+            score = float(self.fuzzy_batch(np.array([confidences], dtype=np.float64))[0])
+            if self.threshold is not None:
+                passed = score >= self.threshold
+        return CascadeResult(results, confidences, passed, score, path)
+
+    def stats(self):
+        """Счетчики путей каскада и доля пропусков второго детектора"""
+        runs = sum(self.paths.values())
+        skipped = runs - self.paths[PATH_BOTH]
+        return {
+            "runs": runs,
+            "paths": {path: self.paths[path] for path in PATHS},
+            "second_skipped": skipped / runs if runs else 0.0,
+        }
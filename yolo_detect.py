@@ -0,0 +1,229 @@
+"""Пакетная потоковая детекция YOLO по каталогам, маскам и спискам изображений."""
+import argparse
+import glob
+import os
+from itertools import islice
+
+import numpy as np
+
+from pipeline_trace import span
+
+IMAGE_EXTENSIONS = (".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff", ".webp")
+
+
+def iter_image_paths(source):
+    """
+    Лениво перечисляет пути к изображениям.
+
+    Args:
+        source (str | iterable): Каталог, маска glob ("images/*.jpg"), путь к
+            одному файлу или итерируемый набор путей.
+
+    Yields:
+        str: Путь к изображению.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        yield from source
+        return
+
+    source = os.fspath(source)
+    if os.path.isdir(source):
+        names = sorted(entry.name for entry in os.scandir(source) if entry.is_file())
+        for name in names:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(source, name)
+    elif glob.has_magic(source):
+        yield from glob.iglob(source, recursive=True)
+    else:
+        yield source
+
+
+def batched(iterable, size):
+    """Разбивает итерируемый объект на списки длиной не больше size"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def class_ids(model, class_names):
+    """
+    Переводит имена классов в их номера в модели.
+
+    Args:
+        model (YOLO): Модель детекции объектов.
+        class_names (sequence): Имена классов.
+
+    Returns:
+        np.ndarray: Номера классов в порядке class_names.
+    """
+    by_name = {name: class_id for class_id, name in model.names.items()}
+    missing = [name for name in class_names if name not in by_name]
+    if missing:
+        raise ValueError(f"Классы {missing} отсутствуют в модели, доступны: {sorted(by_name)}")
+    return np.array([by_name[name] for name in class_names], dtype=np.intp)
+
+
+def _to_numpy(values):
+    """Тензор torch (в том числе на GPU) или массив -> np.ndarray"""
+    if hasattr(values, "cpu"):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+
+def _boxes_arrays(result):
+    boxes = result.boxes
+    conf = _to_numpy(boxes.conf).astype(np.float64, copy=False).reshape(-1)
+    cls = _to_numpy(boxes.cls).astype(np.intp).reshape(-1)
+    return boxes, conf, cls
+
+
+def class_confidences(result, ids, top_k=None):
+    """
+    Достоверности запрошенных классов по тензорам boxes.cls/boxes.conf целиком.
+
+    Результат не зависит от порядка рамок: берется максимум (или top_k лучших)
+    по каждому классу.
+
+    Args:
+        result (Results): Результат детекции одного изображения.
+        ids (np.ndarray): Номера классов.
+        top_k (int | None): Сколько лучших достоверностей вернуть для класса.
+
+    Returns:
+        np.ndarray: Форма (len(ids),) или (len(ids), top_k); 0 там, где рамок нет.
+    """
+    ids = np.asarray(ids, dtype=np.intp)
+    _, conf, cls = _boxes_arrays(result)
+    n_classes = max(int(ids.max(initial=-1)), int(cls.max(initial=-1))) + 1
+
+    if top_k is None:
+        best = np.zeros(n_classes, dtype=np.float64)
+        np.maximum.at(best, cls, conf)
+        return best[ids]
+
+    # Сортировка по классу, внутри класса - по убыванию достоверности
+    order = np.lexsort((-conf, cls))
+    cls, conf = cls[order], conf[order]
+    rank = np.arange(len(cls)) - np.searchsorted(cls, cls)
+    row_of = np.full(n_classes, -1, dtype=np.intp)
+    row_of[ids] = np.arange(len(ids))
+    keep = (rank < top_k) & (row_of[cls] >= 0)
+
+    result_k = np.zeros((len(ids), top_k), dtype=np.float64)
+    result_k[row_of[cls[keep]], rank[keep]] = conf[keep]
+    # Повторяющиеся классы в ids получают одинаковые строки
+    return result_k[row_of[ids]]
+
+
+def class_best_boxes(result, ids):
+    """
+    Максимальная достоверность и соответствующая рамка для каждого класса.
+
+    Args:
+        result (Results): Результат детекции одного изображения.
+        ids (np.ndarray): Номера классов.
+
+    Returns:
+        tuple: (np.ndarray достоверностей формы (len(ids),),
+        np.ndarray рамок (xmin, ymin, xmax, ymax) формы (len(ids), 4); NaN, если класса нет).
+    """
+    ids = np.asarray(ids, dtype=np.intp)
+    boxes, conf, cls = _boxes_arrays(result)
+    xyxy = _to_numpy(boxes.xyxy).astype(np.float64, copy=False).reshape(-1, 4)
+
+    matches = cls[None, :] == ids[:, None]
+    scores = np.where(matches, conf[None, :], -1.0)
+    best = scores.argmax(axis=1) if len(conf) else np.zeros(len(ids), dtype=np.intp)
+    found = matches.any(axis=1)
+
+    confidences = np.where(found, conf[best] if len(conf) else 0.0, 0.0)
+    best_boxes = np.full((len(ids), 4), np.nan)
+    best_boxes[found] = xyxy[best[found]]
+    return confidences, best_boxes
+
+
+def class_boxes(result, ids):
+    """
+    Все рамки запрошенных классов по убыванию достоверности.
+
+    Args:
+        result (Results): Результат детекции одного изображения.
+        ids (np.ndarray): Номера классов.
+
+    Returns:
+        tuple: (np.ndarray достоверностей формы (M,), np.ndarray рамок
+        (xmin, ymin, xmax, ymax) формы (M, 4), np.ndarray номеров классов формы (M,)).
+    """
+    boxes, conf, cls = _boxes_arrays(result)
+    xyxy = _to_numpy(boxes.xyxy).astype(np.float64, copy=False).reshape(-1, 4)
+    keep = np.isin(cls, np.asarray(ids, dtype=np.intp))
+    order = np.argsort(-conf[keep], kind="stable")
+    return conf[keep][order], xyxy[keep][order], cls[keep][order]
+
+
+def detect_confidences(model, source, class_names, top_k=None):
+    """
+    Детекция на одном изображении с достоверностями нужных классов.
+
+    Args:
+        model (YOLO): Модель детекции объектов.
+        source (str | np.ndarray): Путь к изображению или само изображение.
+        class_names (sequence): Имена классов.
+        top_k (int | None): Сколько лучших достоверностей вернуть для класса.
+
+    Returns:
+        np.ndarray: Достоверности в порядке class_names, как в class_confidences.
+    """
+    ids = class_ids(model, class_names)
+    with span("predict"):
+        results = model.predict(source, verbose=False)
+    with span("boxes"):
+        per_result = [class_confidences(result, ids, top_k) for result in results]
+    if not per_result:
+        shape = (len(ids),) if top_k is None else (len(ids), top_k)
+        return np.zeros(shape, dtype=np.float64)
+    return np.max(per_result, axis=0)
+
+
+def detect_batched(model, source, target_classes, batch_size=16, top_k=None, **predict_kwargs):
+    """
+    Потоковая пакетная детекция с достоверностями нужных классов.
+
+    Изображения подаются в модель пачками по batch_size в режиме stream, поэтому
+    в памяти одновременно находится только одна пачка.
+
+    Args:
+        model (YOLO): Модель детекции объектов.
+        source (str | iterable): Каталог, маска glob или набор путей.
+        target_classes (sequence): Имена классов, достоверности которых нужны.
+        batch_size (int): Размер пачки.
+        top_k (int | None): Сколько лучших достоверностей вернуть для класса.
+        **predict_kwargs: Дополнительные параметры model.predict (conf, imgsz, device...).
+
+    Yields:
+        tuple: (путь, np.ndarray достоверностей в порядке target_classes).
+    """
+    ids = class_ids(model, target_classes)
+    for batch in batched(iter_image_paths(source), batch_size):
+        results = model.predict(batch, stream=True, batch=len(batch), verbose=False, **predict_kwargs)
+        for path, result in zip(batch, results):
+            yield path, class_confidences(result, ids, top_k)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пакетная детекция YOLO с выводом достоверностей классов в CSV")
+    parser.add_argument("weights", help="Файл весов модели (.pt)")
+    parser.add_argument("source", help="Каталог, маска glob или файл изображения")
+    parser.add_argument("--classes", nargs="+", required=True, help="Имена классов")
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+
+    model = YOLO(args.weights)
+    print(",".join(["path"] + args.classes))
+    for path, confidences in detect_batched(model, args.source, args.classes, args.batch_size):
+        print(",".join([path] + [f"{c:.4f}" for c in confidences]))
@@ -0,0 +1,145 @@
+"""Параллельный запуск нескольких детекторов на одном изображении."""
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pipeline_trace import span
+from yolo_detect import detect_confidences
+from yolo_registry import get_model
+
+# Детекторы рабочего процесса для backend="process", создаются в _init_worker
+_WORKER_DETECTORS = None
+
+
+def _resolve(model):
+    return get_model(model) if isinstance(model, str) else model
+
+
+def _init_worker(detectors, detect):
+    global _WORKER_DETECTORS
+    _WORKER_DETECTORS = [(_resolve(model), target, detect) for model, target in detectors]
+
+
+def _share_image(image):
+    """Копирует изображение в общую память; в рабочие процессы уходят только имя, форма и тип"""
+    block = shared_memory.SharedMemory(create=True, size=max(image.nbytes, 1))
+    np.ndarray(image.shape, dtype=image.dtype, buffer=block.buf)[...] = image
+    return block, (block.name, image.shape, image.dtype.str)
+
+
+def _run_in_worker(index, image, shared=None):
+    model, target, detect = _WORKER_DETECTORS[index]
+    block = None
+    if shared is not None:
+        name, shape, dtype = shared
+        block = shared_memory.SharedMemory(name)
+        image = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        image.setflags(write=False)
+    try:
+        with span(f"model{index + 1}", target=str(target)):
+            return detect(model, image, target)
+    finally:
+        if block is not None:
+            # Представление должно быть освобождено до закрытия блока
+            del image
+            block.close()
+
+
+class EnsembleRunner:
+    """
+    Запускает N детекторов на одном изображении одновременно.
+
+    Задержка на изображение приближается к задержке самой медленной модели,
+    а не к сумме задержек. Потоки подходят для PyTorch (инференс отпускает GIL),
+    процессы - когда модели должны работать в отдельных интерпретаторах.
+
+    Args:
+        detectors (list): Пары (модель или путь к весам, цель детекции). Цель
+            передается в detect как есть: для detect_confidences это список
+            имен классов.
+        detect (callable): Функция detect(model, image, target); должна
+            сериализоваться pickle для backend="process".
+        backend (str): "thread" или "process". Процессам путь к изображению
+            передается как есть, а декодированное изображение копируется один
+            раз в общую память (multiprocessing.shared_memory) вместо pickle
+            на каждую модель.
+        max_workers (int | None): Размер пула; по умолчанию по числу детекторов.
+    """
+
+    def __init__(self, detectors, detect=detect_confidences, backend="thread", max_workers=None):
+        if backend not in ("thread", "process"):
+            raise ValueError(f"Неизвестный backend: {backend!r}")
+        self.detect = detect
+        self.backend = backend
+        max_workers = max_workers or len(detectors)
+
+        if backend == "thread":
+            self._detectors = [(_resolve(model), target) for model, target in detectors]
+            # Один экземпляр модели не потокобезопасен, поэтому на модель своя блокировка
+            locks = {}
+            self._locks = [locks.setdefault(id(model), threading.Lock()) for model, _ in self._detectors]
+            self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="ensemble")
+        else:
+            if not all(isinstance(model, str) for model, _ in detectors):
+                raise ValueError("Для backend='process' детекторы задаются путями к весам")
+            self._detectors = list(detectors)
+            self._pool = ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(self._detectors, detect))
+
+    def _run_one(self, index, image):
+        model, target = self._detectors[index]
+        with self._locks[index], span(f"model{index + 1}", target=str(target)):
+            return self.detect(model, image, target)
+
+    def run(self, image):
+        """
+        Запускает все детекторы на изображении.
+
+        Args:
+            image (str | np.ndarray): Путь к изображению или изображение.
+
+        Returns:
+            list: Результаты detect в порядке детекторов.
+        """
+        if self.backend == "thread":
+            futures = [self._pool.submit(self._run_one, index, image) for index in range(len(self._detectors))]
+            return [future.result() for future in futures]
+
+        if not isinstance(image, np.ndarray):
+            futures = [self._pool.submit(_run_in_worker, index, image) for index in range(len(self._detectors))]
+            return [future.result() for future in futures]
+        block, shared = _share_image(image)
+        try:
+            futures = [self._pool.submit(_run_in_worker, index, None, shared) for index in range(len(self._detectors))]
+            return [future.result() for future in futures]
+        finally:
+            block.close()
+            block.unlink()
+
+    def confidences(self, image):
+        """Достоверности всех детекторов одним плоским массивом"""
+        return np.concatenate([np.atleast_1d(np.asarray(result, dtype=np.float64)) for result in self.run(image)])
+
+    def score(self, image, fuzzy):
+        """
+        Детекция всеми моделями и нечеткий вывод по их достоверностям.
+
+        Args:
+            image (str | np.ndarray): Путь к изображению или изображение.
+            fuzzy (callable): Нечеткая функция, например main(input1, input2).
+
+        Returns:
+            tuple: (результат fuzzy, np.ndarray достоверностей).
+        """
+        confidences = self.confidences(image)
+        return fuzzy(*confidences), confidences
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
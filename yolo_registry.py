@@ -0,0 +1,179 @@
+"""Реестр моделей YOLO уровня процесса: загрузка весов один раз, прогрев и переиспользование."""
+import os
+import threading
+
+import numpy as np
+
+
+def _load_yolo(weights):
+    from ultralytics import YOLO
+
+    return YOLO(weights)
+
+
+def warm_up(model, imgsz=640, device=None, half=False, runs=1):
+    """
+    Прогрев модели на пустом изображении.
+
+    Первый вызов модели инициализирует предиктор, переносит веса на устройство
+    и выбирает алгоритмы свертки, поэтому он заметно медленнее следующих.
+
+    Args:
+        model (YOLO): Модель детекции объектов.
+        imgsz (int): Размер входа модели.
+        device (str | None): Устройство ("cpu", "0", ...); None - по умолчанию.
+        half (bool): Использовать ли FP16.
+        runs (int): Число прогревочных проходов.
+    """
+    dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    for _ in range(runs):
+        model.predict(dummy, imgsz=imgsz, device=device, half=half, verbose=False)
+
+
+class ConfiguredModel:
+    """
+    Модель с конфигурацией из реестра.
+
+    Каждый вызов predict получает устройство, размер входа и FP16, с которыми
+    модель хранится в реестре; явно переданные параметры вызова важнее.
+    Остальные атрибуты (names и т.д.) берутся у самой модели.
+
+    Args:
+        model (YOLO): Модель детекции объектов.
+        device (str | None): Устройство ("cpu", "0", ...).
+        imgsz (int): Размер входа модели.
+        half (bool): Использовать ли FP16.
+    """
+
+    def __init__(self, model, device=None, imgsz=640, half=False):
+        self.model = model
+        self.config = {"device": device, "imgsz": imgsz, "half": half}
+
+    def predict(self, source=None, **kwargs):
+        return self.model.predict(source, **{**self.config, **kwargs})
+
+    __call__ = predict
+
+    def __getattr__(self, name):
+        # Вызывается только для отсутствующих атрибутов; до __init__ (копирование,
+        # распаковка) model еще нет, и обращение к нему не должно зацикливаться
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+class ModelRegistry:
+    """
+    Потокобезопасный реестр загруженных моделей.
+
+    Модель идентифицируется абсолютным путем к весам и конфигурацией
+    (устройство, размер входа, FP16). Каждая пара загружается и прогревается
+    один раз, а все потоки получают один и тот же экземпляр ConfiguredModel,
+    который передает эту конфигурацию в каждый вызов predict.
+
+    Args:
+        loader (callable): Функция загрузки модели по пути к весам.
+    """
+
+    def __init__(self, loader=_load_yolo):
+        self._loader = loader
+        self._models = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(weights, device=None, imgsz=640, half=False):
+        return (os.path.abspath(os.fspath(weights)), device, imgsz, half)
+
+    def get(self, weights, device=None, imgsz=640, half=False, warmup=True):
+        """
+        Возвращает общий экземпляр модели, загружая и прогревая его при первом обращении.
+
+        Args:
+            weights (str): Путь к файлу весов (.pt).
+            device (str | None): Устройство ("cpu", "0", ...).
+            imgsz (int): Размер входа модели.
+            half (bool): Использовать ли FP16.
+            warmup (bool): Прогревать ли модель после загрузки.
+
+        Returns:
+            ConfiguredModel: Загруженная модель с конфигурацией.
+        """
+        key = self._key(weights, device, imgsz, half)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Загрузка под отдельной блокировкой ключа: другие модели грузятся параллельно,
+        # а одновременные запросы одной модели ждут единственной загрузки
+        with key_lock:
+            with self._lock:
+                model = self._models.get(key)
+            if model is not None:
+                return model
+            model = ConfiguredModel(self._loader(key[0]), device, imgsz, half)
+            if warmup:
+                warm_up(model, imgsz, device, half)
+            with self._lock:
+                self._models[key] = model
+            return model
+
+    def evict(self, weights=None, device=None, imgsz=None, half=None):
+        """
+        Удаляет модели из реестра.
+
+        Args:
+            weights (str | None): Путь к весам; None - все модели.
+            device, imgsz, half: Если заданы, удаляются только модели с такой конфигурацией.
+
+        Returns:
+            int: Число удаленных моделей.
+        """
+        path = None if weights is None else os.path.abspath(os.fspath(weights))
+        pattern = (path, device, imgsz, half)
+        with self._lock:
+            keys = [
+                key for key in self._models
+                if all(wanted is None or wanted == actual for wanted, actual in zip(pattern, key))
+            ]
+            for key in keys:
+                del self._models[key]
+                self._key_locks.pop(key, None)
+        return len(keys)
+
+    def keys(self):
+        with self._lock:
+            return list(self._models)
+
+    def contains(self, weights, device=None, imgsz=640, half=False):
+        """Загружена ли модель с такими весами и конфигурацией (те же параметры, что у get)"""
+        return self._key(weights, device, imgsz, half) in self.keys()
+
+    def __contains__(self, item):
+        """
+        item in registry: путь к весам (конфигурация по умолчанию, как у get(weights))
+        или кортеж аргументов get (weights, device, imgsz, half).
+        """
+        if isinstance(item, tuple):
+            return self.contains(*item)
+        return self.contains(item)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._models)
+
+
+# Общий реестр процесса
+registry = ModelRegistry()
+
+
+def get_model(weights, device=None, imgsz=640, half=False, warmup=True):
+    """Модель из общего реестра процесса (см. ModelRegistry.get)"""
+    return registry.get(weights, device, imgsz, half, warmup)
+
+
+def evict_model(weights=None, device=None, imgsz=None, half=None):
+    """Удаляет модели из общего реестра процесса (см. ModelRegistry.evict)"""
+    return registry.evict(weights, device, imgsz, half)
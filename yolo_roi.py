@@ -0,0 +1,166 @@
+"""Двухэтапная детекция: вторая модель работает только на областях вокруг рамок первой."""
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from image_buffer import as_image
+from pipeline_trace import span
+from yolo_detect import batched, class_best_boxes, class_boxes, class_ids
+
+TwoStageResult = namedtuple("TwoStageResult", ["first", "second", "regions", "pixel_fraction"])
+TwoStageResult.__doc__ = """
+Результат двухэтапной детекции.
+
+first и second - пары (достоверность, рамка (xmin, ymin, xmax, ymax) в
+координатах всего изображения) или (0, None), как у detect_objects в
+two_obuch_model_and_Mamdani.py; regions - области второго этапа формы (M, 4);
+pixel_fraction - доля пикселей изображения, которую просмотрела вторая модель.
+"""
+
+
+def merge_regions(regions):
+    """
+    Объединяет пересекающиеся области в охватывающие прямоугольники.
+
+    Пересекающиеся вырезки иначе просматривались бы второй моделью дважды.
+
+    Args:
+        regions (np.ndarray): Области (x0, y0, x1, y1) формы (M, 4).
+
+    Returns:
+        np.ndarray: Непересекающиеся области формы (K, 4), K <= M.
+    """
+    regions = [list(region) for region in regions]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                a, b = regions[i], regions[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    regions[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del regions[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return np.array(regions, dtype=np.intp).reshape(-1, 4)
+
+
+def roi_regions(boxes, image_shape, pad=0.25, min_size=64, merge=True):
+    """
+    Области второго этапа вокруг рамок первой модели.
+
+    Args:
+        boxes (np.ndarray): Рамки (xmin, ymin, xmax, ymax) формы (M, 4).
+        image_shape (tuple): Форма изображения (H, W, ...).
+        pad (float): Отступ с каждой стороны в долях ширины и высоты рамки.
+        min_size (int): Минимальная сторона области в пикселях (контекст для
+            маленьких рамок).
+        merge (bool): Объединять пересекающиеся области.
+
+    Returns:
+        np.ndarray: Целочисленные области (x0, y0, x1, y1) в пределах изображения, форма (K, 4).
+    """
+    height, width = image_shape[:2]
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+    sizes = np.maximum((boxes[:, 2:] - boxes[:, :2]) * (1 + 2 * pad), min_size)
+    regions = np.concatenate([np.floor(centers - sizes / 2), np.ceil(centers + sizes / 2)], axis=1)
+    regions = np.clip(regions, 0, [width, height, width, height]).astype(np.intp)
+    regions = regions[(regions[:, 2] > regions[:, 0]) & (regions[:, 3] > regions[:, 1])]
+    return merge_regions(regions) if merge else regions
+
+
+def detect_in_regions(model, image, regions, target_class, batch_size=16):
+    """
+    Детекция класса на вырезках изображения пачками.
+
+    Args:
+        model (YOLO): Модель детекции объектов.
+        image (np.ndarray): Изображение (H, W, 3).
+        regions (np.ndarray): Области (x0, y0, x1, y1) формы (K, 4).
+        target_class (str): Класс объекта.
+        batch_size (int): Вырезок в одном вызове predict.
+
+    Returns:
+        tuple: Максимальная достоверность и рамка в координатах всего
+        изображения; (0, None), если объект не найден.
+    """
+    ids = class_ids(model, [target_class])
+    best_conf, best_box = 0.0, None
+    for batch in batched(range(len(regions)), batch_size):
+        # Вырезки - представления общего буфера без копирования
+        crops = [image[regions[k, 1]:regions[k, 3], regions[k, 0]:regions[k, 2]] for k in batch]
+        with span("predict", crops=len(crops)):
+            results = model.predict(crops, verbose=False)
+        with span("boxes"):
+            for k, result in zip(batch, results):
+                confidences, boxes = class_best_boxes(result, ids)
+                if confidences[0] > best_conf:
+                    x0, y0 = regions[k, :2]
+                    best_conf = float(confidences[0])
+                    best_box = tuple(boxes[0] + [x0, y0, x0, y0])
+    return best_conf, best_box
+
+
+def detect_two_stage(model1, model2, image, target1, target2, pad=0.25, min_size=64, max_regions=8,
+                     batch_size=16):
+    """
+    Первая модель на всем изображении, вторая - только на областях вокруг ее рамок.
+
+    Если первая модель не нашла объект, вторая не запускается (условие
+    two_obuch_model_and_Mamdani.py "обе достоверности больше 0" все равно не
+    выполнится).
+
+    Args:
+        model1, model2 (YOLO): Модели первого и второго этапа.
+        image (str | np.ndarray): Путь к изображению или буфер из load_image.
+        target1, target2 (str): Классы объектов первой и второй модели.
+        pad (float): Отступ вокруг рамки в долях ее размеров.
+        min_size (int): Минимальная сторона области в пикселях.
+        max_regions (int): Сколько лучших рамок первой модели использовать.
+        batch_size (int): Вырезок в одном вызове predict второй модели.
+
+    Returns:
+        TwoStageResult: Результаты обеих моделей, области и доля просмотренных пикселей.
+    """
+    image = as_image(image)
+    with span("model1", target=target1):
+        with span("predict"):
+            result = model1.predict(image, verbose=False)[0]
+        with span("boxes"):
+            confidences, boxes, _ = class_boxes(result, class_ids(model1, [target1]))
+    if not len(confidences):
+        return TwoStageResult((0, None), (0, None), np.zeros((0, 4), dtype=np.intp), 0.0)
+    first = (float(confidences[0]), tuple(boxes[0]))
+
+    regions = roi_regions(boxes[:max_regions], image.shape, pad, min_size)
+    with span("model2", target=target2, regions=len(regions)):
+        second = detect_in_regions(model2, image, regions, target2, batch_size)
+    area = np.prod(regions[:, 2:] - regions[:, :2], axis=1).sum()
+    return TwoStageResult(first, second, regions, float(area) / (image.shape[0] * image.shape[1]))
+
+
+if __name__ == "__main__":
+    from yolo_registry import get_model
+
+    parser = argparse.ArgumentParser(description="Двухэтапная детекция с вырезками для второй модели")
+    parser.add_argument("image", help="Путь к изображению")
+    parser.add_argument("weights1", help="Веса первой модели")
+    parser.add_argument("weights2", help="Веса второй модели")
+    parser.add_argument("--first", default="neck ass", help="Класс первой модели")
+    parser.add_argument("--second", default="penis", help="Класс второй модели")
+    parser.add_argument("--pad", type=float, default=0.25, help="Отступ вокруг рамки в долях ее размеров")
+    parser.add_argument("--min-size", type=int, default=64)
+    parser.add_argument("--max-regions", type=int, default=8)
+    args = parser.parse_args()
+
+    outcome = detect_two_stage(
+        get_model(args.weights1), get_model(args.weights2), args.image, args.first, args.second,
+        args.pad, args.min_size, args.max_regions,
+    )
+    print(f"{args.first}: {outcome.first[0]:.2f} {outcome.first[1]}")
+    print(f"{args.second}: {outcome.second[0]:.2f} {outcome.second[1]}")
+    print(f"Областей второго этапа: {len(outcome.regions)}, доля пикселей: {outcome.pixel_fraction:.1%}")
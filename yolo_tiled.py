@@ -0,0 +1,198 @@
+"""Детекция на изображениях высокого разрешения по перекрывающимся плиткам с объединением рамок."""
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+from image_buffer import as_image
+from pipeline_trace import span
+from yolo_detect import batched, class_boxes, class_confidences, class_ids
+
+
+def _starts(length, tile, stride):
+    """Начала плиток вдоль оси; последняя плитка прижата к краю"""
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, stride))
+    return starts + [length - tile]
+
+
+def tile_grid(shape, tile=640, overlap=0.2):
+    """
+    Перекрывающиеся плитки, покрывающие изображение.
+
+    Args:
+        shape (tuple): Форма изображения (H, W, ...).
+        tile (int): Сторона плитки в пикселях (обычно imgsz модели, чтобы
+            плитка подавалась без уменьшения).
+        overlap (float): Доля перекрытия соседних плиток; объект на границе
+            целиком попадает хотя бы в одну плитку, если он меньше overlap * tile.
+
+    Returns:
+        np.ndarray: Плитки (x0, y0, x1, y1) формы (K, 4).
+    """
+    if not 0 <= overlap < 1:
+        raise ValueError(f"overlap должен быть в [0, 1), получено {overlap}")
+    height, width = shape[:2]
+    stride = max(1, int(tile * (1 - overlap)))
+    tiles = [
+        (x, y, min(x + tile, width), min(y + tile, height))
+        for y in _starts(height, tile, stride)
+        for x in _starts(width, tile, stride)
+    ]
+    return np.array(tiles, dtype=np.intp)
+
+
+NMS_METRICS = ("iou", "ios")
+
+
+def nms(boxes, scores, classes, iou=0.5, metric="iou"):
+    """
+    Жадное подавление немаксимумов отдельно для каждого класса.
+
+    Рамки разных классов сдвигаются на непересекающиеся участки координат,
+    поэтому друг друга не подавляют. Метрика "ios" (пересечение над площадью
+    меньшей рамки) подавляет и обрезки объекта на границе плитки, целиком
+    лежащие внутри полной рамки из соседней плитки.
+
+    Args:
+        boxes (np.ndarray): Рамки (xmin, ymin, xmax, ymax) формы (M, 4).
+        scores (np.ndarray): Достоверности формы (M,).
+        classes (np.ndarray): Номера классов формы (M,).
+        iou (float): Порог перекрытия.
+        metric (str): "iou" - пересечение над объединением, "ios" - над меньшей площадью.
+
+    Returns:
+        np.ndarray: Номера оставленных рамок по убыванию достоверности.
+    """
+    if metric not in NMS_METRICS:
+        raise ValueError(f"Неизвестная метрика NMS: {metric!r}, доступны: {NMS_METRICS}")
+    if not len(scores):
+        return np.zeros(0, dtype=np.intp)
+    shifted = boxes + (classes * (boxes.max() + 1))[:, None]
+    x0, y0, x1, y1 = shifted.T
+    areas = (x1 - x0) * (y1 - y0)
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while len(order):
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        width = np.clip(np.minimum(x1[best], x1[rest]) - np.maximum(x0[best], x0[rest]), 0, None)
+        height = np.clip(np.minimum(y1[best], y1[rest]) - np.maximum(y0[best], y0[rest]), 0, None)
+        inter = width * height
+        if metric == "iou":
+            overlap = inter / (areas[best] + areas[rest] - inter)
+        else:
+            overlap = inter / np.minimum(areas[best], areas[rest])
+        order = rest[overlap <= iou]
+    return np.array(keep, dtype=np.intp)
+
+
+def _tile_boxes(model, image, tiles, batch, ids):
+    """Рамки классов ids одной пачки плиток в координатах всего изображения"""
+    crops = [image[tiles[k, 1]:tiles[k, 3], tiles[k, 0]:tiles[k, 2]] for k in batch]
+    with span("predict", tiles=len(crops)):
+        results = model.predict(crops, verbose=False)
+    parts = []
+    with span("boxes"):
+        for k, result in zip(batch, results):
+            conf, xyxy, cls = class_boxes(result, ids)
+            parts.append((xyxy + np.tile(tiles[k, :2], 2), conf, cls))
+    return parts
+
+
+def tiled_detections(model, image, tile=640, overlap=0.2, batch_size=8, iou=0.5, ids=None, metric="ios"):
+    """
+    Все рамки изображения, найденные по плиткам и объединенные NMS по классам.
+
+    Args:
+        model (YOLO | list): Модель или несколько экземпляров модели (например,
+            на разных устройствах): пачки плиток распределяются между ними и
+            выполняются параллельно в потоках.
+        image (str | np.ndarray): Путь к изображению или буфер из load_image.
+        tile (int): Сторона плитки.
+        overlap (float): Доля перекрытия плиток.
+        batch_size (int): Плиток в одном вызове predict.
+        iou (float): Порог NMS.
+        ids (np.ndarray | None): Номера классов; по умолчанию все классы модели.
+        metric (str): Метрика перекрытия NMS, как в nms.
+
+    Returns:
+        tuple: (достоверности (M,), рамки (M, 4), номера классов (M,)) по
+        убыванию достоверности.
+    """
+    image = as_image(image)
+    models = list(model) if isinstance(model, (list, tuple)) else [model]
+    if ids is None:
+        ids = np.array(sorted(models[0].names), dtype=np.intp)
+    tiles = tile_grid(image.shape, tile, overlap)
+    batches = list(batched(range(len(tiles)), batch_size))
+
+    if len(models) == 1:
+        parts = [part for batch in batches for part in _tile_boxes(models[0], image, tiles, batch, ids)]
+    else:
+        # Один экземпляр модели не потокобезопасен: пачки распределяются по кругу, на модель своя блокировка
+        locks = [threading.Lock() for _ in models]
+
+        def run(index, batch):
+            with locks[index % len(models)]:
+                return _tile_boxes(models[index % len(models)], image, tiles, batch, ids)
+
+        with ThreadPoolExecutor(len(models), thread_name_prefix="tiles") as pool:
+            futures = [pool.submit(run, index, batch) for index, batch in enumerate(batches)]
+            parts = [part for future in futures for part in future.result()]
+
+    with span("merge"):
+        xyxy = np.concatenate([part[0] for part in parts]) if parts else np.zeros((0, 4))
+        conf = np.concatenate([part[1] for part in parts]) if parts else np.zeros(0)
+        cls = np.concatenate([part[2] for part in parts]) if parts else np.zeros(0, dtype=np.intp)
+        keep = nms(xyxy, conf, cls, iou, metric)
+    return conf[keep], xyxy[keep], cls[keep]
+
+
+def detect_tiled(model, image, class_names, tile=640, overlap=0.2, batch_size=8, iou=0.5, top_k=None,
+                 metric="ios"):
+    """
+    Достоверности нужных классов по плиткам - замена detect_confidences для больших изображений.
+
+    Мелкие объекты не теряются при уменьшении всего снимка до размера входа
+    модели: каждая плитка подается почти в исходном разрешении.
+
+    Args:
+        model (YOLO | list): Модель или несколько ее экземпляров.
+        image (str | np.ndarray): Путь к изображению или буфер из load_image.
+        class_names (sequence): Имена классов.
+        tile, overlap, batch_size, iou, metric: Как в tiled_detections.
+        top_k (int | None): Сколько лучших достоверностей вернуть для класса.
+
+    Returns:
+        np.ndarray: Достоверности в порядке class_names формы (len(class_names),)
+        или (len(class_names), top_k), как у detect_confidences.
+    """
+    first = model[0] if isinstance(model, (list, tuple)) else model
+    ids = class_ids(first, class_names)
+    conf, xyxy, cls = tiled_detections(model, image, tile, overlap, batch_size, iou, ids, metric)
+    merged = SimpleNamespace(boxes=SimpleNamespace(conf=conf, cls=cls, xyxy=xyxy))
+    return class_confidences(merged, ids, top_k)
+
+
+if __name__ == "__main__":
+    from yolo_registry import get_model
+
+    parser = argparse.ArgumentParser(description="Детекция по перекрывающимся плиткам")
+    parser.add_argument("image", help="Путь к изображению")
+    parser.add_argument("weights", help="Веса модели YOLO")
+    parser.add_argument("--classes", nargs="+", required=True, help="Имена классов")
+    parser.add_argument("--tile", type=int, default=640, help="Сторона плитки в пикселях")
+    parser.add_argument("--overlap", type=float, default=0.2, help="Доля перекрытия плиток")
+    parser.add_argument("--batch-size", type=int, default=8, help="Плиток в одном вызове модели")
+    parser.add_argument("--iou", type=float, default=0.5, help="Порог NMS")
+    parser.add_argument("--metric", default="ios", choices=NMS_METRICS, help="Метрика перекрытия NMS")
+    args = parser.parse_args()
+
+    confidences = detect_tiled(get_model(args.weights), args.image, args.classes, args.tile, args.overlap,
+                               args.batch_size, args.iou, metric=args.metric)
+    for name, confidence in zip(args.classes, confidences):
+        print(f"{name}: {confidence:.2f}")
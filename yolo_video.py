@@ -0,0 +1,187 @@
+"""Оценка видео и последовательностей кадров с пропуском кадров и сглаживанием результата."""
+import argparse
+import os
+import sys
+from collections import deque, namedtuple
+
+import numpy as np
+
+from image_buffer import load_image
+from yolo_detect import IMAGE_EXTENSIONS, iter_image_paths
+
+FrameScore = namedtuple("FrameScore", "index confidences score smoothed detected")
+
+
+def iter_frames(source, stride=1):
+    """
+    Лениво читает кадры видеофайла или последовательности изображений.
+
+    Args:
+        source (str | iterable): Видеофайл, каталог/маска изображений или набор путей.
+        stride (int): Выдавать каждый stride-й кадр (остальные не декодируются).
+
+    Yields:
+        tuple: (номер кадра, изображение BGR).
+    """
+    is_video = isinstance(source, str) and os.path.isfile(source) and not source.lower().endswith(IMAGE_EXTENSIONS)
+    if not is_video:
+        for index, path in enumerate(iter_image_paths(source)):
+            if index % stride == 0:
+                yield index, load_image(path)
+        return
+
+    import cv2
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise FileNotFoundError(f"Не удалось открыть видео: {source}")
+    try:
+        index = 0
+        while True:
+            # grab() только читает пакет, а retrieve() декодирует нужные кадры
+            if not capture.grab():
+                break
+            if index % stride == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                yield index, frame
+            index += 1
+    finally:
+        capture.release()
+
+
+def frame_signature(frame, size=32):
+    """Уменьшенная копия кадра в оттенках серого для быстрого сравнения сцен"""
+    import cv2
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32) / 255
+
+
+class ExponentialSmoother:
+    """Экспоненциальное сглаживание: s = alpha * x + (1 - alpha) * s"""
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, value):
+        self.value = value if self.value is None else self.alpha * value + (1 - self.alpha) * self.value
+        return self.value
+
+
+class WindowSmoother:
+    """Скользящее среднее по последним window значениям"""
+
+    def __init__(self, window=5):
+        self._values = deque(maxlen=window)
+        self._sum = 0.0
+
+    def update(self, value):
+        if len(self._values) == self._values.maxlen:
+            self._sum -= self._values[0]
+        self._values.append(value)
+        self._sum += value
+        return self._sum / len(self._values)
+
+
+class VideoScorer:
+    """
+    Потоковая оценка кадров с детекцией не на каждом кадре.
+
+    Детекция и нечеткий вывод выполняются на каждом every-м кадре или при смене
+    сцены (среднее отличие уменьшенных кадров больше scene_threshold). На
+    остальных кадрах переносятся последние достоверности и результат, а
+    выход дефузификации сглаживается.
+
+    Args:
+        detect (callable): detect(frame) -> массив достоверностей.
+        fuzzy (callable): Нечеткий вывод fuzzy(*confidences) -> float.
+        every (int): Максимальный интервал между детекциями, кадры.
+        scene_threshold (float): Порог смены сцены; None - не проверять.
+        smoothing (str): "ema", "window" или "none".
+        alpha (float): Коэффициент экспоненциального сглаживания.
+        window (int): Окно скользящего среднего.
+    """
+
+    def __init__(self, detect, fuzzy, every=5, scene_threshold=0.08, smoothing="ema", alpha=0.3, window=5):
+        if smoothing not in ("ema", "window", "none"):
+            raise ValueError(f"Неизвестный метод сглаживания: {smoothing!r}")
+        self.detect = detect
+        self.fuzzy = fuzzy
+        self.every = every
+        self.scene_threshold = scene_threshold
+        self.smoothing = smoothing
+        self.alpha = alpha
+        self.window = window
+        self.frames = 0
+        self.detections = 0
+
+    def _smoother(self):
+        if self.smoothing == "ema":
+            return ExponentialSmoother(self.alpha)
+        if self.smoothing == "window":
+            return WindowSmoother(self.window)
+        return None
+
+    def process(self, frames):
+        """
+        Оценивает поток кадров.
+
+        Args:
+            frames (iterable): Пары (номер кадра, изображение), например из iter_frames.
+
+        Yields:
+            FrameScore: Номер кадра, достоверности, результат, сглаженный результат
+            и признак того, что на кадре выполнялась детекция.
+        """
+        smoother = self._smoother()
+        last_index = None
+        last_signature = None
+        confidences = score = None
+
+        for index, frame in frames:
+            signature = frame_signature(frame) if self.scene_threshold is not None else None
+            detected = (
+                last_index is None
+                or index - last_index >= self.every
+                or (signature is not None and np.abs(signature - last_signature).mean() > self.scene_threshold)
+            )
+            if detected:
+                confidences = np.asarray(self.detect(frame), dtype=np.float64)
+                score = float(self.fuzzy(*confidences))
+                last_index, last_signature = index, signature
+                self.detections += 1
+            self.frames += 1
+
+            smoothed = smoother.update(score) if smoother is not None else score
+            yield FrameScore(index, confidences, score, smoothed, detected)
+
+
+if __name__ == "__main__":
+    from big_logika import main
+    from yolo_ensemble import EnsembleRunner
+
+    parser = argparse.ArgumentParser(description="Оценка видео или последовательности кадров YOLO + Мамдани")
+    parser.add_argument("source", help="Видеофайл, каталог или маска изображений")
+    parser.add_argument("--weights1", default="best.pt")
+    parser.add_argument("--class1", default="neck ass")
+    parser.add_argument("--weights2", default="best1.pt")
+    parser.add_argument("--class2", default="penis")
+    parser.add_argument("--every", type=int, default=5, help="Детекция не реже чем раз в N кадров")
+    parser.add_argument("--scene-threshold", type=float, default=0.08, help="Порог смены сцены")
+    parser.add_argument("--smoothing", default="ema", choices=["ema", "window", "none"])
+    parser.add_argument("--alpha", type=float, default=0.3)
+    parser.add_argument("--window", type=int, default=5)
+    args = parser.parse_args()
+
+    with EnsembleRunner([(args.weights1, [args.class1]), (args.weights2, [args.class2])]) as ensemble:
+        scorer = VideoScorer(
+            ensemble.confidences, main, args.every, args.scene_threshold, args.smoothing, args.alpha, args.window
+        )
+        print(f"frame,{args.class1},{args.class2},score,smoothed,detected")
+        for item in scorer.process(iter_frames(args.source)):
+            c1, c2 = item.confidences
+            print(f"{item.index},{c1:.4f},{c2:.4f},{item.score:.4f},{item.smoothed:.4f},{int(item.detected)}")
+    print(f"Детекций: {scorer.detections} из {scorer.frames} кадров", file=sys.stderr)